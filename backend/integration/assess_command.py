@@ -26,6 +26,8 @@ except ImportError:
 from backend.integration.invest_command import calculate_ema_invest, process_custom_portfolio
 from backend.integration.quickscore_command import plot_ticker_graph
 from backend.integration.cultivate_command import run_cultivate_analysis_singularity
+from backend.integration.price_store import download_async
+from backend.integration.options_store import options_store
 
 # --- Constants (copied for self-containment) ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -36,7 +38,7 @@ PORTFOLIO_DB_FILE = os.path.join(BASE_DIR, 'portfolio_codes_database.csv')
 async def get_yf_download_robustly(tickers: list, **kwargs) -> pd.DataFrame:
     for attempt in range(3):
         try:
-            data = await asyncio.to_thread(yf.download, tickers=tickers, progress=False, **kwargs)
+            data = await download_async(tickers, progress=False, **kwargs)
             if not data.empty:
                 return data
         except Exception:
@@ -77,31 +79,9 @@ async def calculate_volatility_metrics(ticker: str, period: str) -> tuple[Option
         # --- New Implied Volatility (IV) Calculation Logic ---
         current_iv = None
         try:
-            expirations = stock_yf.options
-            if expirations:
-                # Find the expiration date closest to 30 days from now
-                today = datetime.now()
-                target_date = today + timedelta(days=30)
-                exp_dates = [datetime.strptime(d, '%Y-%m-%d') for d in expirations]
-                closest_date = min(exp_dates, key=lambda d: abs(d - target_date))
-                closest_date_str = closest_date.strftime('%Y-%m-%d')
-                
-                # Fetch the options chain for that date
-                opt_chain = await asyncio.to_thread(stock_yf.option_chain, closest_date_str)
-                last_price = hist_data['Close'].iloc[-1]
-
-                # Find the at-the-money (ATM) call and put
-                atm_call = opt_chain.calls.iloc[(opt_chain.calls['strike'] - last_price).abs().idxmin()]
-                atm_put = opt_chain.puts.iloc[(opt_chain.puts['strike'] - last_price).abs().idxmin()]
-
-                # Average the IV of the ATM call and put
-                iv_call = atm_call.get('impliedVolatility')
-                iv_put = atm_put.get('impliedVolatility')
-                
-                valid_ivs = [iv for iv in [iv_call, iv_put] if pd.notna(iv) and iv > 0]
-                if valid_ivs:
-                    current_iv = sum(valid_ivs) / len(valid_ivs)
-
+            # ATM call/put IV of the expiry closest to 30 days out; the chain
+            # comes from the local options store and the IV is added to its history
+            current_iv = await options_store.atm_iv_async(ticker, float(hist_data['Close'].iloc[-1]), target_days=30)
         except Exception:
             # Silently fail if options data is unavailable or calculation fails
             current_iv = None
@@ -363,6 +343,9 @@ async def handle_assess_command(args: List[str], ai_params: Optional[Dict] = Non
                     
                     current_iv, vol_rank = await calculate_volatility_metrics(ticker_a_item, selected_yf_period_a)
                     iv_display = f"{(current_iv * 100):.1f}%" if current_iv is not None else "N/A"
+                    # Where today's IV sits in the ticker's stored IV range (needs some history first)
+                    iv_rank = await asyncio.to_thread(options_store.iv_rank, ticker_a_item, current_iv) if current_iv is not None else None
+                    iv_rank_display = f"{iv_rank:.1f}" if iv_rank is not None else "N/A"
                     vr_display = f"{vol_rank:.1f}%" if vol_rank is not None else "N/A"
 
                     close_prices_series_a = hist_df_a[ticker_a_item].dropna()
@@ -379,22 +362,22 @@ async def handle_assess_command(args: List[str], ai_params: Optional[Dict] = Non
                     vol_score_min, vol_score_max = risk_tolerance_ranges_map[risk_tolerance_a_int]
                     correspondence_a = "Matches" if vol_score_min <= volatility_score_a <= vol_score_max else "No Match"
                     
-                    results_for_table_a.append([ticker_a_item, f"{period_change_pct_a:.2f}%", f"{aapc_val_a:.2f}%", volatility_score_a, iv_display, vr_display, beta_display, spy_corr_display, correspondence_a])
-                    assessment_summaries_ai_list.append(f"{ticker_a_item}({timeframe_upper_a},RT{risk_tolerance_a_int}):Chg {period_change_pct_a:.1f}%,VolSc {volatility_score_a},IV {iv_display},Beta {beta_display},SPYCorr {spy_corr_display},Match:{correspondence_a}")
+                    results_for_table_a.append([ticker_a_item, f"{period_change_pct_a:.2f}%", f"{aapc_val_a:.2f}%", volatility_score_a, iv_display, iv_rank_display, vr_display, beta_display, spy_corr_display, correspondence_a])
+                    assessment_summaries_ai_list.append(f"{ticker_a_item}({timeframe_upper_a},RT{risk_tolerance_a_int}):Chg {period_change_pct_a:.1f}%,VolSc {volatility_score_a},IV {iv_display},IVR {iv_rank_display},Beta {beta_display},SPYCorr {spy_corr_display},Match:{correspondence_a}")
 
                 except Exception as e_item_a:
-                    results_for_table_a.append([ticker_a_item, "CalcErr", "CalcErr", "CalcErr", "CalcErr", "CalcErr", "CalcErr", "CalcErr", f"Error"])
+                    results_for_table_a.append([ticker_a_item, "CalcErr", "CalcErr", "CalcErr", "CalcErr", "CalcErr", "CalcErr", "CalcErr", "CalcErr", f"Error"])
                     assessment_summaries_ai_list.append(f"{ticker_a_item}: Calculation Error ({e_item_a}).")
 
             if results_for_table_a: 
                 if not is_called_by_ai: 
                     print("\n**Stock Volatility Assessment Results (Code A)**")
                     results_for_table_a.sort(key=lambda x: x[3] if isinstance(x[3], (int,float)) else float('inf'))
-                    headers = ["Ticker", f"{timeframe_upper_a} Change", "AAPC (%)", "Vol Score (0-9)", "Current IV", "Volatility Rank", "Beta", "SPY Corr", "Risk Match"]
+                    headers = ["Ticker", f"{timeframe_upper_a} Change", "AAPC (%)", "Vol Score (0-9)", "Current IV", "IV Rank", "Volatility Rank", "Beta", "SPY Corr", "Risk Match"]
                     print(tabulate(results_for_table_a, headers=headers, tablefmt="pretty"))
                 else:
                     # Return structured table for frontend
-                    headers = ["Ticker", f"{timeframe_upper_a} Change", "AAPC (%)", "Vol Score", "IV", "Vol Rank", "Beta", "SPY Corr", "Risk Match"]
+                    headers = ["Ticker", f"{timeframe_upper_a} Change", "AAPC (%)", "Vol Score", "IV", "IV Rank", "Vol Rank", "Beta", "SPY Corr", "Risk Match"]
                     return {
                         "type": "table", 
                         "title": "Stock Volatility Assessment",
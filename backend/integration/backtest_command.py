@@ -1,9 +1,8 @@
 # --- Imports for backtest_command ---
 import asyncio
 import uuid
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
-import yfinance as yf
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -11,6 +10,11 @@ from tabulate import tabulate
 import json
 import logging
 
+try:
+    from backend.integration.price_store import download_async
+except ImportError:
+    from integration.price_store import download_async
+
 prometheus_logger = logging.getLogger('PROMETHEUS_CORE')
 
 # --- Helper Functions (from strategies_command) ---
@@ -45,23 +49,170 @@ def calculate_rsi(data: pd.DataFrame, period: int = 14) -> pd.Series:
     rs.replace([np.inf, -np.inf], 0, inplace=True) # Handle potential inf values after division
     return 100 - (100 / (1 + rs))
 
+# --- Trade Simulation ---
+
+VALID_STRATEGIES = [
+    'ma_crossover', 'rsi', 'busd', 'trend_following',
+    'mean_reversion', 'volatility_breakout', 'macd', 'bollinger_bands'
+]
+# Strategies whose sell signal flips straight into a short position (busd only goes flat)
+SHORTABLE_STRATEGIES = ['ma_crossover', 'trend_following', 'rsi', 'mean_reversion', 'volatility_breakout', 'macd', 'bollinger_bands']
+
+def simulate_strategy_equity(
+    prices: np.ndarray,
+    signals: np.ndarray,
+    allow_short: bool,
+    initial_capital: float = 10000.0,
+    dates: Optional[pd.Index] = None
+) -> np.ndarray:
+    """
+    All-in/all-out trade simulation over a price and signal array. Returns the
+    strategy equity per bar, marked before that bar's trade executes.
+
+    Cash and shares only change on bars that carry a signal, so the scalar
+    recurrence runs over those bars alone; every other bar is marked to market
+    in one array operation. Bars with a missing or non-positive price carry the
+    previous bar's equity forward. Pass `dates` to log individual trades.
+    """
+    prices = np.asarray(prices, dtype=float)
+    signals = np.asarray(signals, dtype=float)
+    n = len(prices)
+    valid = ~np.isnan(prices) & (prices > 0)
+    event_idx = np.flatnonzero(valid & ((signals > 0) | (signals < 0)))
+
+    # Cash/shares in effect *after* each signal bar's trade
+    event_cash = np.empty(len(event_idx))
+    event_shares = np.empty(len(event_idx))
+    cash = initial_capital
+    shares = 0.0
+    for k, i in enumerate(event_idx):
+        current_price = prices[i]
+        if signals[i] > 0: # Buy Signal
+            if shares < 0:
+                if dates is not None: prometheus_logger.debug(f"[{dates[i].date()}] Closing short: {shares} shares @ ${current_price:.2f}")
+                cash += shares * current_price
+                shares = 0
+            if shares == 0:
+                shares_to_buy = cash / current_price
+                shares += shares_to_buy
+                cash -= shares_to_buy * current_price
+                if dates is not None: prometheus_logger.debug(f"[{dates[i].date()}] Opening long: {shares_to_buy:.2f} shares @ ${current_price:.2f}")
+        else: # Sell Signal
+            if shares > 0:
+                if dates is not None: prometheus_logger.debug(f"[{dates[i].date()}] Closing long: {shares} shares @ ${current_price:.2f}")
+                cash += shares * current_price
+                shares = 0
+            if allow_short and shares == 0:
+                shares_to_short = cash / current_price
+                shares -= shares_to_short
+                cash += shares_to_short * current_price
+                if dates is not None: prometheus_logger.debug(f"[{dates[i].date()}] Opening short: {shares_to_short:.2f} shares @ ${current_price:.2f}")
+        event_cash[k] = cash
+        event_shares[k] = shares
+
+    # Each bar is marked with the state left by the last signal bar strictly before it
+    # (slot 0 is the opening state)
+    state_idx = np.searchsorted(event_idx, np.arange(n), side='left')
+    bar_cash = np.concatenate(([initial_capital], event_cash))[state_idx]
+    bar_shares = np.concatenate(([0.0], event_shares))[state_idx]
+    with np.errstate(invalid='ignore'):
+        equity = np.where(valid, bar_cash + bar_shares * prices, np.nan)
+    return pd.Series(equity).ffill().fillna(initial_capital).to_numpy()
+
+
+def simulate_population_equity(
+    prices: np.ndarray,
+    signal_matrix: np.ndarray,
+    allow_short: bool,
+    initial_capital: float = 10000.0
+) -> np.ndarray:
+    """
+    simulate_strategy_equity for a whole population at once: `signal_matrix`
+    is (population x bars) and the result is the matching equity matrix.
+
+    Positions follow from the signals alone (a buy ends long, a sell ends
+    short or flat), so the bars where each row actually trades are found with
+    matrix operations. The cash/shares recurrence then advances every row by
+    one trade per step, with the same arithmetic as the single-row loop, and
+    marking to market is one matrix operation. Rows whose equity reaches zero
+    or below (where all-in sizing stops following the positions) are re-run
+    through simulate_strategy_equity.
+    """
+    prices = np.asarray(prices, dtype=float)
+    signal_matrix = np.atleast_2d(np.asarray(signal_matrix, dtype=float))
+    n_rows, n = signal_matrix.shape
+    valid = ~np.isnan(prices) & (prices > 0)
+    cols = np.arange(n)
+
+    # Position after each bar's trade (1 long, -1 short, 0 flat), forward-filled from signal bars
+    target = np.where(signal_matrix > 0, 1.0, np.where(signal_matrix < 0, -1.0 if allow_short else 0.0, np.nan))
+    target[:, ~valid] = np.nan
+    has_target = ~np.isnan(target)
+    src = np.maximum.accumulate(np.where(has_target, cols, -1), axis=1)
+    position = np.where(src >= 0, np.take_along_axis(target, np.maximum(src, 0), axis=1), 0.0)
+    previous = np.hstack((np.zeros((n_rows, 1)), position[:, :-1]))
+    trade_rows, trade_cols = np.nonzero(position != previous)
+
+    # Trades laid out as (rows x trade number), padded past each row's last trade
+    n_trades = np.bincount(trade_rows, minlength=n_rows)
+    ordinal = np.arange(len(trade_rows)) - np.repeat(np.cumsum(n_trades) - n_trades, n_trades)
+    width = int(n_trades.max()) if len(trade_rows) else 0
+    trade_at = np.full((n_rows, width), -1)
+    trade_at[trade_rows, ordinal] = trade_cols
+
+    cash = np.full(n_rows, initial_capital)
+    shares = np.zeros(n_rows)
+    after_cash = np.empty((n_rows, width))
+    after_shares = np.empty((n_rows, width))
+    broke = np.zeros(n_rows, dtype=bool)
+    all_rows = np.arange(n_rows)
+    for j in range(width):
+        col = trade_at[:, j]
+        active = col >= 0
+        at = np.maximum(col, 0)
+        current_price = prices[at]
+        closing = active & (previous[all_rows, at] != 0)
+        cash = np.where(closing, cash + shares * current_price, cash)
+        shares = np.where(closing, 0.0, shares)
+        to_pos = np.where(active, position[all_rows, at], 0.0)
+        broke |= (to_pos != 0) & (cash <= 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            shares_to_trade = cash / current_price
+        shares = np.where(to_pos > 0, shares + shares_to_trade, np.where(to_pos < 0, shares - shares_to_trade, shares))
+        cash = np.where(to_pos > 0, cash - shares_to_trade * current_price,
+                        np.where(to_pos < 0, cash + shares_to_trade * current_price, cash))
+        after_cash[:, j] = cash
+        after_shares[:, j] = shares
+
+    # Each bar is marked with the state left by the last trade strictly before it
+    effective = np.full((n_rows, n), -1)
+    next_bar = trade_cols + 1
+    inside = next_bar < n
+    effective[trade_rows[inside], next_bar[inside]] = ordinal[inside]
+    state = np.maximum.accumulate(effective, axis=1)
+    bar_cash = np.where(state >= 0, after_cash[all_rows[:, None], np.maximum(state, 0)] if width else initial_capital, initial_capital)
+    bar_shares = np.where(state >= 0, after_shares[all_rows[:, None], np.maximum(state, 0)] if width else 0.0, 0.0)
+    with np.errstate(invalid='ignore'):
+        equity = np.where(valid, bar_cash + bar_shares * prices, np.nan)
+    equity = pd.DataFrame(equity).ffill(axis=1).fillna(initial_capital).to_numpy(copy=True)
+
+    for row in np.flatnonzero(broke):
+        equity[row] = simulate_strategy_equity(prices, signal_matrix[row], allow_short, initial_capital)
+    return equity
+
 # --- Core Backtest Logic ---
 
-async def run_strategy_backtest(
-    ticker: str, 
-    strategy: str, 
-    params: Dict[str, Any], 
-    is_cli_call: bool = True,
+async def load_backtest_data(
+    ticker: str,
     period: Optional[str] = None,
     start: Optional[str] = None,
     end: Optional[str] = None
-) -> Optional[Dict[str, Any]]:
+) -> Tuple[pd.DataFrame, str]:
     """
-    Core logic for running a strategy backtest. Fetches data, implements strategy
-    logic, simulates trades, calculates metrics, and optionally plots results.
-    Returns a dictionary with results or an error dictionary on failure.
+    Downloads the daily OHLCV frame a backtest runs on (single-level columns)
+    and returns it with a display label for the period. The frame is empty if
+    nothing was downloaded.
     """
-    
     fetch_kwargs = {"interval": "1d", "auto_adjust": False, "progress": False}
     if start and end:
         fetch_kwargs["start"] = start
@@ -74,207 +225,292 @@ async def run_strategy_backtest(
         fetch_kwargs["period"] = "1y" # Default fallback
         period_display = "1y (default)"
 
-    if is_cli_call: print(f"   -> Fetching historical data ({period_display})...")
-    
-    data_download = await asyncio.to_thread(
-        yf.download, ticker, **fetch_kwargs
-    )
+    data_download = await download_async(ticker, **fetch_kwargs)
+
+    hist_data = data_download.copy()
+    if isinstance(hist_data.columns, pd.MultiIndex):
+        hist_data.columns = hist_data.columns.get_level_values(0)
+    return hist_data, period_display
+
+
+async def run_strategy_backtest(
+    ticker: str, 
+    strategy: str, 
+    params: Dict[str, Any], 
+    is_cli_call: bool = True,
+    period: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Core logic for running a strategy backtest. Fetches data, implements strategy
+    logic, simulates trades, calculates metrics, and optionally plots results.
+    Returns a dictionary with results or an error dictionary on failure.
+    """
+    if is_cli_call:
+        period_label = f"{start} to {end}" if start and end else (period or "1y (default)")
+        print(f"   -> Fetching historical data ({period_label})...")
+
+    hist_data, period_display = await load_backtest_data(ticker, period=period, start=start, end=end)
 
-    if data_download.empty:
+    if hist_data.empty:
         err_msg = f"Error: No data downloaded for {ticker}. The ticker may be invalid or delisted."
         if is_cli_call: print(f"❌ {err_msg}")
         return {"status": "error", "message": err_msg}
 
-    hist_data = data_download.copy()
-    if isinstance(hist_data.columns, pd.MultiIndex):
-        hist_data.columns = hist_data.columns.get_level_values(0)
+    return run_strategy_backtest_on_data(hist_data, ticker, strategy, params, is_cli_call=is_cli_call, period_display=period_display)
+
+
+class _IndicatorCache:
+    """
+    Memoizes indicator arrays over one price frame, keyed by indicator and window,
+    so a population of parameter sets computes each distinct SMA/EMA/RSI/... once.
+    Values are produced by the same pandas calls the single-run path always used.
+    """
+
+    def __init__(self, hist_data: pd.DataFrame, price_col: str):
+        self.data = hist_data
+        self.price_col = price_col
+        self._values: Dict[tuple, np.ndarray] = {}
+
+    def _get(self, key: tuple, compute) -> np.ndarray:
+        if key not in self._values:
+            self._values[key] = np.asarray(compute(), dtype=float)
+        return self._values[key]
+
+    def sma(self, window: int) -> np.ndarray:
+        return self._get(('sma', window), lambda: self.data[self.price_col].rolling(window=window).mean())
+
+    def std(self, window: int) -> np.ndarray:
+        return self._get(('std', window), lambda: self.data[self.price_col].rolling(window=window).std())
+
+    def ema(self, span: int) -> np.ndarray:
+        return self._get(('ema', span), lambda: self.data[self.price_col].ewm(span=span, adjust=False).mean())
+
+    def rsi(self, period: int) -> np.ndarray:
+        return self._get(('rsi', period), lambda: calculate_rsi(self.data, period=period))
+
+    def adx(self) -> np.ndarray:
+        return self._get(('adx',), lambda: calculate_adx(self.data))
 
+    def upper_channel(self, window: int) -> np.ndarray:
+        return self._get(('upper_channel', window), lambda: self.data['High'].rolling(window=window).max().shift(1))
+
+    def lower_channel(self, window: int) -> np.ndarray:
+        return self._get(('lower_channel', window), lambda: self.data['Low'].rolling(window=window).min().shift(1))
+
+    def macd_signal_line(self, fast: int, slow: int, signal: int) -> np.ndarray:
+        return self._get(('macd_signal', fast, slow, signal),
+                         lambda: pd.Series(self.ema(fast) - self.ema(slow)).ewm(span=signal, adjust=False).mean())
+
+    def column(self, name: str) -> np.ndarray:
+        return self._get(('column', name), lambda: self.data[name])
+
+
+def _shift1(values: np.ndarray) -> np.ndarray:
+    shifted = np.empty_like(values)
+    shifted[0] = np.nan
+    shifted[1:] = values[:-1]
+    return shifted
+
+
+def _position_to_signal(position: np.ndarray) -> np.ndarray:
+    """Equivalent of position.diff().fillna(0)."""
+    return np.diff(position.astype(float), prepend=float(position[0]))
+
+
+def _levels_to_signal(buy_cond: np.ndarray, sell_cond: np.ndarray) -> np.ndarray:
+    """Buy bars get +1, sell bars -1 (sell wins where both fire), everything else 0."""
+    return np.where(sell_cond, -1, np.where(buy_cond, 1, 0))
+
+
+def compute_strategy_signals(cache: _IndicatorCache, strategy: str, params: Dict[str, Any]) -> np.ndarray:
+    """
+    Per-bar trade signal (>0 buy, <0 sell, 0 none) for one parameter set. Raises
+    KeyError for missing parameters/columns like the original inline logic did.
+    """
+    price = cache.column(cache.price_col)
+
+    if strategy == 'ma_crossover':
+        short_ma = params['short_ma']
+        long_ma = params['long_ma']
+        return _position_to_signal(np.where(cache.sma(short_ma) > cache.sma(long_ma), 1, -1))
+
+    elif strategy == 'rsi':
+        rsi_period = params['rsi_period']
+        buy_level = params['rsi_buy']
+        sell_level = params['rsi_sell']
+        rsi = cache.rsi(rsi_period)
+        prev_rsi = _shift1(rsi)
+        buy_cond = (prev_rsi >= buy_level) & (rsi < buy_level)
+        sell_cond = (prev_rsi <= sell_level) & (rsi > sell_level)
+        return _levels_to_signal(buy_cond, sell_cond)
+
+    elif strategy == 'busd':
+        if 'Close' not in cache.data.columns or 'Open' not in cache.data.columns:
+             raise KeyError("BUSD requires 'Open' and 'Close' columns.")
+        close, open_ = cache.column('Close'), cache.column('Open')
+        return _levels_to_signal(close > open_, close < open_)
+
+    elif strategy == 'trend_following':
+        ema_short = params['ema_short']
+        ema_long = params['ema_long']
+        adx_thresh = params['adx_thresh']
+        short_ema, long_ema = cache.ema(ema_short), cache.ema(ema_long)
+        trending = cache.adx() > adx_thresh
+        long_cond = (short_ema > long_ema) & trending
+        short_cond = (short_ema < long_ema) & trending
+        return _position_to_signal(np.select([long_cond, short_cond], [1, -1], default=0))
+
+    elif strategy == 'mean_reversion':
+        bb_window = params['bb_window']
+        bb_std = params['bb_std']
+        rsi_period = params['rsi_period']
+        rsi_buy = params['rsi_buy']
+        rsi_sell = params['rsi_sell']
+        sma, std = cache.sma(bb_window), cache.std(bb_window)
+        upper_band = sma + (std * bb_std)
+        lower_band = sma - (std * bb_std)
+        rsi = cache.rsi(rsi_period)
+        buy_cond = (price <= lower_band) & (rsi < rsi_buy)
+        sell_cond = (price >= upper_band) & (rsi > rsi_sell)
+        return _levels_to_signal(buy_cond, sell_cond)
+
+    elif strategy == 'volatility_breakout':
+        donchian_window = params['donchian_window']
+        close = cache.column('Close')
+        buy_cond = close > cache.upper_channel(donchian_window)
+        sell_cond = close < cache.lower_channel(donchian_window)
+        return _levels_to_signal(buy_cond, sell_cond)
+
+    elif strategy == 'macd':
+        fast_period = params['fast_period']
+        slow_period = params['slow_period']
+        signal_period = params['signal_period']
+
+        # VALIDATION: Auto-Swap if Fast > Slow (Self-Repairing)
+        if fast_period >= slow_period:
+            fast_period, slow_period = slow_period, fast_period
+            if fast_period == slow_period: 
+                fast_period = max(1, slow_period - 1)
+
+        macd = cache.ema(fast_period) - cache.ema(slow_period)
+        signal_line = cache.macd_signal_line(fast_period, slow_period, signal_period)
+        return _position_to_signal(np.where(macd > signal_line, 1, -1))
+
+    elif strategy == 'bollinger_bands':
+        window = params['window']
+        num_std_dev = params['num_std_dev']
+        rolling_mean, rolling_std = cache.sma(window), cache.std(window)
+        upper_band = rolling_mean + (rolling_std * num_std_dev)
+        lower_band = rolling_mean - (rolling_std * num_std_dev)
+        return _levels_to_signal(price < lower_band, price > upper_band)
+
+    return np.zeros(len(price))
+
+
+def _select_price_col(hist_data: pd.DataFrame, is_cli_call: bool) -> Tuple[Optional[str], Optional[str]]:
+    """Returns (price_col, None) or (None, error message)."""
     price_col = 'Adj Close'
     if price_col not in hist_data.columns or hist_data[price_col].isnull().all():
         price_col = 'Close'
         if price_col not in hist_data.columns or hist_data[price_col].isnull().all():
-            err_msg = f"Error: Required 'Adj Close' or 'Close' column not found or is all NaN."
-            if is_cli_call: print(f"❌ {err_msg}")
-            return {"status": "error", "message": err_msg}
+            return None, f"Error: Required 'Adj Close' or 'Close' column not found or is all NaN."
         elif is_cli_call:
             print(f"   -> Warning: Using 'Close' prices as 'Adj Close' was unavailable.")
+    return price_col, None
 
-    if is_cli_call: print(f"   -> Applying '{strategy}' logic...")
-    hist_data['signal'] = 0 
 
-    # --- Strategy Signal Generation ---
+def _signals_or_error(cache: _IndicatorCache, strategy: str, params: Dict[str, Any]) -> Tuple[Optional[np.ndarray], Optional[str]]:
     try:
-        if strategy == 'ma_crossover':
-            short_ma = params['short_ma']
-            long_ma = params['long_ma']
-            hist_data[f'SMA{short_ma}'] = hist_data[price_col].rolling(window=short_ma).mean()
-            hist_data[f'SMA{long_ma}'] = hist_data[price_col].rolling(window=long_ma).mean()
-            hist_data['position'] = np.where(hist_data[f'SMA{short_ma}'] > hist_data[f'SMA{long_ma}'], 1, -1)
-            hist_data['signal'] = hist_data['position'].diff().fillna(0)
-
-        elif strategy == 'rsi':
-            rsi_period = params['rsi_period']
-            buy_level = params['rsi_buy']
-            sell_level = params['rsi_sell']
-            hist_data['RSI'] = calculate_rsi(hist_data, period=rsi_period)
-            buy_cond = (hist_data['RSI'].shift(1) >= buy_level) & (hist_data['RSI'] < buy_level)
-            sell_cond = (hist_data['RSI'].shift(1) <= sell_level) & (hist_data['RSI'] > sell_level)
-            hist_data.loc[buy_cond, 'signal'] = 1 # Buy Signal
-            hist_data.loc[sell_cond, 'signal'] = -1 # Sell Signal
-
-        elif strategy == 'busd':
-            if 'Close' not in hist_data.columns or 'Open' not in hist_data.columns:
-                 raise KeyError("BUSD requires 'Open' and 'Close' columns.")
-            hist_data.loc[hist_data['Close'] > hist_data['Open'], 'signal'] = 1
-            hist_data.loc[hist_data['Close'] < hist_data['Open'], 'signal'] = -1
-
-        elif strategy == 'trend_following':
-            ema_short = params['ema_short']
-            ema_long = params['ema_long']
-            adx_thresh = params['adx_thresh']
-            hist_data[f'EMA_{ema_short}'] = hist_data[price_col].ewm(span=ema_short, adjust=False).mean()
-            hist_data[f'EMA_{ema_long}'] = hist_data[price_col].ewm(span=ema_long, adjust=False).mean()
-            hist_data['ADX'] = calculate_adx(hist_data)
-            long_cond = (hist_data[f'EMA_{ema_short}'] > hist_data[f'EMA_{ema_long}']) & (hist_data['ADX'] > adx_thresh)
-            short_cond = (hist_data[f'EMA_{ema_short}'] < hist_data[f'EMA_{ema_long}']) & (hist_data['ADX'] > adx_thresh)
-            hist_data['position'] = np.select([long_cond, short_cond], [1, -1], default=0)
-            hist_data['signal'] = hist_data['position'].diff().fillna(0)
-
-        elif strategy == 'mean_reversion':
-            bb_window = params['bb_window']
-            bb_std = params['bb_std']
-            rsi_period = params['rsi_period']
-            rsi_buy = params['rsi_buy']
-            rsi_sell = params['rsi_sell']
-            hist_data['SMA'] = hist_data[price_col].rolling(window=bb_window).mean()
-            hist_data['STD'] = hist_data[price_col].rolling(window=bb_window).std()
-            hist_data['Upper_Band'] = hist_data['SMA'] + (hist_data['STD'] * bb_std)
-            hist_data['Lower_Band'] = hist_data['SMA'] - (hist_data['STD'] * bb_std)
-            hist_data['RSI'] = calculate_rsi(hist_data, period=rsi_period)
-            buy_cond = (hist_data[price_col] <= hist_data['Lower_Band']) & (hist_data['RSI'] < rsi_buy)
-            sell_cond = (hist_data[price_col] >= hist_data['Upper_Band']) & (hist_data['RSI'] > rsi_sell)
-            hist_data.loc[buy_cond, 'signal'] = 1 
-            hist_data.loc[sell_cond, 'signal'] = -1
-
-        elif strategy == 'volatility_breakout':
-            donchian_window = params['donchian_window']
-            hist_data['Upper_Channel'] = hist_data['High'].rolling(window=donchian_window).max().shift(1)
-            hist_data['Lower_Channel'] = hist_data['Low'].rolling(window=donchian_window).min().shift(1)
-            buy_cond = hist_data['Close'] > hist_data['Upper_Channel']
-            sell_cond = hist_data['Close'] < hist_data['Lower_Channel']
-            hist_data.loc[buy_cond, 'signal'] = 1 
-            hist_data.loc[sell_cond, 'signal'] = -1
-
-        # --- NEW: MACD Strategy ---
-        elif strategy == 'macd':
-            fast_period = params['fast_period']
-            slow_period = params['slow_period']
-            signal_period = params['signal_period']
-
-            # VALIDATION: Auto-Swap if Fast > Slow (Self-Repairing)
-            if fast_period >= slow_period:
-                fast_period, slow_period = slow_period, fast_period
-                if fast_period == slow_period: 
-                    fast_period = max(1, slow_period - 1)
-
-            ema_fast = hist_data[price_col].ewm(span=fast_period, adjust=False).mean()
-            ema_slow = hist_data[price_col].ewm(span=slow_period, adjust=False).mean()
-            hist_data['MACD'] = ema_fast - ema_slow
-            hist_data['Signal_Line'] = hist_data['MACD'].ewm(span=signal_period, adjust=False).mean()
-            
-            # Logic: Crossover
-            hist_data['position'] = np.where(hist_data['MACD'] > hist_data['Signal_Line'], 1, -1)
-            hist_data['signal'] = hist_data['position'].diff().fillna(0)
-
-        # --- NEW: Bollinger Bands Strategy ---
-        elif strategy == 'bollinger_bands':
-            window = params['window']
-            num_std_dev = params['num_std_dev']
-            
-            rolling_mean = hist_data[price_col].rolling(window=window).mean()
-            rolling_std = hist_data[price_col].rolling(window=window).std()
-            
-            hist_data['Upper_Band'] = rolling_mean + (rolling_std * num_std_dev)
-            hist_data['Lower_Band'] = rolling_mean - (rolling_std * num_std_dev)
-            
-            # Logic: Mean Reversion
-            buy_cond = hist_data[price_col] < hist_data['Lower_Band']
-            sell_cond = hist_data[price_col] > hist_data['Upper_Band']
-            
-            hist_data.loc[buy_cond, 'signal'] = 1
-            hist_data.loc[sell_cond, 'signal'] = -1
-
+        return compute_strategy_signals(cache, strategy, params), None
     except KeyError as e:
-        err_msg = f"Error applying strategy logic: Missing expected column - {e}."
-        if is_cli_call: print(f"❌ {err_msg}")
-        return {"status": "error", "message": err_msg}
+        return None, f"Error applying strategy logic: Missing expected column - {e}."
     except Exception as e:
-        err_msg = f"Unexpected error applying strategy logic: {e}"
-        if is_cli_call: print(f"❌ {err_msg}")
-        return {"status": "error", "message": err_msg}
+        return None, f"Unexpected error applying strategy logic: {e}"
 
-    first_valid_index = hist_data.dropna(subset=['signal']).index.min()
-    hist_data = hist_data.loc[first_valid_index:]
-    if hist_data.empty:
-        err_msg = "Error: No valid data remaining after calculating indicators/signals."
-        if is_cli_call: print(f"❌ {err_msg}")
-        return {"status": "error", "message": err_msg}
 
-    if is_cli_call: print("   -> Simulating trades and calculating equity curves...")
-    
-    initial_capital = 10000.0
-    cash = initial_capital
-    shares = 0.0
-    hist_data['strategy_equity'] = initial_capital
-    
+def _buy_and_hold(hist_data: pd.DataFrame, price_col: str, initial_capital: float, is_cli_call: bool) -> Tuple[Any, float]:
     try:
-        hist_data['hold_equity'] = initial_capital * (hist_data[price_col] / hist_data[price_col].iloc[0])
-        hold_return_pct = (hist_data['hold_equity'].iloc[-1] / initial_capital - 1) * 100
+        hold_equity = initial_capital * (hist_data[price_col] / hist_data[price_col].iloc[0])
+        hold_return_pct = (hold_equity.iloc[-1] / initial_capital - 1) * 100
     except Exception as e:
         if not is_cli_call:
             prometheus_logger.error(f"  [Backtest] CRITICAL: Failed to calculate B&H return: {e}")
-        hist_data['hold_equity'] = initial_capital
+        hold_equity = initial_capital
         hold_return_pct = 0.0
+    return hold_equity, hold_return_pct
+
+
+def _row_sums(values: np.ndarray) -> np.ndarray:
+    # Summed one contiguous row at a time: numpy's 2-D axis reductions add in a
+    # different order, and a batch must score bit-identically to a single run
+    return np.fromiter((row.sum() for row in values), dtype=float, count=len(values))
+
+
+def _population_metrics(equity: np.ndarray, signal_matrix: np.ndarray, initial_capital: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Total return %, annualized Sharpe and signal count for every row of an equity matrix."""
+    equity = np.atleast_2d(equity)
+    strategy_return_pct = (equity[:, -1] / initial_capital - 1) * 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = equity[:, 1:] / equity[:, :-1] - 1
+        count = returns.shape[1]
+        mean = _row_sums(returns) / count
+        std = np.sqrt(_row_sums((returns - mean[:, None]) ** 2) / (count - 1))
+        sharpe_ratio = np.where(std != 0, (mean / std) * np.sqrt(252), 0.0)
+    trade_count = (np.atleast_2d(signal_matrix) != 0).sum(axis=1)
+    return strategy_return_pct, sharpe_ratio, trade_count
+
+
+def _equity_metrics(strategy_equity: pd.Series, signals: np.ndarray, initial_capital: float) -> Tuple[float, float, int]:
+    strategy_return_pct, sharpe_ratio, trade_count = _population_metrics(strategy_equity.to_numpy(dtype=float), signals, initial_capital)
+    return strategy_return_pct[0], sharpe_ratio[0], int(trade_count[0])
+
+
+def run_strategy_backtest_on_data(
+    hist_data: pd.DataFrame,
+    ticker: str,
+    strategy: str,
+    params: Dict[str, Any],
+    is_cli_call: bool = False,
+    period_display: str = ""
+) -> Dict[str, Any]:
+    """
+    Runs a backtest on a preloaded OHLCV frame (as returned by load_backtest_data).
+    Optimizers load the data once and call this for every parameter set; the
+    frame passed in is never modified.
+    """
+    if strategy not in VALID_STRATEGIES:
+        return {"status": "error", "message": f"Error: Invalid strategy '{strategy}'."}
+    hist_data = hist_data.copy()
 
-    for i in range(len(hist_data)):
-        current_price = hist_data[price_col].iloc[i]
-        signal_value = hist_data['signal'].iloc[i]
-        
-        if pd.isna(current_price) or current_price <= 0:
-            hist_data.iloc[i, hist_data.columns.get_loc('strategy_equity')] = hist_data.iloc[i-1, hist_data.columns.get_loc('strategy_equity')] if i > 0 else initial_capital
-            continue 
-
-        current_equity = cash + (shares * current_price)
-        hist_data.iloc[i, hist_data.columns.get_loc('strategy_equity')] = current_equity
+    price_col, err_msg = _select_price_col(hist_data, is_cli_call)
+    if err_msg is None and hist_data.empty:
+        err_msg = "Error: No valid data remaining after calculating indicators/signals."
+    if err_msg:
+        if is_cli_call: print(f"❌ {err_msg}")
+        return {"status": "error", "message": err_msg}
 
-        if signal_value > 0: # Buy Signal
-            if shares < 0:
-                if is_cli_call: prometheus_logger.debug(f"[{hist_data.index[i].date()}] Closing short: {shares} shares @ ${current_price:.2f}")
-                cash += shares * current_price
-                shares = 0
-            if shares == 0:
-                shares_to_buy = cash / current_price
-                shares += shares_to_buy
-                cash -= shares_to_buy * current_price
-                if is_cli_call: prometheus_logger.debug(f"[{hist_data.index[i].date()}] Opening long: {shares_to_buy:.2f} shares @ ${current_price:.2f}")
+    if is_cli_call: print(f"   -> Applying '{strategy}' logic...")
+    signals, err_msg = _signals_or_error(_IndicatorCache(hist_data, price_col), strategy, params)
+    if err_msg:
+        if is_cli_call: print(f"❌ {err_msg}")
+        return {"status": "error", "message": err_msg}
+    hist_data['signal'] = signals
 
-        elif signal_value < 0: # Sell Signal
-            if shares > 0:
-                if is_cli_call: prometheus_logger.debug(f"[{hist_data.index[i].date()}] Closing long: {shares} shares @ ${current_price:.2f}")
-                cash += shares * current_price
-                shares = 0
-            
-            if strategy in ['ma_crossover', 'trend_following', 'rsi', 'mean_reversion', 'volatility_breakout', 'macd', 'bollinger_bands']:
-                if shares == 0:
-                    shares_to_short = cash / current_price
-                    shares -= shares_to_short
-                    cash += shares_to_short * current_price
-                    if is_cli_call: prometheus_logger.debug(f"[{hist_data.index[i].date()}] Opening short: {shares_to_short:.2f} shares @ ${current_price:.2f}")
-
-    strategy_return_pct = (hist_data['strategy_equity'].iloc[-1] / initial_capital - 1) * 100
-    strategy_returns = hist_data['strategy_equity'].pct_change().dropna()
-    sharpe_ratio = (strategy_returns.mean() / strategy_returns.std()) * np.sqrt(252) if strategy_returns.std() != 0 else 0.0
-    trade_count = int(np.sum(hist_data['signal'] != 0))
+    if is_cli_call: print("   -> Simulating trades and calculating equity curves...")
+    
+    initial_capital = 10000.0
+    hist_data['hold_equity'], hold_return_pct = _buy_and_hold(hist_data, price_col, initial_capital, is_cli_call)
+
+    hist_data['strategy_equity'] = simulate_strategy_equity(
+        hist_data[price_col].to_numpy(dtype=float),
+        signals,
+        allow_short=strategy in SHORTABLE_STRATEGIES,
+        initial_capital=initial_capital,
+        dates=hist_data.index if is_cli_call else None
+    )
+    strategy_return_pct, sharpe_ratio, trade_count = _equity_metrics(hist_data['strategy_equity'], signals, initial_capital)
 
     if is_cli_call:
         print("\n--- Backtest Results ---")
@@ -302,6 +538,62 @@ async def run_strategy_backtest(
         "trade_count": trade_count
     }
 
+
+def evaluate_strategy_population(
+    hist_data: pd.DataFrame,
+    ticker: str,
+    strategy: str,
+    param_sets: List[Dict[str, Any]],
+    period_display: str = ""
+) -> List[Dict[str, Any]]:
+    """
+    Backtests a whole population of parameter sets for one strategy against a
+    single preloaded frame. Indicators are computed once per distinct window,
+    signals are stacked into a (params x bars) matrix, and the whole matrix is
+    simulated and scored at once. Returns one result dict per parameter set, in order, identical
+    to what run_strategy_backtest_on_data would return for it.
+    """
+    if strategy not in VALID_STRATEGIES:
+        return [{"status": "error", "message": f"Error: Invalid strategy '{strategy}'."} for _ in param_sets]
+
+    price_col, err_msg = _select_price_col(hist_data, is_cli_call=False)
+    if err_msg is None and hist_data.empty:
+        err_msg = "Error: No valid data remaining after calculating indicators/signals."
+    if err_msg:
+        return [{"status": "error", "message": err_msg} for _ in param_sets]
+
+    cache = _IndicatorCache(hist_data, price_col)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(param_sets)
+    rows, row_owner = [], []
+    for i, params in enumerate(param_sets):
+        signals, err_msg = _signals_or_error(cache, strategy, params)
+        if err_msg:
+            results[i] = {"status": "error", "message": err_msg}
+        else:
+            rows.append(signals)
+            row_owner.append(i)
+
+    if rows:
+        initial_capital = 10000.0
+        _, hold_return_pct = _buy_and_hold(hist_data, price_col, initial_capital, is_cli_call=False)
+        prices = cache.column(price_col)
+        signal_matrix = np.vstack(rows).astype(float)
+        equity = simulate_population_equity(prices, signal_matrix, strategy in SHORTABLE_STRATEGIES, initial_capital)
+        return_pcts, sharpe_ratios, trade_counts = _population_metrics(equity, signal_matrix, initial_capital)
+        for row, i in enumerate(row_owner):
+            results[i] = {
+                "status": "success",
+                "ticker": ticker,
+                "strategy": strategy,
+                "period": period_display,
+                "parameters": param_sets[i],
+                "total_return_pct": return_pcts[row],
+                "buy_hold_return_pct": hold_return_pct,
+                "sharpe_ratio": sharpe_ratios[row],
+                "trade_count": int(trade_counts[row])
+            }
+    return results
+
 # --- Plotting Function ---
 def plot_backtest_results(data: pd.DataFrame, ticker: str, strategy: str):
     """
@@ -355,77 +647,14 @@ def plot_backtest_results(data: pd.DataFrame, ticker: str, strategy: str):
         if 'fig' in locals() and plt.fignum_exists(fig.number):
             plt.close(fig)
 
-# --- Main Command Handler ---
-async def handle_backtest_command(args: List[str], ai_params: Optional[Dict] = None, is_called_by_ai: bool = False):
+# --- Parameter Parsing ---
+def parse_backtest_params(strategy: str, param_args: List[str], is_cli_call: bool = False) -> Dict[str, Any]:
     """
-    Handles the /backtest command. Returns results dict for logging/AI, prints for CLI.
-    Now accepts parameters as a single JSON string for robustness.
+    Parses strategy parameters from CLI positionals or a single JSON string (GA
+    calls), coercing types and auto-correcting inverted windows/levels. Falls
+    back to the strategy defaults on malformed input.
     """
-    prometheus_logger.debug(f"handle_backtest_command received: args={args}, ai_params={ai_params}, is_called_by_ai={is_called_by_ai}")
-
-    if ai_params:
-        err_msg = "AI natural language calls to /backtest are not supported."
-        prometheus_logger.warning(f"Backtest rejected an ai_params call: {ai_params}")
-        return {"status": "error", "message": err_msg}
-
-    if not args or len(args) < 3:
-        err_msg = "Usage: /backtest <TICKER> <strategy> <period_or_daterange> [params... |OR| param_json_string]"
-        prometheus_logger.warning(f"Backtest called with insufficient args: {args}")
-        
-        is_cli_call_for_help = not is_called_by_ai
-        if is_cli_call_for_help:
-            print(err_msg)
-            print("   <period_or_daterange>: '1y', '6mo', etc. OR '{\"start\":\"YYYY-MM-DD\",\"end\":\"YYYY-MM-DD\"}'")
-            print("\n--- Available Strategies & Parameters ---")
-            print("  ma_crossover [short_win (def:50)] [long_win (def:200)]")
-            print("  rsi [period (def:14)] [buy_lvl (def:30)] [sell_lvl (def:70)]")
-            print("  macd [fast (def:12)] [slow (def:26)] [signal (def:9)]")
-            print("  bollinger_bands [window (def:20)] [std_dev (def:2.0)]")
-            # ... (rest of help text) ...
-        
-        return {"status": "error", "message": err_msg}
-
-    is_cli_call = not is_called_by_ai
-    
-    if is_cli_call:
-        print("\n--- Trading Strategy Backtest Engine ---")
-    else:
-        prometheus_logger.debug("Backtest call identified as internal (GA). Suppressing console prints.")
-
-    ticker = args[0].upper()
-    strategy = args[1].lower()
-    
-    period_or_dates_arg = args[2]
-    period_to_run: Optional[str] = None
-    start_date_to_run: Optional[str] = None
-    end_date_to_run: Optional[str] = None
-    
-    try:
-        if period_or_dates_arg.startswith('{'):
-            date_dict = json.loads(period_or_dates_arg)
-            start_date_to_run = date_dict.get('start')
-            end_date_to_run = date_dict.get('end')
-            if not start_date_to_run or not end_date_to_run:
-                raise ValueError("JSON must contain 'start' and 'end' keys.")
-        else:
-            period_to_run = period_or_dates_arg.lower()
-    except (json.JSONDecodeError, ValueError) as e:
-        err_msg = f"❌ Error: Invalid period/date range argument '{period_or_dates_arg}'. {e}"
-        if is_cli_call: print(err_msg)
-        return {"status": "error", "message": err_msg}
-
     strategy_params = {}
-    valid_strategies = [
-        'ma_crossover', 'rsi', 'busd', 'trend_following',
-        'mean_reversion', 'volatility_breakout', 'macd', 'bollinger_bands'
-    ]
-    if strategy not in valid_strategies:
-        err_msg = f"❌ Error: Invalid strategy '{strategy}'. Choose from: {', '.join(valid_strategies)}"
-        if is_cli_call: print(err_msg)
-        return {"status": "error", "message": err_msg}
-
-    param_args = args[3:] # This is now either [p1, p2, p3] OR [json_string]
-    
     try:
         # --- Check if parameters are passed as a single JSON string (from GA) ---
         if len(param_args) == 1 and param_args[0].startswith('{'):
@@ -502,6 +731,75 @@ async def handle_backtest_command(args: List[str], ai_params: Optional[Dict] = N
         elif strategy == 'macd': strategy_params = {'fast_period': 12, 'slow_period': 26, 'signal_period': 9}
         elif strategy == 'bollinger_bands': strategy_params = {'window': 20, 'num_std_dev': 2.0}
 
+    return strategy_params
+
+# --- Main Command Handler ---
+async def handle_backtest_command(args: List[str], ai_params: Optional[Dict] = None, is_called_by_ai: bool = False):
+    """
+    Handles the /backtest command. Returns results dict for logging/AI, prints for CLI.
+    Now accepts parameters as a single JSON string for robustness.
+    """
+    prometheus_logger.debug(f"handle_backtest_command received: args={args}, ai_params={ai_params}, is_called_by_ai={is_called_by_ai}")
+
+    if ai_params:
+        err_msg = "AI natural language calls to /backtest are not supported."
+        prometheus_logger.warning(f"Backtest rejected an ai_params call: {ai_params}")
+        return {"status": "error", "message": err_msg}
+
+    if not args or len(args) < 3:
+        err_msg = "Usage: /backtest <TICKER> <strategy> <period_or_daterange> [params... |OR| param_json_string]"
+        prometheus_logger.warning(f"Backtest called with insufficient args: {args}")
+        
+        is_cli_call_for_help = not is_called_by_ai
+        if is_cli_call_for_help:
+            print(err_msg)
+            print("   <period_or_daterange>: '1y', '6mo', etc. OR '{\"start\":\"YYYY-MM-DD\",\"end\":\"YYYY-MM-DD\"}'")
+            print("\n--- Available Strategies & Parameters ---")
+            print("  ma_crossover [short_win (def:50)] [long_win (def:200)]")
+            print("  rsi [period (def:14)] [buy_lvl (def:30)] [sell_lvl (def:70)]")
+            print("  macd [fast (def:12)] [slow (def:26)] [signal (def:9)]")
+            print("  bollinger_bands [window (def:20)] [std_dev (def:2.0)]")
+            # ... (rest of help text) ...
+        
+        return {"status": "error", "message": err_msg}
+
+    is_cli_call = not is_called_by_ai
+    
+    if is_cli_call:
+        print("\n--- Trading Strategy Backtest Engine ---")
+    else:
+        prometheus_logger.debug("Backtest call identified as internal (GA). Suppressing console prints.")
+
+    ticker = args[0].upper()
+    strategy = args[1].lower()
+    
+    period_or_dates_arg = args[2]
+    period_to_run: Optional[str] = None
+    start_date_to_run: Optional[str] = None
+    end_date_to_run: Optional[str] = None
+    
+    try:
+        if period_or_dates_arg.startswith('{'):
+            date_dict = json.loads(period_or_dates_arg)
+            start_date_to_run = date_dict.get('start')
+            end_date_to_run = date_dict.get('end')
+            if not start_date_to_run or not end_date_to_run:
+                raise ValueError("JSON must contain 'start' and 'end' keys.")
+        else:
+            period_to_run = period_or_dates_arg.lower()
+    except (json.JSONDecodeError, ValueError) as e:
+        err_msg = f"❌ Error: Invalid period/date range argument '{period_or_dates_arg}'. {e}"
+        if is_cli_call: print(err_msg)
+        return {"status": "error", "message": err_msg}
+
+    if strategy not in VALID_STRATEGIES:
+        err_msg = f"❌ Error: Invalid strategy '{strategy}'. Choose from: {', '.join(VALID_STRATEGIES)}"
+        if is_cli_call: print(err_msg)
+        return {"status": "error", "message": err_msg}
+
+    param_args = args[3:] # This is now either [p1, p2, p3] OR [json_string]
+    strategy_params = parse_backtest_params(strategy, param_args, is_cli_call=is_cli_call)
+
     period_display_str = period_to_run if period_to_run else f"{start_date_to_run} to {end_date_to_run}"
     if is_cli_call:
         print(f"-> Starting backtest for {ticker} using '{strategy}' over {period_display_str}...")
@@ -0,0 +1,130 @@
+# backtest_pool.py
+# Multi-process fitness evaluation for the parameter GA.
+# A preloaded OHLCV frame is copied into one shared-memory block per optimization
+# run; pool workers attach to it once (cached by block name) instead of receiving a
+# pickled frame with every task. A population is split into contiguous chunks, one
+# per worker of the shared process pool, and results are reassembled in submission order.
+import asyncio
+import logging
+import weakref
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from backend.integration.backtest_command import evaluate_strategy_population
+    from backend.integration.process_pool import get_process_pool, reset_process_pool, pool_workers
+except ImportError:
+    from integration.backtest_command import evaluate_strategy_population
+    from integration.process_pool import get_process_pool, reset_process_pool, pool_workers
+
+# --- Constants ---
+MIN_PARALLEL_BATCH = 8          # Smaller batches are cheaper to score in-process
+WORKER_FRAME_CACHE_SIZE = 8     # Shared frames each worker keeps attached
+
+pool_logger = logging.getLogger('BACKTEST_POOL')
+
+
+class SharedFrame:
+    """
+    A float OHLCV frame published to shared memory: the int64 index occupies the
+    first row of the block and the columns follow as float64 rows.
+    """
+
+    def __init__(self, hist_data: pd.DataFrame):
+        self.columns = [str(c) for c in hist_data.columns]
+        self.length = len(hist_data)
+        self.tz = str(hist_data.index.tz) if getattr(hist_data.index, 'tz', None) is not None else None
+        rows = len(self.columns) + 1
+        self._shm = shared_memory.SharedMemory(create=True, size=max(8, rows * self.length * 8))
+        block = np.ndarray((rows, self.length), dtype=np.float64, buffer=self._shm.buf)
+        block[1:] = hist_data.to_numpy(dtype=np.float64).T
+        block[0].view(np.int64)[:] = pd.DatetimeIndex(hist_data.index).as_unit('ns').asi8
+        self.name = self._shm.name
+        # Released on close(), garbage collection or interpreter exit, whichever comes first
+        self._finalizer = weakref.finalize(self, _release_block, self._shm)
+
+    def handle(self) -> Tuple[str, int, List[str], Optional[str]]:
+        return self.name, self.length, self.columns, self.tz
+
+    def close(self) -> None:
+        self._finalizer()
+
+
+def _release_block(shm: shared_memory.SharedMemory) -> None:
+    try:
+        shm.close()
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+# --- Worker side ---
+_attached: "OrderedDict[str, Tuple[shared_memory.SharedMemory, pd.DataFrame]]" = OrderedDict()
+
+
+def _attach(handle: Tuple[str, int, List[str], Optional[str]]) -> pd.DataFrame:
+    name, length, columns, tz = handle
+    if name in _attached:
+        _attached.move_to_end(name)
+        return _attached[name][1]
+    # Pool workers share the parent's resource tracker, so attaching here only
+    # re-registers a block the parent already owns (and will unlink)
+    shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray((len(columns) + 1, length), dtype=np.float64, buffer=shm.buf)
+    index = pd.DatetimeIndex(pd.to_datetime(block[0].view(np.int64).copy(), unit='ns', utc=tz is not None))
+    if tz:
+        index = index.tz_convert(tz)
+    frame = pd.DataFrame(block[1:].T.copy(), index=index, columns=columns)
+    _attached[name] = (shm, frame)
+    while len(_attached) > WORKER_FRAME_CACHE_SIZE:
+        _, (old_shm, _) = _attached.popitem(last=False)
+        old_shm.close()
+    return frame
+
+
+def _evaluate_chunk(handle, ticker: str, strategy: str, param_sets: List[Dict[str, Any]], period_display: str) -> List[Dict[str, Any]]:
+    return evaluate_strategy_population(_attach(handle), ticker, strategy, param_sets, period_display)
+
+
+# --- Parent side ---
+def _chunks(items: List[Any], count: int) -> List[List[Any]]:
+    size, extra = divmod(len(items), count)
+    chunks, start = [], 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+async def evaluate_population_parallel(
+    hist_data: pd.DataFrame,
+    shared: Optional[SharedFrame],
+    ticker: str,
+    strategy: str,
+    param_sets: List[Dict[str, Any]],
+    period_display: str = ""
+) -> List[Dict[str, Any]]:
+    """
+    Scores a population across the process pool, returning results in the same
+    order as param_sets. Small batches, single-core hosts and any pool failure
+    fall back to evaluate_strategy_population in a worker thread.
+    """
+    pool = get_process_pool() if shared is not None and len(param_sets) >= MIN_PARALLEL_BATCH else None
+    if pool is not None:
+        loop = asyncio.get_running_loop()
+        try:
+            futures = [
+                loop.run_in_executor(pool, _evaluate_chunk, shared.handle(), ticker, strategy, chunk, period_display)
+                for chunk in _chunks(param_sets, pool_workers())
+            ]
+            return [result for chunk_results in await asyncio.gather(*futures) for result in chunk_results]
+        except Exception as e:
+            pool_logger.warning(f"Process pool evaluation failed ({type(e).__name__}: {e}); falling back to in-process scoring.")
+            reset_process_pool()
+    return await asyncio.to_thread(evaluate_strategy_population, hist_data, ticker, strategy, param_sets, period_display)
@@ -6,13 +6,13 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional
 import traceback
 
+import numpy as np
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import io
 import base64
-import yfinance as yf
 from tabulate import tabulate
 from tradingview_screener import Query, Column
 try:
@@ -25,10 +25,17 @@ except ImportError:
 
 # --- Imports from other command modules ---
 from backend.integration.invest_command import calculate_ema_invest
+from backend.integration.price_store import price_store, download_async
+from backend.integration.invest_scoring import extract_close_matrix, score_invest_matrix
+from backend.integration.result_cache import result_cache
+from backend.integration.process_pool import get_process_pool, reset_process_pool
 
 # --- Constants ---
 BREAKOUT_TICKERS_FILE = 'breakout_tickers.csv'
 BREAKOUT_HISTORICAL_DB_FILE = 'breakout_historical_database.csv'
+# Daily (sensitivity 2) INVEST window; also the span of the 1Y change and the charts
+BREAKOUT_HISTORY_PERIOD = '1y'
+BREAKOUT_HISTORY_INTERVAL = '1d'
 
 # --- Helper Functions ---
 def safe_score(value: Any) -> float:
@@ -38,11 +45,70 @@ def safe_score(value: Any) -> float:
         return float(value)
     except (ValueError, TypeError): return 0.0
 
+def _one_year_changes(closes: pd.DataFrame) -> pd.Series:
+    """% change from the first to the last valid close of every column."""
+    if closes.empty:
+        return pd.Series(dtype=float)
+    first, last = closes.bfill().iloc[0], closes.ffill().iloc[-1]
+    return (last / first - 1.0) * 100
+
+async def _load_breakout_closes(tickers: List[str]) -> pd.DataFrame:
+    symbols = sorted({t.replace('.', '-').upper() for t in tickers})
+    data = await download_async(symbols, period=BREAKOUT_HISTORY_PERIOD, interval=BREAKOUT_HISTORY_INTERVAL, auto_adjust=True, progress=False)
+    return extract_close_matrix(data)
+
+async def score_breakout_candidates(tickers: List[str]) -> Dict[str, tuple]:
+    """
+    (live_price, invest_score, one_year_change) per ticker from one daily close
+    matrix for the whole candidate set. Tickers the batch could not score fall
+    back to calculate_ema_invest; their 1Y change stays None.
+    """
+    try:
+        closes = await _load_breakout_closes(tickers)
+    except Exception as e:
+        print(f"[DEBUG BREAKOUT] Batch load failed ({type(e).__name__}: {e}); scoring per ticker.")
+        closes = pd.DataFrame()
+    scores = score_invest_matrix(closes)
+    changes = _one_year_changes(closes)
+
+    results, missing = {}, []
+    for ticker in tickers:
+        symbol = ticker.replace('.', '-').upper()
+        if symbol in scores.index and not pd.isna(scores.at[symbol, 'score']):
+            change = changes.get(symbol)
+            results[ticker] = (float(scores.at[symbol, 'live_price']), float(scores.at[symbol, 'score']),
+                               None if change is None or pd.isna(change) else float(change))
+        else:
+            missing.append(ticker)
+    fallback = await asyncio.gather(*[calculate_ema_invest(t, 2, is_called_by_ai=True) for t in missing], return_exceptions=True)
+    for ticker, res in zip(missing, fallback):
+        if not isinstance(res, Exception) and res:
+            results[ticker] = (res[0], res[1], None)
+    return results
+
 # --- Core Logic Functions (moved from breakout.py) ---
-async def run_breakout_analysis_singularity(is_called_by_ai: bool = False) -> dict:
-    """Runs breakout analysis and returns results, handling errors."""
+async def run_breakout_analysis_singularity(is_called_by_ai: bool = False, include_charts: bool = True) -> dict:
+    """
+    Runs breakout analysis and returns results, handling errors. Successful
+    results are shared through the result cache for the current daily refresh
+    window; a rewrite of BREAKOUT_TICKERS_FILE starts a new entry. Charts for
+    the breakout stocks are only rendered when `include_charts` is set.
+    """
     if not is_called_by_ai:
         print("\n--- Running Breakout Analysis ---")
+    existing_mtime = os.path.getmtime(BREAKOUT_TICKERS_FILE) if os.path.exists(BREAKOUT_TICKERS_FILE) else None
+    result = await result_cache.get_or_compute(
+        'breakout', (os.path.abspath(BREAKOUT_TICKERS_FILE), existing_mtime),
+        lambda: _run_breakout_analysis(is_called_by_ai),
+        interval='1d',
+        tickers=lambda result: [stock['Ticker'] for stock in result.get('current_breakout_stocks', [])],
+        cacheable=lambda result: result.get('status') == 'success'
+    )
+    if include_charts and result.get('current_breakout_stocks'):
+        result['charts'] = await render_breakout_charts([stock['Ticker'] for stock in result['current_breakout_stocks']])
+    return result
+
+async def _run_breakout_analysis(is_called_by_ai: bool = False) -> dict:
 
     existing_tickers_data = {}
     if os.path.exists(BREAKOUT_TICKERS_FILE):
@@ -122,15 +188,10 @@ async def run_breakout_analysis_singularity(is_called_by_ai: bool = False) -> di
     temp_updated_data = []
     processing_errors = []
     if not is_called_by_ai: print(f"  -> Processing {len(all_tickers_to_process)} total tickers for scores and filtering...")
-    process_count = 0
+    scored = await score_breakout_candidates(all_tickers_to_process)
     for ticker_b in all_tickers_to_process:
-        process_count += 1
-        if not is_called_by_ai and process_count % 10 == 0:
-            print(f"\r     ... processing {process_count}/{len(all_tickers_to_process)}", end="")
         try:
-            # Setting sensitivity to 2 (Daily) as default for breakout
-            live_price, current_invest_score = await calculate_ema_invest(ticker_b, 2, is_called_by_ai=True)
-            one_year_change, _ = await calculate_one_year_invest(ticker_b, is_called_by_ai=True) # Assuming 1Y Invest Score isn't needed here
+            live_price, current_invest_score, one_year_change = scored.get(ticker_b, (None, None, None))
 
             # Skip if score calculation failed
             if current_invest_score is None:
@@ -190,54 +251,86 @@ async def run_breakout_analysis_singularity(is_called_by_ai: bool = False) -> di
         # If screener worked but no stocks passed filter
         return {"status": "success", "message": "No breakout stocks met the criteria after filtering.", "current_breakout_stocks": []}
     else:
-        # Success, return the found stocks
-        # Generate charts for the breakout stocks
-        charts = {}
-        for stock in final_data:
-            ticker = stock['Ticker']
-            try:
-                chart = await asyncio.to_thread(generate_breakout_chart, ticker)
-                if chart:
-                    charts[ticker] = chart
-            except Exception as e:
-                print(f"Chart generation failed for {ticker}: {e}")
-
+        # Success, return the found stocks (charts are rendered by the caller on demand)
         return {
             "status": "success", 
             "message": f"Found {len(final_data)} breakout stocks.", 
-            "current_breakout_stocks": final_data,
-            "charts": charts
+            "current_breakout_stocks": final_data
         }
 
+def _render_breakout_chart(ticker: str, index_ns: np.ndarray, closes: np.ndarray, tz: Optional[str]) -> Optional[str]:
+    """Renders one breakout chart as a base64 PNG. Runs in chart pool workers, so it only uses the Figure API."""
+    try:
+        index = pd.to_datetime(index_ns, unit='ns', utc=tz is not None)
+        if tz:
+            index = index.tz_convert(tz)
+        close = pd.Series(closes, index=index)
+        with matplotlib.style.context('dark_background'):
+            fig = Figure(figsize=(10, 5))
+            ax = fig.subplots()
+            ax.plot(close.index, close, color='white', label='Price', linewidth=1)
+            ax.plot(close.index, close.ewm(span=8, adjust=False).mean(), color='#4ade80', label='EMA 8', linewidth=1)
+            ax.plot(close.index, close.ewm(span=21, adjust=False).mean(), color='#facc15', label='EMA 21', linewidth=1)
+            ax.plot(close.index, close.ewm(span=55, adjust=False).mean(), color='#f87171', label='EMA 55', linewidth=1)
+
+            ax.set_title(f"{ticker} Breakout Analysis", color='white')
+            ax.legend(facecolor='black', edgecolor='white')
+            ax.grid(True, alpha=0.1)
+
+            buf = io.BytesIO()
+            fig.savefig(buf, format='png', facecolor='black', edgecolor='none')
+        return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode('utf-8')
+    except Exception:
+        return None
+
+def _chart_payload(ticker: str, close: pd.Series) -> Optional[tuple]:
+    close = pd.to_numeric(close, errors='coerce').dropna()
+    if close.empty:
+        return None
+    index = pd.DatetimeIndex(close.index)
+    tz = str(index.tz) if index.tz is not None else None
+    return ticker, index.as_unit('ns').asi8, close.to_numpy(dtype=np.float64), tz
+
 def generate_breakout_chart(ticker: str) -> Optional[str]:
     """Generates a base64 encoded chart for a breakout stock."""
     try:
-        data = yf.Ticker(ticker.replace('.', '-')).history(period='1y', interval='1d')
-        if data.empty: return None
-        
-        data['EMA_8'] = data['Close'].ewm(span=8, adjust=False).mean()
-        data['EMA_21'] = data['Close'].ewm(span=21, adjust=False).mean()
-        data['EMA_55'] = data['Close'].ewm(span=55, adjust=False).mean()
-        
-        plt.style.use('dark_background')
-        fig, ax = plt.subplots(figsize=(10, 5))
-        
-        ax.plot(data.index, data['Close'], color='white', label='Price', linewidth=1)
-        ax.plot(data.index, data['EMA_8'], color='#4ade80', label='EMA 8', linewidth=1)
-        ax.plot(data.index, data['EMA_21'], color='#facc15', label='EMA 21', linewidth=1)
-        ax.plot(data.index, data['EMA_55'], color='#f87171', label='EMA 55', linewidth=1)
-        
-        ax.set_title(f"{ticker} Breakout Analysis", color='white')
-        ax.legend(facecolor='black', edgecolor='white')
-        ax.grid(True, alpha=0.1)
-        
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', facecolor='black', edgecolor='none')
-        plt.close(fig)
-        buf.seek(0)
-        return "data:image/png;base64," + base64.b64encode(buf.read()).decode('utf-8')
+        data = price_store.get_history(ticker.replace('.', '-'), period=BREAKOUT_HISTORY_PERIOD, interval=BREAKOUT_HISTORY_INTERVAL)
+        payload = _chart_payload(ticker, data['Close']) if not data.empty else None
+        return _render_breakout_chart(*payload) if payload else None
     except Exception:
         return None
+
+async def _render_charts(payloads: List[tuple]) -> List[Optional[str]]:
+    pool = get_process_pool() if len(payloads) > 1 else None
+    if pool is not None:
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.gather(*[loop.run_in_executor(pool, _render_breakout_chart, *p) for p in payloads])
+        except Exception as e:
+            print(f"[DEBUG BREAKOUT] Chart pool failed ({type(e).__name__}: {e}); rendering in-process.")
+            reset_process_pool()
+    # matplotlib style state is process-global, so in-process charts render one after another
+    return await asyncio.to_thread(lambda: [_render_breakout_chart(*p) for p in payloads])
+
+async def render_breakout_charts(tickers: List[str]) -> Dict[str, str]:
+    """
+    Base64 charts for the given breakout tickers, rendered in the shared process
+    pool from one shared close matrix and cached like the analysis itself.
+    """
+    async def compute() -> Dict[str, str]:
+        closes = await _load_breakout_closes(tickers)
+        payloads = [p for p in (_chart_payload(t, closes[t.replace('.', '-').upper()]) for t in tickers
+                                if t.replace('.', '-').upper() in closes.columns) if p]
+        rendered = await _render_charts(payloads)
+        return {p[0]: chart for p, chart in zip(payloads, rendered) if chart}
+
+    try:
+        return await result_cache.get_or_compute(
+            'breakout_charts', sorted(tickers), compute, interval=BREAKOUT_HISTORY_INTERVAL, tickers=tickers
+        )
+    except Exception as e:
+        print(f"Chart generation failed: {e}")
+        return {}
     
 async def save_breakout_data_singularity(date_str: str, is_called_by_ai: bool = False) -> str:
     """
@@ -4,12 +4,10 @@ import os
 import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta 
-from io import StringIO
 import pytz
 from bs4 import BeautifulSoup
 import requests
 
-import yfinance as yf
 import pandas as pd
 from tabulate import tabulate
 import humanize
@@ -24,6 +22,8 @@ except ImportError:
 # --- Imports from other command modules ---
 from backend.integration.risk_command import perform_risk_calculations_singularity
 from backend.integration.breakout_command import run_breakout_analysis_singularity
+from backend.integration.price_store import download_async, history_async
+from backend.integration.index_constituents import get_index_constituents
 
 # --- Helper Functions ---
 
@@ -43,9 +43,8 @@ async def get_daily_change_for_tickers(tickers: List[str]) -> Dict[str, Dict[str
     
     try:
         # Attempt to download all ticker data in a single batch
-        data = await asyncio.to_thread(
-            yf.download,
-            tickers=tickers,
+        data = await download_async(
+            tickers,
             period="5d",
             interval="1d",
             progress=False,
@@ -89,7 +88,7 @@ async def get_multi_period_change(tickers: List[str]) -> Dict[str, Dict[str, Opt
     end_date = datetime.now()
     start_date_1m = end_date - timedelta(days=40)
     try:
-        data = await asyncio.to_thread(yf.download, tickers=tickers, start=start_date_1m.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'), progress=False, auto_adjust=True, timeout=30)
+        data = await download_async(tickers, start=start_date_1m.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'), progress=False, auto_adjust=True, timeout=30)
         if data.empty: return {t: {'1D': None, '1W': None, '1M': None} for t in tickers}
         
         close_data = data.get('Close')
@@ -108,16 +107,7 @@ async def get_multi_period_change(tickers: List[str]) -> Dict[str, Dict[str, Opt
     return results
 
 def get_sp500_symbols_singularity(is_called_by_ai: bool = False) -> List[str]:
-    try:
-        url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        df = pd.read_html(StringIO(response.text))[0]
-        if 'Symbol' not in df.columns: return []
-        symbols = [str(s).replace('.', '-') for s in df['Symbol'].tolist() if isinstance(s, str)]
-        return sorted(list(set(s for s in symbols if s)))
-    except Exception: return []
+    return get_index_constituents('sp500')
 
 async def get_sp500_movers(is_called_by_ai: bool = False) -> Dict[str, List[Dict]]:
     if not is_called_by_ai: print("  Briefing: Fetching S&P 500 movers...")
@@ -135,7 +125,6 @@ async def get_sp500_movers(is_called_by_ai: bool = False) -> Dict[str, List[Dict
             print(f"[BRIEFING_DEBUG]   ! Chunk timed out. Skipping this chunk.")
         except Exception as e:
             print(f"[BRIEFING_DEBUG]   ! An error occurred on this chunk: {e}")
-        await asyncio.sleep(1)
         
     if not all_changes: return {'top': [], 'bottom': [], 'error': 'Failed to fetch any S&P 500 price data.'}
     valid_performers = [{'ticker': t, **d} for t, d in all_changes.items() if 'change_pct' in d and pd.notna(d['change_pct'])]
@@ -190,7 +179,7 @@ async def get_major_futures_data() -> Dict[str, Dict[str, Any]]:
         scraped_price = await _scrape_cnbc_quote(oil_url)
 
         # Use yfinance to get recent history for the % change calculation
-        oil_hist = await asyncio.to_thread(yf.download, tickers=['CL=F'], period="5d", progress=False)
+        oil_hist = await download_async(['CL=F'], period="5d", progress=False)
         
         if not oil_hist.empty and 'Close' in oil_hist:
             close_data = oil_hist['Close']
@@ -225,7 +214,7 @@ async def get_major_futures_data() -> Dict[str, Dict[str, Any]]:
     try:
         gold_url = 'https://www.cnbc.com/quotes/@GC.1'
         gold_scraped = await _scrape_cnbc_quote(gold_url)
-        gold_hist = await asyncio.to_thread(yf.download, tickers=['GC=F'], period="5d", progress=False)
+        gold_hist = await download_async(['GC=F'], period="5d", progress=False)
 
         if not gold_hist.empty and 'Close' in gold_hist:
             # Handle DataFrame vs Series from yfinance
@@ -253,7 +242,7 @@ async def get_major_futures_data() -> Dict[str, Dict[str, Any]]:
     try:
         silver_url = 'https://www.cnbc.com/quotes/@SI.1'
         silver_scraped = await _scrape_cnbc_quote(silver_url)
-        silver_hist = await asyncio.to_thread(yf.download, tickers=['SI=F'], period="5d", progress=False)
+        silver_hist = await download_async(['SI=F'], period="5d", progress=False)
 
         if not silver_hist.empty and 'Close' in silver_hist:
             close_data = silver_hist['Close']
@@ -302,7 +291,7 @@ async def get_specific_economic_data() -> dict[str, str]:
 
     # --- Part 1: Fetch Dollar Index (DXY) from yfinance ---
     try:
-        dxy = await asyncio.to_thread(yf.Ticker("DX-Y.NYB").history, period="1y")
+        dxy = await history_async("DX-Y.NYB", period="1y")
         # Ensure a full year of trading data is available for an accurate calculation
         if not dxy.empty and len(dxy) > 250:
             yoy_change = ((dxy['Close'].iloc[-1] - dxy['Close'].iloc[0]) / dxy['Close'].iloc[0]) * 100
@@ -373,7 +362,7 @@ async def handle_briefing_command(args: List[str], ai_params: Optional[Dict] = N
     results_dict['sp500_movers'] = await get_sp500_movers(is_called_by_ai=True)
 
     if not is_called_by_ai: print("➪ Briefing Step 3/4: Running Breakout Analysis and Checking Watchlist...")
-    tasks3 = {"breakouts": run_breakout_analysis_singularity(is_called_by_ai=True)}
+    tasks3 = {"breakouts": run_breakout_analysis_singularity(is_called_by_ai=True, include_charts=False)}
     if watchlist_tickers:
         tasks3["watchlist"] = get_daily_change_for_tickers(watchlist_tickers)
     results3 = await asyncio.gather(*tasks3.values(), return_exceptions=True)
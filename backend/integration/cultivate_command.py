@@ -7,18 +7,18 @@ import math
 import os
 import traceback
 from datetime import datetime, timedelta
-from io import StringIO
 from typing import Any, Dict, List, Optional
 
 import numpy as np
 import pandas as pd
-import requests
-import yfinance as yf
 from tabulate import tabulate
 from tradingview_screener import Column, Query
 
 # --- Local Imports ---
 from backend.integration.invest_command import calculate_ema_invest, safe_score, get_allocation_score
+from backend.integration.price_store import download_async
+from backend.integration.index_constituents import get_index_constituents
+from backend.integration.result_cache import result_cache
 try:
     from backend.usage_counter import increment_usage
 except ImportError:
@@ -49,7 +49,7 @@ async def get_yf_download_robustly(tickers: list, **kwargs) -> pd.DataFrame:
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            data = await asyncio.to_thread(yf.download, tickers=tickers, progress=False, **kwargs)
+            data = await download_async(tickers, progress=False, **kwargs)
             if data.empty:
                  raise IOError(f"yf.download returned empty DataFrame for {tickers}")
             return data
@@ -79,21 +79,9 @@ async def get_yf_data_singularity(tickers: List[str], period: str = "10y", inter
     return df_out.dropna(axis=0, how='all').dropna(axis=1, how='all')
 
 def get_sp500_symbols_singularity(is_called_by_ai: bool = False) -> List[str]:
-    symbols = []
-    try:
-        url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        response = requests.get(url, headers=headers, timeout=20)
-        response.raise_for_status()
-        df = pd.read_html(StringIO(response.text))[0]
-        if 'Symbol' not in df.columns:
-            raise ValueError("No Symbol column")
-        
-        symbols = [str(s).replace('.', '-') for s in df['Symbol'].tolist() if isinstance(s, str)]
-        symbols = sorted(list(set(s for s in symbols if s)))
-    except Exception as e:
-        if not is_called_by_ai:
-            print(f"     ... Warning: Failed to fetch S&P 500 list ({e}). Using fallback list.")
+    symbols = get_index_constituents('sp500')
+    if not symbols and not is_called_by_ai:
+        print(f"     ... Warning: Failed to fetch S&P 500 list. Using fallback list.")
     
     if not symbols:
         # Fallback to top 50+ S&P 500 companies to ensure the command never fails
@@ -142,55 +130,56 @@ def calculate_cultivate_formulas_singularity(allocation_score: float, is_called_
     except Exception:
         return None
 
+def _market_relative_metrics(returns: pd.DataFrame, spy_returns: pd.Series, min_obs: int = 20) -> pd.DataFrame:
+    """
+    Beta, correlation and average leverage of every column of `returns` against
+    SPY as masked matrix operations. Each ticker uses only the days where both
+    it and SPY have a return, so a recent listing or a gap in one ticker does
+    not shorten the window of the others.
+    """
+    values = returns.to_numpy(dtype=np.float64)
+    spy = spy_returns.reindex(returns.index).to_numpy(dtype=np.float64)[:, None]
+    mask = ~np.isnan(values) & ~np.isnan(spy)
+    n = mask.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = np.where(mask, values, 0.0)
+        s = np.where(mask, spy, 0.0)
+        x_dev = np.where(mask, x - x.sum(axis=0) / n, 0.0)
+        s_dev = np.where(mask, s - s.sum(axis=0) / n, 0.0)
+        cov = (x_dev * s_dev).sum(axis=0) / (n - 1)
+        spy_var = (s_dev ** 2).sum(axis=0) / (n - 1)
+        x_var = (x_dev ** 2).sum(axis=0) / (n - 1)
+        beta = cov / spy_var
+        correlation = cov / np.sqrt(x_var * spy_var)
+        ratio = np.where(mask, values / spy, np.nan)
+    ratio[~np.isfinite(ratio)] = np.nan
+    valid_ratio = ~np.isnan(ratio)
+    leverage = np.where(valid_ratio.any(axis=0), np.nansum(ratio, axis=0) / np.maximum(valid_ratio.sum(axis=0), 1), np.nan)
+
+    metrics = pd.DataFrame({'beta_1y': beta, 'correlation_1y': correlation, 'avg_leverage_general_1y': leverage}, index=returns.columns)
+    return metrics[(n > min_obs) & (spy_var != 0) & np.isfinite(spy_var)]
+
 async def calculate_metrics_singularity(tickers_list: List[str], spy_data_10y: pd.DataFrame, is_called_by_ai: bool = False) -> dict[str, dict[str, float]]:
-    metrics = {}
+    """
+    1y beta, correlation and average leverage vs SPY for the whole universe,
+    from one aligned close matrix (SPY included) and one returns matrix.
+    """
     if spy_data_10y.empty or not tickers_list:
         return {}
-    chunk_size = 25
-    total_chunks = (len(tickers_list) + chunk_size - 1) // chunk_size
-    for i in range(0, len(tickers_list), chunk_size):
-        chunk = tickers_list[i:i + chunk_size]
-        current_chunk_num = (i // chunk_size) + 1
+    if not is_called_by_ai:
+        print(f"     -> Loading 1y closes for {len(tickers_list)} tickers...")
+    try:
+        hist_data = await get_yf_data_singularity(list(tickers_list) + ['SPY'], period="1y", is_called_by_ai=True)
+    except Exception as e:
         if not is_called_by_ai:
-            print(f"     -> Processing metrics chunk {current_chunk_num}/{total_chunks} ({len(chunk)} tickers)...")
-        chunk_hist_data = None
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                download_task = get_yf_data_singularity(chunk + ['SPY'], period="1y", is_called_by_ai=True)
-                chunk_hist_data = await asyncio.wait_for(download_task, timeout=45.0)
-                if not chunk_hist_data.empty:
-                    break
-                else:
-                    raise ValueError("Download returned an empty DataFrame")
-            except (asyncio.TimeoutError, Exception) as e:
-                if not is_called_by_ai:
-                    print(f"        ... chunk {current_chunk_num} failed on attempt {attempt + 1}/{max_retries}. Error: {type(e).__name__}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2)
-                else:
-                    if not is_called_by_ai:
-                        print(f"        ... SKIPPING chunk {current_chunk_num} after all attempts failed.")
-        if chunk_hist_data is None or chunk_hist_data.empty:
-            continue
-        daily_returns_chunk = chunk_hist_data.pct_change(fill_method=None).dropna()
-        for ticker in chunk:
-            if ticker in daily_returns_chunk.columns and 'SPY' in daily_returns_chunk.columns:
-                ticker_returns = daily_returns_chunk[ticker]
-                spy_returns_aligned = daily_returns_chunk['SPY']
-                aligned_data = pd.concat([ticker_returns, spy_returns_aligned], axis=1).dropna()
-                if len(aligned_data) > 20:
-                    try:
-                        cov_matrix = np.cov(aligned_data.iloc[:, 0], aligned_data.iloc[:, 1])
-                        spy_variance = cov_matrix[1, 1]
-                        if spy_variance != 0:
-                            beta = cov_matrix[0, 1] / spy_variance
-                            correlation = aligned_data.iloc[:, 0].corr(aligned_data.iloc[:, 1])
-                            leverage = (ticker_returns / spy_returns_aligned).replace([np.inf, -np.inf], np.nan).mean()
-                            metrics[ticker] = {'beta_1y': beta, 'correlation_1y': correlation, 'avg_leverage_general_1y': leverage}
-                    except Exception:
-                        continue
-    return metrics
+            print(f"        ... metrics download failed. Error: {type(e).__name__}")
+        return {}
+    if hist_data.empty or 'SPY' not in hist_data.columns:
+        return {}
+    daily_returns = hist_data.pct_change(fill_method=None)
+    tickers_present = [t for t in dict.fromkeys(tickers_list) if t in daily_returns.columns]
+    metrics = _market_relative_metrics(daily_returns[tickers_present], daily_returns['SPY'])
+    return metrics.to_dict('index')
 
 def save_initial_metrics_singularity(metrics: Dict[str, Dict[str, float]], tickers_processed: List[str], is_called_by_ai: bool = False):
     if not metrics: return
@@ -276,27 +265,12 @@ async def save_cultivate_data_internal_singularity(combined_portfolio_data_to_sa
         for item in combined_portfolio_data_to_save:
              writer.writerow([date_str_to_save, item['ticker'], 'N/A', f"{item['live_price']:.2f}", f"{item['raw_invest_score']:.2f}%", f"{item.get('combined_percent_allocation_of_lambda', 0):.2f}%"])
 
-async def run_cultivate_analysis_singularity(
-    portfolio_value: float,
-    frac_shares: bool,
-    cultivate_code_str: str,
-    is_called_by_ai: bool = False,
-    is_saving_run: bool = False
-) -> tuple[list[dict], list[dict], float, str, float, bool, str | None]:
-    suppress_sub_prints = is_called_by_ai or is_saving_run
-    if not suppress_sub_prints:
-        print(f"\n--- Cultivate Analysis (Code: {cultivate_code_str.upper()}, Value: ${portfolio_value:,.0f}) ---")
-    epsilon_val = safe_score(portfolio_value)
-    if epsilon_val <= 0:
-        return [], [], 0.0, cultivate_code_str, epsilon_val, frac_shares, "Error: Invalid portfolio value"
-    
-    allocation_score_cult, _, _ = get_allocation_score(is_called_by_ai=suppress_sub_prints)
-    
-    if allocation_score_cult is None:
-        return [], [], 0.0, cultivate_code_str, epsilon_val, frac_shares, "Error: Failed to get Allocation Score"
-    formula_results_cult = calculate_cultivate_formulas_singularity(allocation_score_cult, is_called_by_ai=suppress_sub_prints)
-    if formula_results_cult is None:
-        return [], [], 0.0, cultivate_code_str, epsilon_val, frac_shares, "Error: Formula calculation failed"
+async def _cultivate_universe(cultivate_code_str: str, suppress_sub_prints: bool) -> tuple[list[str], dict, dict]:
+    """
+    Steps 1-3 of Cultivate, which depend only on the code: the screened
+    universe, its beta/correlation metrics and INVEST scores for it plus the
+    hedging tickers. Returns ([], {}, {}) when screening yields nothing.
+    """
     if not suppress_sub_prints:
         step1_desc = "Screening for large-cap stocks (this may take a moment)" if cultivate_code_str.upper() == 'A' else "Fetching S&P 500 list"
         print(f"  -> Step 1/5: {step1_desc}...")
@@ -306,7 +280,7 @@ async def run_cultivate_analysis_singularity(
     elif cultivate_code_str.upper() == 'B':
         tickers_to_process_cult = await asyncio.to_thread(get_sp500_symbols_singularity, is_called_by_ai=suppress_sub_prints)
     if not tickers_to_process_cult:
-        return [], [], 0.0, cultivate_code_str, epsilon_val, frac_shares, f"Error: Step 1 (Code {cultivate_code_str.upper()}) failed to produce a ticker list."
+        return [], {}, {}
     if not suppress_sub_prints:
         print(f"     ...found {len(tickers_to_process_cult)} tickers.")
     if not suppress_sub_prints:
@@ -315,8 +289,6 @@ async def run_cultivate_analysis_singularity(
     metrics_dict_cult = {}
     if not spy_hist_data_metrics_cult.empty and tickers_to_process_cult:
         metrics_dict_cult = await calculate_metrics_singularity(tickers_to_process_cult, spy_hist_data_metrics_cult, is_called_by_ai=suppress_sub_prints)
-        if not is_saving_run:
-            await asyncio.to_thread(save_initial_metrics_singularity, metrics_dict_cult, tickers_to_process_cult, is_called_by_ai=suppress_sub_prints)
     if not suppress_sub_prints:
         print(f"  -> Step 3/5: Calculating Invest Scores for all tickers...")
     invest_scores_all_cult = {}
@@ -340,6 +312,40 @@ async def run_cultivate_analysis_singularity(
                     invest_scores_all_cult[ticker_sc] = {'score': safe_score(score_val_sc), 'live_price': safe_score(live_price_sc), 'raw_invest_score': safe_score(score_val_sc)}
     if not suppress_sub_prints:
         print(f"     ...scores calculated.")
+    return tickers_to_process_cult, metrics_dict_cult, invest_scores_all_cult
+
+async def run_cultivate_analysis_singularity(
+    portfolio_value: float,
+    frac_shares: bool,
+    cultivate_code_str: str,
+    is_called_by_ai: bool = False,
+    is_saving_run: bool = False
+) -> tuple[list[dict], list[dict], float, str, float, bool, str | None]:
+    suppress_sub_prints = is_called_by_ai or is_saving_run
+    if not suppress_sub_prints:
+        print(f"\n--- Cultivate Analysis (Code: {cultivate_code_str.upper()}, Value: ${portfolio_value:,.0f}) ---")
+    epsilon_val = safe_score(portfolio_value)
+    if epsilon_val <= 0:
+        return [], [], 0.0, cultivate_code_str, epsilon_val, frac_shares, "Error: Invalid portfolio value"
+    
+    allocation_score_cult, _, _ = get_allocation_score(is_called_by_ai=suppress_sub_prints)
+    
+    if allocation_score_cult is None:
+        return [], [], 0.0, cultivate_code_str, epsilon_val, frac_shares, "Error: Failed to get Allocation Score"
+    formula_results_cult = calculate_cultivate_formulas_singularity(allocation_score_cult, is_called_by_ai=suppress_sub_prints)
+    if formula_results_cult is None:
+        return [], [], 0.0, cultivate_code_str, epsilon_val, frac_shares, "Error: Formula calculation failed"
+    tickers_to_process_cult, metrics_dict_cult, invest_scores_all_cult = await result_cache.get_or_compute(
+        'cultivate_universe', cultivate_code_str.upper(),
+        lambda: _cultivate_universe(cultivate_code_str, suppress_sub_prints),
+        interval='1d',
+        tickers=lambda universe: list(universe[0]) + HEDGING_TICKERS,
+        cacheable=lambda universe: bool(universe[0])
+    )
+    if not tickers_to_process_cult:
+        return [], [], 0.0, cultivate_code_str, epsilon_val, frac_shares, f"Error: Step 1 (Code {cultivate_code_str.upper()}) failed to produce a ticker list."
+    if metrics_dict_cult and not is_saving_run:
+        await asyncio.to_thread(save_initial_metrics_singularity, metrics_dict_cult, tickers_to_process_cult, is_called_by_ai=suppress_sub_prints)
     if not suppress_sub_prints:
         print(f"  -> Step 4/5: Selecting final tickers based on formula ranges...")
     final_common_stock_tickers_cult, warning_msg, _, num_target = await select_tickers_singularity(
@@ -0,0 +1,166 @@
+# forecast_models.py
+# Off-loop training for the ML forecast horizons. Each horizon's random forests
+# are fitted in the shared process pool (or a worker thread on single-core hosts) so a
+# forecast never blocks the event loop, and the fitted models' forecast for the
+# last bar is cached by ticker, horizon and last bar, so repeat forecasts on the
+# same day skip training entirely. Indicator matrices are cached per data
+# snapshot and shared by every horizon trained on them.
+import os
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+try:
+    from backend.integration.price_store import SingleFlight
+    from backend.integration.process_pool import get_process_pool, reset_process_pool, pool_workers
+except ImportError:
+    from integration.price_store import SingleFlight
+    from integration.process_pool import get_process_pool, reset_process_pool, pool_workers
+
+# --- Constants ---
+N_ESTIMATORS = 100
+RANDOM_STATE = 42
+MODEL_CACHE_SIZE = 256 # (ticker, horizon, bar) forecasts kept in memory
+FEATURE_CACHE_SIZE = 32 # (ticker, frequency, bar) indicator matrices kept in memory
+
+forecast_models_logger = logging.getLogger('FORECAST_MODELS')
+
+# (direction 0/1, confidence %, estimated % change)
+HorizonForecast = Tuple[int, float, float]
+
+
+def snapshot_key(close: pd.Series) -> Tuple:
+    """Identifies a data snapshot: last bar, row count and last close."""
+    if not len(close):
+        return (None, 0, None)
+    return (pd.Timestamp(close.index[-1]).isoformat(), len(close), round(float(close.iloc[-1]), 6))
+
+
+def fit_horizon_models(X: pd.DataFrame, y_direction: pd.Series, y_magnitude: pd.Series, n_jobs: int = -1) -> HorizonForecast:
+    """
+    Fits the direction classifier and magnitude regressor on every row of X and
+    forecasts from its last row. Module-level so pool workers can run it.
+    """
+    clf = RandomForestClassifier(n_estimators=N_ESTIMATORS, random_state=RANDOM_STATE, n_jobs=n_jobs).fit(X, y_direction)
+    reg = RandomForestRegressor(n_estimators=N_ESTIMATORS, random_state=RANDOM_STATE, n_jobs=n_jobs).fit(X, y_magnitude)
+
+    last_features = X.iloc[-1:]
+    direction_pred = int(clf.predict(last_features)[0])
+    confidence = float(clf.predict_proba(last_features)[0][direction_pred] * 100)
+    magnitude_pred = float(reg.predict(last_features)[0] * 100)
+    return direction_pred, confidence, magnitude_pred
+
+
+# --- Pool ---
+async def _fit_off_loop(X: pd.DataFrame, y_direction: pd.Series, y_magnitude: pd.Series) -> HorizonForecast:
+    pool = get_process_pool()
+    if pool is not None:
+        # Split the cores between workers instead of letting every worker's forests use all of them
+        n_jobs = max(1, (os.cpu_count() or 1) // pool_workers())
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fit_horizon_models, X, y_direction, y_magnitude, n_jobs)
+        except Exception as e:
+            forecast_models_logger.warning(f"Forecast pool failed ({type(e).__name__}: {e}); training in a worker thread.")
+            reset_process_pool()
+    return await asyncio.to_thread(fit_horizon_models, X, y_direction, y_magnitude)
+
+
+# --- Cache ---
+class ForecastModelCache:
+    """
+    LRU of horizon forecasts. The key pins the training data: ticker, horizon,
+    last bar, row count and last close, so a new bar or re-adjusted history
+    trains afresh while repeat requests on the same bar are lookups.
+    """
+
+    def __init__(self, max_size: int = MODEL_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple, HorizonForecast]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    @staticmethod
+    def key(ticker: str, horizon: str, close: pd.Series, training_rows: int) -> Tuple:
+        return (ticker.upper().strip(), horizon, training_rows) + snapshot_key(close)
+
+    def get(self, key: Tuple) -> Optional[HorizonForecast]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def put(self, key: Tuple, forecast: HorizonForecast) -> None:
+        with self._lock:
+            self._entries[key] = forecast
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    async def forecast(self, ticker: str, horizon: str, X: pd.DataFrame, y_direction: pd.Series,
+                       y_magnitude: pd.Series, close: pd.Series) -> HorizonForecast:
+        """
+        Cached forecast for one horizon. `close` is the horizon's full close
+        series (training rows stop `horizon` bars short of it); concurrent
+        requests for the same key train once.
+        """
+        key = self.key(ticker, horizon, close, len(X))
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        async def train() -> HorizonForecast:
+            result = await _fit_off_loop(X, y_direction, y_magnitude)
+            self.put(key, result)
+            return result
+
+        return await self._flights.run(key, train)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FeatureMatrixCache:
+    """
+    LRU of indicator matrices per (ticker, frequency, data snapshot). Cached
+    frames are shared between horizons and requests and must not be mutated.
+    """
+
+    def __init__(self, max_size: int = FEATURE_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, ticker: str, freq: str, close: pd.Series, build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        key = (ticker.upper().strip(), freq) + snapshot_key(close)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        matrix = build()
+        with self._lock:
+            self._entries[key] = matrix
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return matrix
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# --- Shared instances ---
+forecast_model_cache = ForecastModelCache()
+feature_matrix_cache = FeatureMatrixCache()
@@ -1,9 +1,7 @@
 # --- Imports for fundamentals_command ---
 import asyncio
-import random
 from typing import List, Dict, Any, Optional
 
-import yfinance as yf
 import numpy as np
 from tabulate import tabulate
 try:
@@ -13,6 +11,7 @@ except ImportError:
         from usage_counter import increment_usage
     except ImportError:
         def increment_usage(*args): pass
+from backend.integration.info_store import info_store
 
 # --- Global Variables & Constants ---
 YFINANCE_API_SEMAPHORE = asyncio.Semaphore(8)
@@ -27,12 +26,12 @@ def safe_get(data_dict: Dict, key: str, default: Any = None) -> Any:
     return value
 
 async def get_yfinance_info_robustly(ticker: str) -> Optional[Dict[str, Any]]:
-    """A robust, centralized function to fetch yfinance .info data."""
+    """A robust, centralized function to fetch yfinance .info data (served from the local info store)."""
     async with YFINANCE_API_SEMAPHORE:
         for attempt in range(3):
             try:
-                await asyncio.sleep(random.uniform(0.2, 0.5))
-                stock_info = await asyncio.to_thread(lambda: yf.Ticker(ticker).info)
+                # Retries bypass the stored copy in case it is the incomplete one
+                stock_info = await info_store.get_info_async(ticker, refresh=attempt > 0)
                 if stock_info and not stock_info.get('regularMarketPrice'):
                     raise ValueError(f"Incomplete data received for {ticker}")
                 return stock_info
@@ -0,0 +1,150 @@
+# index_constituents.py
+# Single source for index membership lists (S&P 500, S&P 100, Nasdaq-100).
+# Lists are scraped from Wikipedia at most once a day, persisted to
+# data/index_constituents.json and memoized in-process, so universe lookups
+# in the heavy commands no longer cost an HTTP round trip each time.
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from io import StringIO
+from typing import List, Dict, Any, Optional
+
+import pandas as pd
+import requests
+
+# --- Constants ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONSTITUENTS_CACHE_FILE = os.path.join(BASE_DIR, 'data', 'index_constituents.json')
+REFRESH_INTERVAL_SECONDS = 24 * 3600
+FAILURE_BACKOFF_SECONDS = 15 * 60 # After a failed scrape, serve the stale list this long before retrying
+
+# 'table' pins the components table on pages where an earlier table also has the
+# symbol column; without it (or if the pinned table lacks the column) the first
+# table with the column is read
+INDEX_SOURCES = {
+    'sp500': {'url': 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies', 'symbol_column': 'Symbol', 'table': 0},
+    'sp100': {'url': 'https://en.wikipedia.org/wiki/S%26P_100', 'symbol_column': 'Symbol', 'table': 2},
+    'nasdaq100': {'url': 'https://en.wikipedia.org/wiki/Nasdaq-100', 'symbol_column': 'Ticker'},
+}
+SECTOR_COLUMNS = ['GICS Sector', 'Sector']
+REQUEST_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+
+constituents_logger = logging.getLogger('INDEX_CONSTITUENTS')
+
+# --- In-memory state ---
+_memo: Dict[str, Dict[str, Any]] = {}
+_failed_at: Dict[str, float] = {} # index_name -> time of the last failed scrape
+_disk_loaded = False
+_lock = threading.Lock()
+
+
+def _load_disk_cache() -> None:
+    global _disk_loaded
+    _disk_loaded = True
+    if not os.path.exists(CONSTITUENTS_CACHE_FILE):
+        return
+    try:
+        with open(CONSTITUENTS_CACHE_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for index_name, entry in data.items():
+            if isinstance(entry, dict) and entry.get('symbols'):
+                _memo[index_name] = entry
+    except (json.JSONDecodeError, IOError) as e:
+        constituents_logger.warning(f"Ignoring unreadable constituents cache: {e}")
+
+
+def _save_disk_cache() -> None:
+    try:
+        os.makedirs(os.path.dirname(CONSTITUENTS_CACHE_FILE), exist_ok=True)
+        tmp_path = f"{CONSTITUENTS_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(_memo, f, indent=2)
+        os.replace(tmp_path, CONSTITUENTS_CACHE_FILE)
+    except IOError as e:
+        constituents_logger.warning(f"Could not persist constituents cache: {e}")
+
+
+def _scrape(index_name: str) -> Optional[Dict[str, Any]]:
+    source = INDEX_SOURCES[index_name]
+    response = requests.get(source['url'], headers=REQUEST_HEADERS, timeout=15)
+    response.raise_for_status()
+    tables = pd.read_html(StringIO(response.text))
+    pinned = source.get('table')
+    if pinned is not None and pinned < len(tables):
+        tables.insert(0, tables.pop(pinned))
+    for df in tables:
+        if source['symbol_column'] not in df.columns:
+            continue
+        raw_symbols = df[source['symbol_column']]
+        symbols = [str(s).strip().replace('.', '-') for s in raw_symbols.tolist() if isinstance(s, str) and s.strip()]
+        if not symbols:
+            continue
+        sector_col = next((c for c in SECTOR_COLUMNS if c in df.columns), None)
+        sectors = {}
+        if sector_col:
+            sectors = {str(sym).strip().replace('.', '-'): str(sec) for sym, sec in zip(raw_symbols, df[sector_col]) if isinstance(sym, str)}
+        return {'symbols': sorted(set(symbols)), 'sectors': sectors, 'fetched_at': time.time()}
+    return None
+
+
+def _is_current(index_name: str, entry: Optional[Dict[str, Any]], force_refresh: bool) -> bool:
+    """True when `entry` should be served without scraping: fresh, or inside a failure backoff."""
+    if force_refresh:
+        return False
+    now = time.time()
+    if now - _failed_at.get(index_name, 0) < FAILURE_BACKOFF_SECONDS:
+        return True
+    return bool(entry) and now - entry.get('fetched_at', 0) < REFRESH_INTERVAL_SECONDS
+
+
+def _get_entry(index_name: str, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
+    index_name = index_name.lower()
+    if index_name not in INDEX_SOURCES:
+        return None
+
+    entry = _memo.get(index_name)
+    if _is_current(index_name, entry, force_refresh):
+        return entry
+
+    with _lock:
+        if not _disk_loaded:
+            _load_disk_cache()
+        entry = _memo.get(index_name)
+        if _is_current(index_name, entry, force_refresh):
+            return entry
+        try:
+            fresh = _scrape(index_name)
+        except Exception as e:
+            fresh = None
+            constituents_logger.warning(f"Failed to refresh {index_name} constituents: {e}")
+        if fresh:
+            _memo[index_name] = fresh
+            _failed_at.pop(index_name, None)
+            _save_disk_cache()
+            return fresh
+        _failed_at[index_name] = time.time()
+        # A stale list is far better than none for every downstream command
+        return entry
+
+
+def get_index_constituents(index_name: str, force_refresh: bool = False) -> List[str]:
+    """Returns the (yfinance-formatted) members of 'sp500', 'sp100' or 'nasdaq100'; [] if unavailable."""
+    entry = _get_entry(index_name, force_refresh)
+    return list(entry['symbols']) if entry else []
+
+
+def get_index_sectors(index_name: str) -> Dict[str, str]:
+    """Returns {symbol: GICS sector} for the index, when Wikipedia lists one."""
+    entry = _get_entry(index_name)
+    return dict(entry.get('sectors', {})) if entry else {}
+
+
+async def get_index_constituents_async(index_name: str, force_refresh: bool = False) -> List[str]:
+    index_name = index_name.lower()
+    entry = _memo.get(index_name)
+    if entry and _is_current(index_name, entry, force_refresh):
+        return list(entry['symbols']) # Hot path: no thread hop
+    return await asyncio.to_thread(get_index_constituents, index_name, force_refresh)
@@ -0,0 +1,189 @@
+# info_store.py
+# Local read-through cache for yfinance Ticker.info. The .info call is one of
+# the slowest upstream requests (several seconds per ticker) and its contents
+# change slowly, so fetched dicts are kept in SQLite and served until their
+# per-ticker expiry. A universe can be prefilled in one batch.
+import os
+import json
+import time
+import zlib
+import asyncio
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+import yfinance as yf
+
+try:
+    from backend.integration.price_store import SingleFlight
+    from backend.integration.rate_limiter import yahoo_rate_limiter
+except ImportError:
+    from integration.price_store import SingleFlight
+    from integration.rate_limiter import yahoo_rate_limiter
+
+# --- Constants ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INFO_STORE_PATH = os.path.join(BASE_DIR, 'data', 'info_store.sqlite')
+
+INFO_TTL_MIN = 6 * 3600 # Seconds; each ticker gets a fixed TTL in [MIN, MAX)
+INFO_TTL_MAX = 24 * 3600 # so a prefilled universe does not expire all at once
+INFO_TTL_INCOMPLETE = 15 * 60 # Dicts without a market price are retried sooner
+PREFILL_WORKERS = 8
+
+info_store_logger = logging.getLogger('INFO_STORE')
+
+
+def _symbol(ticker: Any) -> str:
+    return str(ticker).replace('.', '-').upper().strip()
+
+
+def info_ttl(symbol: str, info: Optional[Dict[str, Any]] = None) -> int:
+    """Seconds a fetched dict stays fresh: stable per ticker, short for incomplete data."""
+    if info is not None and not info.get('regularMarketPrice'):
+        return INFO_TTL_INCOMPLETE
+    return INFO_TTL_MIN + zlib.crc32(symbol.encode()) % (INFO_TTL_MAX - INFO_TTL_MIN)
+
+
+class InfoStore:
+    """
+    symbol -> Ticker.info dict, persisted in one SQLite table. Reads are local
+    until the row's expiry; expired or missing rows are fetched upstream
+    through the shared rate limiter. An upstream failure falls back to the
+    stale row when there is one.
+    """
+
+    def __init__(self, path: str = INFO_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self._ready = False
+
+    # --- SQLite ---
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute("""CREATE TABLE IF NOT EXISTS ticker_info (
+                                        symbol TEXT PRIMARY KEY,
+                                        fetched_at REAL NOT NULL,
+                                        expires_at REAL NOT NULL,
+                                        payload TEXT NOT NULL)""")
+                    conn.commit()
+                    self._ready = True
+        return conn
+
+    def _read(self, symbols: List[str]) -> Dict[str, tuple]:
+        """symbol -> (expires_at, info) for the rows that exist."""
+        if not symbols:
+            return {}
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT symbol, expires_at, payload FROM ticker_info WHERE symbol IN ({','.join('?' * len(symbols))})",
+                symbols
+            ).fetchall()
+        finally:
+            conn.close()
+        found = {}
+        for symbol, expires_at, payload in rows:
+            try:
+                found[symbol] = (expires_at, json.loads(payload))
+            except ValueError:
+                continue
+        return found
+
+    def put(self, ticker: str, info: Dict[str, Any], now: Optional[float] = None) -> None:
+        symbol = _symbol(ticker)
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            conn.execute("INSERT OR REPLACE INTO ticker_info VALUES (?, ?, ?, ?)",
+                         (symbol, now, now + info_ttl(symbol, info), json.dumps(info, default=str)))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def invalidate(self, ticker: Optional[str] = None) -> None:
+        """Drops one ticker's row, or every row."""
+        conn = self._connect()
+        try:
+            if ticker is None:
+                conn.execute("DELETE FROM ticker_info")
+            else:
+                conn.execute("DELETE FROM ticker_info WHERE symbol = ?", (_symbol(ticker),))
+            conn.commit()
+        finally:
+            conn.close()
+
+    # --- Upstream ---
+    @staticmethod
+    def _fetch(symbol: str) -> Dict[str, Any]:
+        yahoo_rate_limiter.acquire()
+        try:
+            info = yf.Ticker(symbol).info
+        except Exception as e:
+            yahoo_rate_limiter.report_error(e)
+            raise
+        if info:
+            yahoo_rate_limiter.report_success()
+        else:
+            yahoo_rate_limiter.report_empty()
+        return dict(info or {})
+
+    # --- Public API ---
+    def cached(self, ticker: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """The stored dict without going upstream (None if missing or expired)."""
+        row = self._read([_symbol(ticker)]).get(_symbol(ticker))
+        if row is None or (not allow_stale and row[0] <= time.time()):
+            return None
+        return row[1]
+
+    def get_info(self, ticker: str, refresh: bool = False) -> Dict[str, Any]:
+        """Ticker.info through the store. Empty dict if nothing could be fetched."""
+        symbol = _symbol(ticker)
+        row = self._read([symbol]).get(symbol)
+        if row is not None and not refresh and row[0] > time.time():
+            return row[1]
+        try:
+            info = self._fetch(symbol)
+        except Exception as e:
+            info_store_logger.warning(f"Ticker.info failed for {symbol}: {type(e).__name__}: {e}")
+            return row[1] if row is not None else {}
+        if not info:
+            return row[1] if row is not None else {}
+        self.put(symbol, info)
+        return info
+
+    async def get_info_async(self, ticker: str, refresh: bool = False) -> Dict[str, Any]:
+        """Async get_info; concurrent requests for the same ticker share one fetch."""
+        symbol = _symbol(ticker)
+        info = await self._flights.run((symbol, refresh), asyncio.to_thread, self.get_info, symbol, refresh)
+        return dict(info)
+
+    def stale(self, tickers: Iterable[str]) -> List[str]:
+        """Tickers (as symbols) that are missing or expired."""
+        symbols = list(dict.fromkeys(_symbol(t) for t in tickers if t))
+        rows = self._read(symbols)
+        now = time.time()
+        return [s for s in symbols if s not in rows or rows[s][0] <= now]
+
+    def prefill(self, tickers: Iterable[str], max_workers: int = PREFILL_WORKERS) -> int:
+        """Fetches every missing or expired ticker of a universe. Returns how many were fetched."""
+        symbols = self.stale(tickers)
+        if not symbols:
+            return 0
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as pool:
+            fetched = sum(1 for info in pool.map(lambda s: self.get_info(s, refresh=True), symbols) if info)
+        info_store_logger.info(f"Prefilled Ticker.info for {fetched}/{len(symbols)} tickers.")
+        return fetched
+
+    async def prefill_async(self, tickers: Iterable[str], max_workers: int = PREFILL_WORKERS) -> int:
+        return await asyncio.to_thread(self.prefill, list(tickers), max_workers)
+
+
+# --- Shared instance ---
+info_store = InfoStore()
@@ -10,8 +10,8 @@ import asyncio
 import matplotlib.pyplot as plt
 from typing import List, Dict, Any, Optional, Tuple
 import csv
+import copy
 import traceback
-import numpy as np
 try:
     from backend.usage_counter import increment_usage
 except ImportError:
@@ -19,6 +19,8 @@ except ImportError:
         from usage_counter import increment_usage
     except ImportError:
         def increment_usage(*args): pass
+from backend.integration.price_store import history_async, LIVE_MAX_AGE
+from backend.integration.invest_scoring import calculate_ema_invest_batch
 
 # --- Constants ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -105,10 +107,11 @@ async def calculate_ema_invest(ticker: str, ema_interval: int, is_called_by_ai:
                 else:
                     period = "1mo"; interval = "1h"
                 
-                # Dynamic sleep based on attempt
-                await asyncio.sleep(np.random.uniform(0.01, 0.05) + (attempt * 0.5)) 
+                # Back off between retries only; upstream pacing is done by the shared rate limiter
+                if attempt:
+                    await asyncio.sleep(attempt * 0.5)
                 
-                data = await asyncio.to_thread(stock.history, period=period, interval=interval)
+                data = await history_async(ticker.replace('.', '-'), period=period, interval=interval, max_age=LIVE_MAX_AGE)
                 
                 # Check for empty data BUT allow retries if it looks like a glitch
                 if data.empty or 'Close' not in data.columns: 
@@ -150,6 +153,87 @@ async def calculate_ema_invest(ticker: str, ema_interval: int, is_called_by_ai:
                     if not is_called_by_ai: print(f"DEBUG: Error in calculate_ema_invest for {ticker} after 3 attempts: {e}")
                     return None, None
 
+def _split_sub_portfolio_items(cleaned_config: Dict[str, Any], portfolio_index: int, all_portfolio_configs: Dict[str, Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+    """Splits a sub-portfolio's tickers field into direct tickers and nested portfolio codes."""
+    tickers_str = cleaned_config.get(f'tickers_{portfolio_index}', '')
+    items_raw = [item.strip().upper() for item in tickers_str.split(',') if item.strip()]
+    items_to_calc, nested_portfolios = [], []
+    for item in items_raw:
+        if item.lower() in all_portfolio_configs:
+            nested_portfolios.append(item.lower())
+        else:
+            items_to_calc.append(item)
+    return items_to_calc, nested_portfolios
+
+class _PortfolioResolution:
+    """
+    Per-request cache for process_custom_portfolio. INVEST scores are kept per
+    (ticker, sensitivity) and resolved sub-portfolios per (code, relevant path),
+    so a tree that reaches the same ticker or sub-portfolio several times pays
+    for it once. The whole tree's tickers are scored up front, one batch per
+    sensitivity.
+    """
+
+    def __init__(self, all_portfolio_configs: Dict[str, Dict[str, Any]]):
+        self.configs = all_portfolio_configs
+        self.scores: Dict[Tuple[str, int], Any] = {}
+        self.subtrees: Dict[Tuple[str, frozenset], List[Dict[str, Any]]] = {}
+        self._reachable: Dict[str, frozenset] = {}
+
+    def _sub_portfolios(self, config: Dict[str, Any], weighted_only: bool = True):
+        cleaned = {str(k).strip(): v for k, v in config.items()}
+        for portfolio_index in range(1, int(safe_score(cleaned.get('num_portfolios', 0))) + 1):
+            if weighted_only and safe_score(cleaned.get(f'weight_{portfolio_index}', '0')) <= 0:
+                continue
+            yield _split_sub_portfolio_items(cleaned, portfolio_index, self.configs)
+
+    async def prefetch(self, root_config: Dict[str, Any]) -> None:
+        wanted: Dict[int, List[str]] = {}
+        seen, stack = set(), [root_config]
+        while stack:
+            config = stack.pop()
+            sensitivity = int(safe_score({str(k).strip(): v for k, v in config.items()}.get('ema_sensitivity', 3)))
+            for tickers, nested in self._sub_portfolios(config):
+                wanted.setdefault(sensitivity, []).extend(tickers)
+                for code in nested:
+                    if code not in seen:
+                        seen.add(code)
+                        stack.append(self.configs[code])
+        await asyncio.gather(*[self.scores_for(list(dict.fromkeys(t)), s) for s, t in wanted.items()])
+
+    async def scores_for(self, tickers: List[str], ema_sensitivity: int) -> List[Any]:
+        """(live_price, score) per ticker; anything not cached yet is scored in one batch."""
+        missing = [t for t in dict.fromkeys(tickers) if (t, ema_sensitivity) not in self.scores]
+        if missing:
+            try:
+                scored = await calculate_ema_invest_batch(missing, ema_sensitivity)
+            except Exception as e:
+                print(f"[DEBUG INVEST] Batch scoring failed, falling back to per-ticker: {e}")
+                scored = {}
+            unscored = [t for t in missing if scored.get(t, (None, None))[1] is None]
+            fallback_results = await asyncio.gather(*[calculate_ema_invest(t, ema_sensitivity, is_called_by_ai=True) for t in unscored])
+            scored.update(zip(unscored, fallback_results))
+            for t in missing:
+                self.scores[(t, ema_sensitivity)] = scored.get(t)
+        return [self.scores[(t, ema_sensitivity)] for t in tickers]
+
+    def _reachable_from(self, code: str) -> frozenset:
+        if code not in self._reachable:
+            seen, stack = set(), [code]
+            while stack:
+                for _, nested in self._sub_portfolios(self.configs[stack.pop()], weighted_only=False):
+                    for child in nested:
+                        if child not in seen:
+                            seen.add(child)
+                            stack.append(child)
+            self._reachable[code] = frozenset(seen)
+        return self._reachable[code]
+
+    def subtree_key(self, code: str, path: List[str]) -> Tuple[str, frozenset]:
+        # Only ancestors the subtree can reach change its result (through cycle skipping)
+        reachable = self._reachable_from(code)
+        return code, frozenset(p for p in path if p in reachable)
+
 # --- Main Logic Function (Restored so custom_command.py can import it) ---
 async def process_custom_portfolio(
     portfolio_data_config: Dict[str, Any],
@@ -161,7 +245,8 @@ async def process_custom_portfolio(
     names_map: Optional[Dict[str, str]] = None,
     all_portfolio_configs_passed: Optional[Dict[str, Dict[str, Any]]] = None,
     parent_path: Optional[List[str]] = None,
-    ignore_market_conditions: bool = False
+    ignore_market_conditions: bool = False,
+    resolution: Optional[_PortfolioResolution] = None
 ) -> Tuple[List[str], List[Dict[str, Any]], float, List[Dict[str, Any]]]:
     
     try:
@@ -177,6 +262,10 @@ async def process_custom_portfolio(
         else:
             all_portfolio_configs = all_portfolio_configs_passed or {}
 
+        if resolution is None:
+            resolution = _PortfolioResolution(all_portfolio_configs)
+            await resolution.prefetch(portfolio_data_config)
+
         sell_to_cash_active = False
         if is_top_level_call and not ignore_market_conditions:
             avg_score, _, _ = get_allocation_score(is_called_by_ai=suppress_prints)
@@ -214,24 +303,13 @@ async def process_custom_portfolio(
             weight = safe_score(cleaned_config.get(f'weight_{portfolio_index}', '0'))
             if weight <= 0: continue
 
-            tickers_str = cleaned_config.get(f'tickers_{portfolio_index}', '')
-            items_raw = [item.strip().upper() for item in tickers_str.split(',') if item.strip()]
-            
-            items_to_calc = []
-            nested_portfolios = []
-
-            for item in items_raw:
-                if item.lower() in all_portfolio_configs:
-                    nested_portfolios.append(item.lower())
-                else:
-                    items_to_calc.append(item)
+            items_to_calc, nested_portfolios = _split_sub_portfolio_items(cleaned_config, portfolio_index, all_portfolio_configs)
 
             # Container for THIS sub-portfolio's items
             sub_portfolio_items = []
 
-            # 1. Process Direct Stocks (Parallel)
-            tasks = [calculate_ema_invest(ticker, ema_sensitivity, is_called_by_ai=True) for ticker in items_to_calc]
-            results = await asyncio.gather(*tasks)
+            # 1. Process Direct Stocks (scored up front for the whole tree)
+            results = await resolution.scores_for(items_to_calc, ema_sensitivity)
             
             for ticker, res in zip(items_to_calc, results):
                 if not res or not isinstance(res, tuple) or len(res) < 2: continue
@@ -268,20 +346,25 @@ async def process_custom_portfolio(
                 if total_value_singularity and weight > 0:
                      child_alloc_value = total_value_singularity * (weight / 100.0)
 
-                # Recurse
-                _, child_calculated, _, _ = await process_custom_portfolio(
-                    portfolio_data_config=all_portfolio_configs[child_code],
-                    tailor_portfolio_requested=True, # MUST be True to get holdings
-                    total_value_singularity=child_alloc_value,
-                    frac_shares_singularity=frac_shares_singularity,
-                    is_called_by_ai=True,
-                    names_map=names_map,
-                    all_portfolio_configs_passed=all_portfolio_configs,
-                    parent_path=new_path
-                )
-
-                # Merge Results
-                for child_item in child_calculated:
+                # Recurse (once per sub-portfolio and relevant path; the scored items don't depend on value)
+                subtree_key = resolution.subtree_key(child_code, new_path)
+                child_calculated = resolution.subtrees.get(subtree_key)
+                if child_calculated is None:
+                    _, child_calculated, _, _ = await process_custom_portfolio(
+                        portfolio_data_config=all_portfolio_configs[child_code],
+                        tailor_portfolio_requested=True, # MUST be True to get holdings
+                        total_value_singularity=child_alloc_value,
+                        frac_shares_singularity=frac_shares_singularity,
+                        is_called_by_ai=True,
+                        names_map=names_map,
+                        all_portfolio_configs_passed=all_portfolio_configs,
+                        parent_path=new_path,
+                        resolution=resolution
+                    )
+                    resolution.subtrees[subtree_key] = child_calculated
+
+                # Merge Results (copies: the cached items are shared by every parent reaching this sub-portfolio)
+                for child_item in copy.deepcopy(child_calculated):
                     # Update metadata
                     child_item['sub_portfolio_id'] = f"Sub-Portfolio {portfolio_index} > {child_item['sub_portfolio_id']}"
                     # We accept the child's score for now, but will scale it below
@@ -0,0 +1,109 @@
+# invest_scoring.py
+# Universe-wide INVEST scoring. Loads the closes for every ticker in one
+# price-store request and computes EMA8/EMA55 scores for all of them with
+# matrix EWM operations, instead of one history call and one pair of EWMs
+# per ticker.
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from backend.integration.price_store import download_async, LIVE_MAX_AGE
+except ImportError:
+    from integration.price_store import download_async, LIVE_MAX_AGE
+
+# --- Constants ---
+# (period, interval) per EMA sensitivity, as used by invest_command.calculate_ema_invest
+INVEST_HISTORY_WINDOWS: Dict[int, Tuple[str, str]] = {1: ('2y', '1wk'), 2: ('1y', '1d'), 3: ('1mo', '1h')}
+SCORE_COLUMNS = ['live_price', 'ema_8', 'ema_55', 'score', 'last_bar']
+
+invest_scoring_logger = logging.getLogger('INVEST_SCORING')
+
+
+def extract_close_matrix(data: pd.DataFrame) -> pd.DataFrame:
+    """Close prices (one column per ticker) from a yf.download-shaped frame, either grouping."""
+    if data is None or data.empty or not isinstance(data.columns, pd.MultiIndex):
+        return pd.DataFrame()
+    for level in (0, 1):
+        if 'Close' in data.columns.get_level_values(level):
+            closes = data.xs('Close', axis=1, level=level)
+            return closes.apply(pd.to_numeric, errors='coerce')
+    return pd.DataFrame()
+
+
+def score_invest_matrix(closes: pd.DataFrame, max_staleness_days: Optional[int] = None) -> pd.DataFrame:
+    """
+    INVEST scores for every column of `closes` (rows: bars, columns: tickers).
+
+    Each ticker is scored on its own valid closes only, so a gap or a missing
+    last bar in the shared index does not shift its EMAs: valid values are
+    packed to the bottom of each column before the EWMs run. Tickers whose last
+    valid bar is older than `max_staleness_days` get no price or score.
+    """
+    result = pd.DataFrame(index=closes.columns, columns=SCORE_COLUMNS, dtype=object)
+    if closes.empty:
+        return result
+
+    values = closes.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    packed = pd.DataFrame(np.take_along_axis(values, np.argsort(valid, axis=0, kind='stable'), axis=0), columns=closes.columns)
+    ema_8 = packed.ewm(span=8, adjust=False).mean().iloc[-1].to_numpy()
+    ema_55 = packed.ewm(span=55, adjust=False).mean().iloc[-1].to_numpy()
+    live_price = packed.iloc[-1].to_numpy(copy=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = (((ema_8 - ema_55) / ema_55) * 4 + 0.5) * 100
+    score[~np.isfinite(score)] = np.nan
+
+    has_data = valid.any(axis=0)
+    last_pos = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+    last_bar = pd.Series(closes.index[last_pos], index=closes.columns).where(has_data)
+
+    if max_staleness_days is not None:
+        tz = getattr(closes.index, 'tz', None)
+        now = pd.Timestamp(datetime.now(tz) if tz else datetime.now())
+        stale = np.array([pd.isna(ts) or (now - ts).days > max_staleness_days for ts in last_bar])
+        live_price[stale] = np.nan
+        score[stale] = np.nan
+
+    result['live_price'] = live_price
+    result['ema_8'] = ema_8
+    result['ema_55'] = ema_55
+    result['score'] = score
+    result['last_bar'] = last_bar
+    return result
+
+
+async def calculate_ema_invest_batch(
+    tickers: List[str],
+    ema_interval: int,
+    windows: Optional[Dict[int, Tuple[str, str]]] = None,
+    max_staleness_days: Optional[int] = None,
+    max_age: Optional[float] = LIVE_MAX_AGE
+) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+    """
+    (live_price, invest_score) for every ticker, like calculate_ema_invest, from
+    a single data load. Tickers without data are left out of the result so
+    callers can fall back to a per-ticker lookup. Stored tails older than
+    `max_age` seconds are refreshed first, so the live price is current.
+    """
+    windows = windows or INVEST_HISTORY_WINDOWS
+    period, interval = windows.get(ema_interval, windows[3])
+    symbols = {ticker: ticker.replace('.', '-').upper().strip() for ticker in tickers}
+    if not symbols:
+        return {}
+    data = await download_async(sorted(set(symbols.values())), period=period, interval=interval, auto_adjust=True, progress=False, max_age=max_age)
+    scores = score_invest_matrix(extract_close_matrix(data), max_staleness_days=max_staleness_days)
+
+    results: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+    for ticker, symbol in symbols.items():
+        if symbol not in scores.index:
+            continue
+        live_price, score = scores.at[symbol, 'live_price'], scores.at[symbol, 'score']
+        if pd.isna(live_price) and pd.isna(score):
+            continue
+        results[ticker] = (None if pd.isna(live_price) else float(live_price), None if pd.isna(score) else float(score))
+    invest_scoring_logger.info(f"Scored {len(results)}/{len(symbols)} tickers ({interval}, {period}) in one batch.")
+    return results
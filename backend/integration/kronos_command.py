@@ -12,7 +12,7 @@ import sqlite3
 import pytz
 from tabulate import tabulate
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 try:
     from backend.integration.prometheus_core import Prometheus
 except ImportError:
@@ -20,11 +20,14 @@ except ImportError:
         from integration.prometheus_core import Prometheus
     except ImportError:
         from prometheus_core import Prometheus
+try:
+    from backend.integration.index_constituents import get_index_constituents_async
+except ImportError:
+    from integration.index_constituents import get_index_constituents_async
 from dateutil.relativedelta import relativedelta
 import logging
 import random
 import statistics
-import requests
 # --- (Inside kronos_command.py) ---
 
 # --- Add these new imports ---
@@ -41,14 +44,19 @@ OPTIMIZABLE_PARAMS_FILE = 'optimizable_parameters.json'
 
 prometheus_logger = logging.getLogger('PROMETHEUS_CORE') # <-- ADD THIS LINE
 
-# Define cache file paths directly to avoid import issues
-SP500_CACHE_FILE = 'sp500_risk_cache.csv'
-SP100_CACHE_FILE = 'sp100_risk_cache.csv'
+# Define cache paths directly to avoid import issues (MatrixCache segment directories)
+SP500_CACHE_FILE = 'sp500_risk_cache'
+SP100_CACHE_FILE = 'sp100_risk_cache'
 
 # Define default background task intervals
 DEFAULT_CORR_INTERVAL_HOURS = 6
 DEFAULT_WORKFLOW_CHANCE = 0.1
 
+# Convergence matrix execution
+CONVERGENCE_MAX_PARALLEL = 3     # Cells optimized concurrently (backtests themselves fan out to the process pool)
+CONVERGENCE_GENERATIONS = 15
+CONVERGENCE_POPULATION = 30
+
 # --- Kronos Helper Functions ---
 
 # --- (Inside "Kronos Helper Functions" section) ---
@@ -65,39 +73,13 @@ MARKET_CONDITIONS = {
 
 async def _get_index_tickers(index_name: str) -> List[str]:
     """
-    Fetches the current list of tickers for a major index from Wikipedia.
-    Supports 'sp500' and 'nasdaq100'.
+    Current list of tickers for a major index, from the shared constituents cache.
+    Supports 'sp500', 'sp100' and 'nasdaq100'.
     """
-    url_map = {
-        'sp500': 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies',
-        'nasdaq100': 'https://en.wikipedia.org/wiki/Nasdaq-100'
-    }
-    url = url_map.get(index_name.lower())
-    if not url:
-        return []
-
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = await asyncio.to_thread(requests.get, url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        # Use pandas to easily parse the first table on the page
-        df_list = pd.read_html(response.text)
-        
-        # Find the correct table and symbol column
-        for df in df_list:
-            if 'Symbol' in df.columns:
-                # S&P 500 format
-                symbols = df['Symbol'].dropna().unique().tolist()
-                return [str(s).replace('.', '-') for s in symbols]
-            elif 'Ticker' in df.columns:
-                # NASDAQ 100 format
-                symbols = df['Ticker'].dropna().unique().tolist()
-                return [str(s).replace('.', '-') for s in symbols]
-        return []
-    except Exception as e:
-        prometheus_logger.warning(f"Failed to fetch index tickers for '{index_name}': {e}")
-        return []
+    symbols = await get_index_constituents_async(index_name)
+    if not symbols:
+        prometheus_logger.warning(f"Failed to fetch index tickers for '{index_name}'")
+    return symbols
 
 AI_SCREENER_DEFINITIONS = {
     "AI_TECH_GROWTH": {
@@ -314,61 +296,125 @@ async def _get_seed_population(db_path: str, universe: str, condition: str, stra
     return []
 
 # --- NEW: Orchestrator Functions ---
-async def _run_convergence_matrix(prometheus_instance: Prometheus, run_id: int, run_name: str, universe_list: List[str], condition_list: List[str], strategy_list: List[str], db_path: str):
+def _convergence_condition_window(cond: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Maps a market condition name to (period, start_date, end_date) for the optimizer."""
+    if cond == "2022_Bear":
+        return None, "2022-01-01", "2022-12-31"
+    elif cond == "2021_Bull":
+        return None, "2021-01-01", "2021-12-31"
+    elif cond == "2020_Crash":
+        return None, "2020-02-01", "2020-12-31"
+    elif cond == "Current_1Y":
+        return "1y", None, None
+    return cond, None, None # Default: pass the name (e.g. "1y")
+
+
+async def _get_completed_convergence_cells(db_path: str, run_id: int) -> set:
+    """(universe, condition, strategy) cells that already have a checkpointed result for this run."""
+    try:
+        async with aiosqlite.connect(db_path) as db:
+            cursor = await db.execute(
+                "SELECT universe, market_condition, strategy_name FROM convergence_results WHERE run_id = ?",
+                (run_id,)
+            )
+            return {tuple(row) for row in await cursor.fetchall()}
+    except Exception as e:
+        print(f"   [Convergence] Could not read completed cells for run {run_id}: {e}")
+        return set()
+
+
+async def _get_convergence_run(db_path: str, run_id: Optional[int] = None, run_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Looks up a run by id, or the most recent unfinished run with the given name."""
+    try:
+        async with aiosqlite.connect(db_path) as db:
+            db.row_factory = aiosqlite.Row
+            if run_id is not None:
+                cursor = await db.execute("SELECT * FROM convergence_runs WHERE run_id = ?", (run_id,))
+            else:
+                cursor = await db.execute(
+                    "SELECT * FROM convergence_runs WHERE run_name = ? AND status != 'Completed' ORDER BY run_id DESC LIMIT 1",
+                    (run_name,)
+                )
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+    except Exception as e:
+        print(f"   [Convergence] Could not look up convergence run: {e}")
+        return None
+
+
+async def _run_convergence_matrix(prometheus_instance: Prometheus, run_id: int, run_name: str, universe_list: List[str], condition_list: List[str], strategy_list: List[str], db_path: str, max_parallel: int = CONVERGENCE_MAX_PARALLEL):
     """
     Executes the optimization loops for the convergence run.
-    Iterates through every combination of Universe, Market Condition, and Strategy.
+    Every combination of Universe, Market Condition, and Strategy is a cell on a
+    work queue drained by `max_parallel` workers. Each finished cell is
+    checkpointed to convergence_results, so cells already recorded for this
+    run_id are skipped and an interrupted run resumes where it stopped. Cells
+    that fail or find no parameters leave the run 'Partial', so --resume
+    retries them.
     """
     print(f"--- Starting Convergence Run {run_id}: '{run_name}' ---")
-    
-    for uni in universe_list:
-        for cond in condition_list:
-            # --- Date Mapping Logic ---
-            start_date = None
-            end_date = None
-            period_arg = cond # Default: pass the name (e.g. "1y")
-            
-            if cond == "2022_Bear":
-                start_date = "2022-01-01"; end_date = "2022-12-31"; period_arg = None
-            elif cond == "2021_Bull":
-                start_date = "2021-01-01"; end_date = "2021-12-31"; period_arg = None
-            elif cond == "2020_Crash":
-                start_date = "2020-02-01"; end_date = "2020-12-31"; period_arg = None
-            elif cond == "Current_1Y":
-                period_arg = "1y"
-            
-            for strat in strategy_list:
-                print(f"\n>> Testing: {uni} | {cond} | {strat}")
+
+    completed = await _get_completed_convergence_cells(db_path, run_id)
+    cells = list(dict.fromkeys((uni, cond, strat) for uni in universe_list for cond in condition_list for strat in strategy_list))
+    pending = [cell for cell in cells if cell not in completed]
+    if completed:
+        print(f"   -> Resuming: {len(cells) - len(pending)}/{len(cells)} cells already complete.")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for cell in pending:
+        queue.put_nowait(cell)
+    failed = [] # Cells that raised or returned no best_params (not checkpointed)
+
+    async def cell_worker():
+        while True:
+            try:
+                uni, cond, strat = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            period_arg, start_date, end_date = _convergence_condition_window(cond)
+            print(f"\n>> Testing: {uni} | {cond} | {strat}")
+            try:
+                best_params, best_return, metrics = await prometheus_instance.run_parameter_optimization(
+                    command_name="/backtest",
+                    strategy_name=strat,
+                    ticker=uni,
+                    period=period_arg,
+                    start_date=start_date,
+                    end_date=end_date,
+                    generations=CONVERGENCE_GENERATIONS, 
+                    population_size=CONVERGENCE_POPULATION,
+                    write_status=False # Cells run in parallel; progress is tracked in convergence_runs/results
+                )
                 
-                try:
-                    # FIX: Unpack 3 values (params, return, metrics).
-                    # This fixes the "too many values to unpack (expected 2)" error.
-                    best_params, best_return, metrics = await prometheus_instance.run_parameter_optimization(
-                        command_name="/backtest",
-                        strategy_name=strat,
-                        ticker=uni,
-                        period=period_arg,
-                        start_date=start_date,
-                        end_date=end_date,
-                        generations=15, 
-                        population_size=30
+                if best_params:
+                    # Checkpoint the cell
+                    await _save_convergence_result(
+                        db_path=db_path,
+                        run_id=run_id,
+                        universe=uni,
+                        condition=cond,
+                        strategy=strat,
+                        best_params=best_params,
+                        return_pct=best_return,
+                        metrics=metrics
                     )
-                    
-                    if best_params:
-                        # Save result using the helper function
-                        await _save_convergence_result(
-                            db_path=db_path,
-                            run_id=run_id,
-                            universe=uni,
-                            condition=cond,
-                            strategy=strat,
-                            best_params=best_params,
-                            return_pct=best_return,
-                            metrics=metrics
-                        )
-                except Exception as e:
-                    print(f"❌ Error optimizing {strat} on {cond}: {e}")
-                    # traceback.print_exc()
+                else:
+                    failed.append((uni, cond, strat))
+                    print(f"   -> No parameters found for {strat} on {uni} | {cond}.")
+            except Exception as e:
+                failed.append((uni, cond, strat))
+                print(f"❌ Error optimizing {strat} on {cond}: {e}")
+            finally:
+                queue.task_done()
+
+    status = "Interrupted"
+    try:
+        await asyncio.gather(*[cell_worker() for _ in range(max(1, min(max_parallel, len(pending))))])
+        status = "Partial" if failed else "Completed"
+        if failed:
+            print(f"   -> {len(failed)}/{len(cells)} cells failed; resume with --resume to retry them.")
+    finally:
+        await _update_convergence_run_status(db_path, run_id, status)
 
     print(f"\n--- [Convergence Run {run_id}] Finished All Permutations ---")
     
@@ -492,15 +538,18 @@ async def _handle_kronos_convergence(parts: List[str], prometheus_instance: Prom
     Handles the 'convergence' command parsing and execution.
     """
     if len(parts) < 2:
-        print("Usage: convergence <run_name> --universes=... --conditions=... --strategies=...")
+        print("Usage: convergence <run_name> --universes=... --conditions=... --strategies=... [--parallel=N] [--resume[=<run_id>]]")
         return
 
     run_name = parts[1]
+    db_path = prometheus_instance.db_path
     
     # Defaults
     universes = ["SPY"]
     conditions = ["Current_1Y"]
     strategies = ["ma_crossover"]
+    max_parallel = CONVERGENCE_MAX_PARALLEL
+    resume = None # None = new run, "latest" = last unfinished run with this name, or a run_id
     
     # Parse flags
     for part in parts[2:]:
@@ -510,25 +559,58 @@ async def _handle_kronos_convergence(parts: List[str], prometheus_instance: Prom
             conditions = part.split("=")[1].split(",")
         elif part.startswith("--strategies="):
             strategies = part.split("=")[1].split(",")
-
-    print(f"   -> Setup Convergence Run '{run_name}'")
+        elif part.startswith("--parallel="):
+            try: max_parallel = max(1, int(part.split("=")[1]))
+            except ValueError: print(f"   -> Ignoring invalid {part}")
+        elif part == "--resume":
+            resume = "latest"
+        elif part.startswith("--resume="):
+            resume = part.split("=")[1]
+
+    run_id = None
+    if resume is not None:
+        previous = await _get_convergence_run(
+            db_path,
+            run_id=int(resume) if resume.isdigit() else None,
+            run_name=run_name if not resume.isdigit() else None
+        )
+        if not previous:
+            print(f"❌ No resumable convergence run found for '{resume if resume.isdigit() else run_name}'.")
+            return
+        run_id = previous["run_id"]
+        run_name = previous["run_name"]
+        try:
+            saved = json.loads(previous.get("run_parameters_json") or "{}")
+            universes = saved.get("universes", universes)
+            conditions = saved.get("conditions", conditions)
+            strategies = saved.get("strategies", strategies)
+        except json.JSONDecodeError:
+            pass
+        await _update_convergence_run_status(db_path, run_id, "Running")
+
+    print(f"   -> {'Resuming' if run_id else 'Setup'} Convergence Run '{run_name}'")
     print(f"      Universes: {universes}")
     print(f"      Conditions: {conditions}")
     print(f"      Strategies: {strategies}")
-
-    # Generate Run ID (simple timestamp integer)
-    run_id = int(datetime.now().timestamp())
+    print(f"      Parallel Cells: {max_parallel}")
+
+    if run_id is None:
+        run_params_json = json.dumps({"universes": universes, "conditions": conditions, "strategies": strategies})
+        run_id = await _log_convergence_run(db_path, run_name, None, run_params_json)
+        if run_id == -1:
+            # DB unavailable: still run, just without checkpoint/resume support
+            run_id = int(datetime.now().timestamp())
     
     # Execute Matrix
-    # FIX: Argument names now match _run_convergence_matrix definition exactly
     await _run_convergence_matrix(
         prometheus_instance=prometheus_instance,
         run_id=run_id,
         run_name=run_name,
-        universe_list=universes,   # Changed from 'universes' to 'universe_list'
-        condition_list=conditions, # Changed from 'conditions' to 'condition_list'
-        strategy_list=strategies,  # Changed from 'strategies' to 'strategy_list'
-        db_path=prometheus_instance.db_path
+        universe_list=universes,
+        condition_list=conditions,
+        strategy_list=strategies,
+        db_path=db_path,
+        max_parallel=max_parallel
     )
 
 def _load_kronos_config() -> Dict[str, Any]:
@@ -1129,9 +1211,9 @@ async def _handle_kronos_cache(parts: List[str]):
             mod_time = "N/A"
             if os.path.exists(filepath):
                 try:
-                    stats = os.stat(filepath)
-                    size_mb = stats.st_size / (1024 * 1024)
-                    mod_time = datetime.fromtimestamp(stats.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+                    files = [os.path.join(filepath, f) for f in os.listdir(filepath)] if os.path.isdir(filepath) else [filepath]
+                    size_mb = sum(os.path.getsize(f) for f in files) / (1024 * 1024)
+                    mod_time = datetime.fromtimestamp(max([os.stat(f).st_mtime for f in files] or [os.stat(filepath).st_mtime])).strftime('%Y-%m-%d %H:%M:%S')
                     status = "✅ Found"
                 except Exception:
                     status = "⚠️ Error Reading"
@@ -1143,7 +1225,10 @@ async def _handle_kronos_cache(parts: List[str]):
         for name, filepath in cache_files.items():
             if os.path.exists(filepath):
                 try:
-                    os.remove(filepath)
+                    if os.path.isdir(filepath):
+                        shutil.rmtree(filepath)
+                    else:
+                        os.remove(filepath)
                     print(f"   -> ✅ Removed '{name}' cache ({filepath})")
                 except Exception as e:
                     print(f"   -> ❌ Failed to remove '{name}' cache: {e}")
@@ -4,13 +4,10 @@ import os
 import sys
 import csv
 from datetime import datetime
-from io import StringIO
 from typing import List, Dict, Any, Optional
 
 import pandas as pd
 import numpy as np
-import requests
-import yfinance as yf
 import matplotlib
 matplotlib.use('Agg') # Use non-interactive backend
 import matplotlib.pyplot as plt
@@ -36,6 +33,17 @@ except ImportError:
     except ImportError:
          pass # Fail silently, we have local fallbacks
 
+try:
+    from backend.integration.price_store import download_async, history_async, LIVE_MAX_AGE
+    from backend.integration.index_constituents import get_index_constituents
+    from backend.integration.invest_scoring import calculate_ema_invest_batch
+    from backend.integration.result_cache import result_cache
+except ImportError:
+    from integration.price_store import download_async, history_async, LIVE_MAX_AGE
+    from integration.index_constituents import get_index_constituents
+    from integration.invest_scoring import calculate_ema_invest_batch
+    from integration.result_cache import result_cache
+
 # --- Helper Functions ---
 def safe_score(val):
     if val is None: return -float('inf')
@@ -46,33 +54,18 @@ def safe_score(val):
 
 # --- Constants ---
 MARKET_FULL_SENS_DATA_FILE_PREFIX = 'market_full_sens_'
+# (period, interval) per EMA sensitivity for market scans, matching calculate_ema_invest below
+MARKET_HISTORY_WINDOWS = {1: ("max", "1wk"), 2: ("10y", "1d"), 3: ("2y", "1h")}
+MARKET_MAX_STALENESS_DAYS = 10
 
 # --- Helper Functions (copied for self-containment) ---
 
 def get_sp500_symbols_singularity(is_called_by_ai: bool = False) -> List[str]:
-    """Fetches S&P 500 symbols from Wikipedia with retry logic."""
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            sp500_url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(sp500_url, headers=headers, timeout=15)
-            response.raise_for_status()
-            dfs = pd.read_html(StringIO(response.text))
-            if not dfs: return []
-            sp500_df = dfs[0]
-            if 'Symbol' not in sp500_df.columns: return []
-            symbols = [str(s).replace('.', '-') for s in sp500_df['Symbol'].tolist() if isinstance(s, str)]
-            results = sorted(list(set(s for s in symbols if s)))
-            if results: return results
-        except Exception as e:
-            if attempt < max_retries - 1:
-                import time
-                time.sleep(2 ** attempt)  # Exponential backoff: 1s, 2s, 4s
-            else:
-                print(f"Failed to fetch S&P 500 symbols after {max_retries} attempts: {e}")
-                return []
-    return []
+    """S&P 500 symbols from the shared, daily-refreshed constituents cache."""
+    symbols = get_index_constituents('sp500')
+    if not symbols and not is_called_by_ai:
+        print("Failed to fetch S&P 500 symbols.")
+    return symbols
 
 def screen_custom_market_stocks(market_cap_min: float, avg_vol_min: float) -> List[str]:
     """
@@ -112,14 +105,13 @@ def safe_score(value: Any) -> float:
 
 async def calculate_ema_invest(ticker: str, ema_interval: int, is_called_by_ai: bool = False) -> tuple[Optional[float], Optional[float]]:
     """Calculates the INVEST score for a ticker based on EMA sensitivity with retries."""
-    stock = yf.Ticker(ticker.replace('.', '-'))
-    interval_map = {1: "1wk", 2: "1d", 3: "1h"}
-    period_map = {1: "max", 2: "10y", 3: "2y"}
+    symbol = ticker.replace('.', '-')
+    period, interval = MARKET_HISTORY_WINDOWS.get(ema_interval, ("2y", "1h"))
     
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            data = await asyncio.to_thread(stock.history, period=period_map.get(ema_interval, "2y"), interval=interval_map.get(ema_interval, "1h"))
+            data = await history_async(symbol, period=period, interval=interval, max_age=LIVE_MAX_AGE)
             if not data.empty and 'Close' in data.columns:
                  # Success
                  break
@@ -142,7 +134,7 @@ async def calculate_ema_invest(ticker: str, ema_interval: int, is_called_by_ai:
              import datetime
              # Use naive comparison if tz-aware
              now = datetime.datetime.now(last_date.tzinfo) if last_date.tzinfo else datetime.datetime.now()
-             if (now - last_date).days > 10:
+             if (now - last_date).days > MARKET_MAX_STALENESS_DAYS:
                   return None, None
     
         data['EMA_8'] = data['Close'].ewm(span=8, adjust=False).mean()
@@ -246,54 +238,36 @@ def process_market_chart_data(top_tickers: List[str], bot_tickers: List[str], df
         return {}
 
 async def calculate_market_invest_scores_singularity(tickers: List[str], ema_sens: int, progress_callback: Optional[Any] = None) -> List[Dict[str, Any]]:
-    """Calculates INVEST scores for a list of tickers in parallel."""
-    result_data_market = []
+    """
+    Calculates INVEST scores for a list of tickers from one universe-wide data
+    load, scoring the whole close matrix at once. Scores are shared through the
+    result cache until the next refresh of the sensitivity's bar interval.
+    """
     total_tickers = len(tickers)
     print(f"\nCalculating Invest scores for {total_tickers} market tickers (Sensitivity: {ema_sens})...")
-    
-    # Granular Progress Tracking
-    processed_count = 0
-    progress_lock = asyncio.Lock()
-    
-    async def process_ticker(ticker: str):
-        nonlocal processed_count
-        res_item = await calculate_ema_invest(ticker, ema_sens, is_called_by_ai=True)
-        
-        async with progress_lock:
-             processed_count += 1
-             # Report every 5 tickers or last one to reduce noise
-             if progress_callback and (processed_count % 5 == 0 or processed_count == total_tickers):
-                 await progress_callback(f"Scanning market... ({processed_count}/{total_tickers})")
-                 
-        return ticker, res_item
+    if progress_callback:
+        await progress_callback(f"Loading market data... (0/{total_tickers})")
 
-    # Process in chunks to respect overall load but gather results flexibly
-    chunk_size = 50 # Larger chunk size since we have semaphore inside invest_command
-    
-    for i in range(0, total_tickers, chunk_size):
-        chunk = tickers[i:i + chunk_size]
-        tasks = [process_ticker(t) for t in chunk]
-        
-        results_chunk = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        for res in results_chunk:
-            if isinstance(res, Exception): # Should be rare as process_ticker swallows usually
-                 continue
-            if not isinstance(res, tuple) or len(res) != 2: continue
-            
-            ticker_processed, res_item = res
-            
-            if isinstance(res_item, Exception): # From calculate_ema_invest exception
-                 # result_data_market.append(...) # Logic to handle error if needed
-                 pass 
-            elif res_item:
-                 if res_item[0] is not None or res_item[1] is not None:
-                     # Check if exception inside tuple logic of calculate_ema_invest? 
-                     # calculate_ema_invest returns (live_price, score) or (None, None)
-                     live_price, score = res_item
-                     result_data_market.append({'ticker': ticker_processed, 'live_price': live_price, 'score': score})
-        
-        print(f"  ...market scores calculated for {processed_count}/{total_tickers} tickers.")
+    try:
+        scores = await result_cache.get_or_compute(
+            'market_scores', (sorted(tickers), ema_sens),
+            lambda: calculate_ema_invest_batch(
+                tickers, ema_sens, windows=MARKET_HISTORY_WINDOWS, max_staleness_days=MARKET_MAX_STALENESS_DAYS
+            ),
+            interval=MARKET_HISTORY_WINDOWS.get(ema_sens, MARKET_HISTORY_WINDOWS[3])[1],
+            tickers=tickers, cacheable=bool
+        )
+    except Exception as e:
+        print(f"  ...batch scoring failed ({type(e).__name__}: {e}).")
+        scores = {}
+
+    result_data_market = [
+        {'ticker': ticker, 'live_price': scores[ticker][0], 'score': scores[ticker][1]}
+        for ticker in tickers if ticker in scores
+    ]
+    if progress_callback:
+        await progress_callback(f"Scanning market... ({total_tickers}/{total_tickers})")
+    print(f"  ...market scores calculated for {len(result_data_market)}/{total_tickers} tickers.")
 
     result_data_market.sort(key=lambda x: safe_score(x.get('score', -float('inf'))), reverse=True)
     print("Finished calculating all market scores.")
@@ -343,9 +317,8 @@ async def run_market_analysis(market_type: str, sensitivity: int, progress_callb
         period = period_map.get(sensitivity, '1y')
         
         hist_data = await asyncio.wait_for(
-            asyncio.to_thread(
-                yf.download, 
-                tickers=all_chart_tickers, 
+            download_async(
+                all_chart_tickers, 
                 period=period, 
                 interval='1d', 
                 progress=False, 
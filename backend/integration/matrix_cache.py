@@ -0,0 +1,165 @@
+# matrix_cache.py
+# Append-only columnar cache for wide (field x ticker) daily price matrices, as
+# returned by yf.download for a whole universe. Each append (a chunk of new
+# tickers, or the latest bars for existing ones) is written as its own .npz
+# segment, so nothing already on disk is rewritten; loading stitches the
+# segments back into one typed MultiIndex frame, later segments winning where
+# they overlap. Segments are compacted into one file once they pile up.
+import os
+import glob
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# --- Constants ---
+MAX_SEGMENTS = 32
+SEGMENT_PATTERN = 'segment_*.npz'
+TEMP_PREFIX = '.tmp_segment_' # Outside SEGMENT_PATTERN, so a leftover temp file is never read as a segment
+
+matrix_cache_logger = logging.getLogger('MATRIX_CACHE')
+
+# One lock per directory, shared by every MatrixCache opened on it
+_directory_locks: Dict[str, threading.Lock] = {}
+_directory_locks_guard = threading.Lock()
+
+
+def _directory_lock(directory: str) -> threading.Lock:
+    key = os.path.abspath(directory)
+    with _directory_locks_guard:
+        return _directory_locks.setdefault(key, threading.Lock())
+
+
+def _segment_number(path: str) -> Optional[int]:
+    """N of 'segment_N.npz', or None for anything else matching the glob."""
+    name = os.path.basename(path)
+    try:
+        return int(name[len('segment_'):-len('.npz')])
+    except ValueError:
+        return None
+
+
+class MatrixCache:
+    """
+    Segment store for a yf.download-shaped frame (columns: ('Price', 'Ticker')
+    MultiIndex, DatetimeIndex rows). All values are stored as float64.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = _directory_lock(directory)
+
+    # --- Segment I/O ---
+    def _segment_paths(self) -> List[str]:
+        """Segment files in write order; names whose number does not parse are skipped."""
+        numbered = [(n, p) for p in glob.glob(os.path.join(self.directory, SEGMENT_PATTERN))
+                    if (n := _segment_number(p)) is not None]
+        return [p for _, p in sorted(numbered)]
+
+    def _next_segment_path(self, paths: List[str]) -> str:
+        last = _segment_number(paths[-1]) if paths else 0
+        return os.path.join(self.directory, f"segment_{last + 1:06d}.npz")
+
+    @staticmethod
+    def _write_segment(path: str, frame: pd.DataFrame) -> None:
+        fields = list(dict.fromkeys(frame.columns.get_level_values(0)))
+        tickers = list(dict.fromkeys(frame.columns.get_level_values(1)))
+        full_columns = pd.MultiIndex.from_product([fields, tickers])
+        values = frame.reindex(columns=full_columns).to_numpy(dtype=np.float64)
+        index = pd.DatetimeIndex(frame.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        tmp_path = os.path.join(os.path.dirname(path), f"{TEMP_PREFIX}{os.path.basename(path)[len('segment_'):-len('.npz')]}.{os.getpid()}.npz")
+        np.savez(
+            tmp_path,
+            index=index.as_unit('ns').asi8,
+            fields=np.array(fields, dtype=str),
+            tickers=np.array(tickers, dtype=str),
+            values=values.reshape(len(index), len(fields), len(tickers)),
+        )
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_segment(path: str):
+        with np.load(path, allow_pickle=False) as seg:
+            return seg['index'], seg['fields'].tolist(), seg['tickers'].tolist(), seg['values']
+
+    # --- Public API ---
+    def exists(self) -> bool:
+        return bool(self._segment_paths())
+
+    def append(self, frame: pd.DataFrame) -> None:
+        """Persists `frame` (new tickers and/or new bars) as a new segment."""
+        if frame is None or frame.empty or not isinstance(frame.columns, pd.MultiIndex):
+            return
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            paths = self._segment_paths()
+            self._write_segment(self._next_segment_path(paths), frame)
+            if len(paths) + 1 > MAX_SEGMENTS:
+                self._compact()
+
+    def load(self) -> pd.DataFrame:
+        """Returns the merged frame (empty DataFrame if nothing is cached)."""
+        with self._lock:
+            return self._load_unlocked()
+
+    def _load_unlocked(self) -> pd.DataFrame:
+        segments = []
+        for path in self._segment_paths():
+            try:
+                segments.append(self._read_segment(path))
+            except Exception as e:
+                matrix_cache_logger.warning(f"Skipping unreadable cache segment {path}: {e}")
+        if not segments:
+            return pd.DataFrame()
+
+        all_index = np.unique(np.concatenate([seg[0] for seg in segments]))
+        fields = list(dict.fromkeys(f for seg in segments for f in seg[1]))
+        tickers = list(dict.fromkeys(t for seg in segments for t in seg[2]))
+        field_pos = {f: i for i, f in enumerate(fields)}
+        ticker_pos = {t: i for i, t in enumerate(tickers)}
+
+        merged = np.full((len(all_index), len(fields), len(tickers)), np.nan)
+        for index, seg_fields, seg_tickers, values in segments:
+            rows = np.searchsorted(all_index, index)
+            f_idx = np.array([field_pos[f] for f in seg_fields])
+            t_idx = np.array([ticker_pos[t] for t in seg_tickers])
+            block = merged[rows[:, None, None], f_idx[None, :, None], t_idx[None, None, :]]
+            # Later segments win, but a NaN in a newer segment doesn't erase known data
+            merged[rows[:, None, None], f_idx[None, :, None], t_idx[None, None, :]] = np.where(np.isnan(values), block, values)
+
+        columns = pd.MultiIndex.from_product([fields, tickers], names=['Price', 'Ticker'])
+        index = pd.DatetimeIndex(pd.to_datetime(all_index, unit='ns'), name='Date')
+        return pd.DataFrame(merged.reshape(len(all_index), len(fields) * len(tickers)), index=index, columns=columns)
+
+    def _compact(self) -> None:
+        paths = self._segment_paths()
+        merged = self._load_unlocked()
+        if merged.empty:
+            return
+        self._write_segment(self._next_segment_path(paths), merged)
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        matrix_cache_logger.info(f"Compacted {len(paths)} segments in {self.directory}")
+
+    def compact(self) -> None:
+        with self._lock:
+            self._compact()
+
+    def last_date(self) -> Optional[pd.Timestamp]:
+        data = self.load()
+        return data.index.max() if not data.empty else None
+
+    def size_bytes(self) -> int:
+        return sum(os.path.getsize(p) for p in self._segment_paths())
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in self._segment_paths():
+                os.remove(path)
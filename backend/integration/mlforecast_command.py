@@ -6,11 +6,9 @@ import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from tabulate import tabulate
 # Set non-interactive backend for server environments
 plt.switch_backend('Agg')
@@ -21,6 +19,15 @@ except ImportError:
         from usage_counter import increment_usage
     except ImportError:
         def increment_usage(*args): pass
+from backend.integration.price_store import history_async
+from backend.integration.forecast_models import forecast_model_cache, feature_matrix_cache
+
+# --- Constants ---
+FORECAST_FEATURES = ['RSI', 'MACD', 'MACD_Signal', 'SMA_Diff', 'Volatility']
+FORECAST_PATH_COUNT = 1000              # Simulated paths behind the forecast confidence band
+FORECAST_BAND_PERCENTILES = (10, 90)
+FORECAST_PATH_SEED = 42
+FORECAST_NOISE_DAMPING = 0.3            # Path noise as a fraction of historical daily volatility
 
 # --- Helper Function 1: Technical Indicators (from Singularity) ---
 def calculate_technical_indicators(data: pd.DataFrame, freq: str = 'D') -> pd.DataFrame:
@@ -71,6 +78,57 @@ def calculate_technical_indicators(data: pd.DataFrame, freq: str = 'D') -> pd.Da
         # Return original dataframe if indicators fail, allowing downstream to handle missing columns
         return data
 
+def build_feature_matrix(data: pd.DataFrame, freq: str = 'D') -> pd.DataFrame:
+    """Close plus the indicator columns for one data snapshot, shared by every horizon trained on it."""
+    return calculate_technical_indicators(data[['Close']].copy(), freq=freq)
+
+def attach_horizon_labels(feature_matrix: pd.DataFrame, horizon: int):
+    """
+    (X, direction, pct_change) for one horizon: the shared features restricted
+    to rows with complete indicators and a known close `horizon` bars ahead.
+    """
+    close = feature_matrix['Close']
+    future_close = close.shift(-horizon)
+    pct_change = (future_close - close) / close
+    direction = (future_close > close).astype(int)
+    valid = feature_matrix[FORECAST_FEATURES].notna().all(axis=1) & pct_change.notna()
+    return feature_matrix.loc[valid, FORECAST_FEATURES], direction[valid], pct_change[valid]
+
+def simulate_forecast_paths(key_points: Dict[Any, float], daily_volatility: float, n_paths: int = FORECAST_PATH_COUNT, seed: int = FORECAST_PATH_SEED):
+    """
+    Daily price paths through the forecast anchors as (paths x days) arrays.
+
+    Between consecutive anchors each path follows the log-linear interpolation
+    times (1 + cumulative noise), where the damped noise is re-centred so it sums
+    to zero over the segment. Row 0 uses the seeded draws of the single legacy
+    path; the other rows come from their own generator. As before, dates
+    strictly inside each segment are returned (anchors themselves are not).
+    """
+    sorted_dates = sorted(key_points.keys())
+    sigma = daily_volatility * FORECAST_NOISE_DAMPING
+    rng = np.random.default_rng(seed=seed)
+    extra_rng = np.random.default_rng(seed=seed + 1)
+    all_dates, segments = [], []
+    for start_date, end_date in zip(sorted_dates[:-1], sorted_dates[1:]):
+        start_price, end_price = key_points[start_date], key_points[end_date]
+        days_diff = (end_date - start_date).days
+        if days_diff <= 0:
+            continue
+        growth_rate = 0 if start_price <= 0 or end_price <= 0 else np.log(end_price / start_price) / days_diff
+
+        noise = np.empty((max(n_paths, 1), days_diff))
+        noise[0] = rng.normal(0, sigma, days_diff)
+        noise[1:] = extra_rng.normal(0, sigma, (len(noise) - 1, days_diff))
+        noise -= np.cumsum(noise, axis=1)[:, -1:] / days_diff # Drift correction: hit the next anchor exactly
+
+        steps = np.arange(1, days_diff)
+        base = start_price * np.exp(growth_rate * steps)
+        segments.append(np.maximum(base * (1 + np.cumsum(noise, axis=1)[:, 1:]), 0.01))
+        all_dates.extend(start_date + pd.Timedelta(days=int(day)) for day in steps)
+
+    paths = np.concatenate(segments, axis=1) if segments else np.empty((max(n_paths, 1), 0))
+    return all_dates, paths
+
 # --- Helper Function 2: Graph Plotting (from Singularity) ---
 def plot_advanced_forecast_graph(ticker, historical_data, forecast_points, weekly_forecast_points=None):
     """
@@ -249,15 +307,12 @@ async def _run_single_forecast_impl(ticker: str, is_called_by_ai: bool, ai_param
             
             for attempt in range(3):
                 try:
-                    # Retry logic with exponential backoff
-                    await asyncio.sleep(0.5 * (attempt + 1))
+                    # Back off between retries; upstream pacing is done by the shared rate limiter
+                    if attempt:
+                        await asyncio.sleep(0.5 * attempt)
                     
-                    # Use Ticker object for better isolation than yf.download
-                    ticker_obj = yf.Ticker(ticker)
-
-                    temp_data = await asyncio.to_thread(
-                        ticker_obj.history, period=period_str, auto_adjust=True
-                    )
+                    # Shared price store; concurrent requests for the same ticker share one fetch
+                    temp_data = await history_async(ticker, period=period_str, interval="1d", auto_adjust=True)
                     
                     if not temp_data.empty and len(temp_data) > 504: # Need > 2 years of data for 1-year forecast
                         data_daily = temp_data
@@ -309,40 +364,39 @@ async def _run_single_forecast_impl(ticker: str, is_called_by_ai: bool, ai_param
         last_price = data_daily['Close'].iloc[-1]
         true_last_date = data_daily.index[-1]
 
-        # 2. Generate Key Forecasts
+        # 2. Generate Key Forecasts (training runs off the event loop; horizons train side by side)
+        training_sets, feature_matrices = [], {}
         for period_name, params in forecast_horizons_to_run.items():
             if not is_called_by_ai: print(f"\n-> Processing {period_name} forecast...")
-            horizon, data = params["days"], params["data"].copy()
+            horizon = params["days"]
             
             # --- FIX: Determine frequency and pass to indicator function ---
             freq_unit = 'W' if params["data"] is data_weekly else 'D'
-            data = calculate_technical_indicators(data, freq=freq_unit)
             # --- END FIX ---
-
-            features = ['RSI', 'MACD', 'MACD_Signal', 'SMA_Diff', 'Volatility']
-            
-            if not all(feature in data.columns and not data[feature].isnull().all() for feature in features):
+            # Indicators are built once per frequency and snapshot; each horizon only adds its labels
+            if freq_unit not in feature_matrices:
+                feature_matrices[freq_unit] = feature_matrix_cache.get_or_build(
+                    ticker, freq_unit, params["data"]['Close'],
+                    lambda: build_feature_matrix(params["data"], freq_unit))
+            feature_matrix = feature_matrices[freq_unit]
+
+            if not all(feature in feature_matrix.columns and not feature_matrix[feature].isnull().all() for feature in FORECAST_FEATURES):
                 if not is_called_by_ai: print(f"   -> Skipping {period_name}: Missing one or more required technical indicators.")
                 continue
 
-            data['Future_Close'] = data['Close'].shift(-horizon)
-            data['Pct_Change'] = (data['Future_Close'] - data['Close']) / data['Close']
-            data['Direction'] = (data['Future_Close'] > data['Close']).astype(int)
-            data.dropna(subset=features + ['Direction', 'Pct_Change'], inplace=True)
+            X, y_direction, y_magnitude = attach_horizon_labels(feature_matrix, horizon)
 
-            if len(data) < 50:
-                if not is_called_by_ai: print(f"   -> Skipping {period_name}: Not enough training data ({len(data)} rows).")
+            if len(X) < 50:
+                if not is_called_by_ai: print(f"   -> Skipping {period_name}: Not enough training data ({len(X)} rows).")
                 continue
 
-            X, y_direction, y_magnitude = data[features], data['Direction'], data['Pct_Change']
-            clf = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1).fit(X, y_direction)
-            reg = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1).fit(X, y_magnitude)
-            
-            last_features = X.iloc[-1:]
-            direction_pred = clf.predict(last_features)[0]
-            confidence = clf.predict_proba(last_features)[0][direction_pred] * 100
-            magnitude_pred = reg.predict(last_features)[0] * 100
-            
+            training_sets.append((period_name, horizon, freq_unit, X, y_direction, y_magnitude, params["data"]['Close']))
+
+        horizon_forecasts = await asyncio.gather(*[
+            forecast_model_cache.forecast(ticker, period_name, X, y_direction, y_magnitude, close)
+            for period_name, _, _, X, y_direction, y_magnitude, close in training_sets
+        ])
+        for (period_name, horizon, freq_unit, *_), (direction_pred, confidence, magnitude_pred) in zip(training_sets, horizon_forecasts):
             results.append({"Ticker": ticker, "Period": period_name, "Prediction": "UP" if direction_pred == 1 else "DOWN", "Confidence": f"{confidence:.0f}%", "Est. % Change": f"{magnitude_pred:+.2f}%"})
             
             # Use the freq_unit variable defined above
@@ -368,65 +422,16 @@ async def _run_single_forecast_impl(ticker: str, is_called_by_ai: bool, ai_param
             key_points[pt['date']] = pt['price']
             
         sorted_dates = sorted(key_points.keys())
-        adjusted_weekly_path = []
-        
-        # Use a seeded random generator for reproducibility
-        rng = np.random.default_rng(seed=42)
-        
-        # Interpolate between each segment with daily resolution
-        for i in range(len(sorted_dates) - 1):
-            start_date = sorted_dates[i]
-            end_date = sorted_dates[i+1]
-            start_price = key_points[start_date]
-            end_price = key_points[end_date]
-            
-            days_diff = (end_date - start_date).days
-            if days_diff <= 0: continue
-            
-            # Calculate daily log return for this segment
-            if start_price <= 0 or end_price <= 0:
-                growth_rate = 0
-            else:
-                growth_rate = np.log(end_price / start_price) / days_diff
-            
-            # Generate daily points with controlled noise
-            # Noise should sum to zero over the segment to hit the target exactly
-            segment_noise = rng.normal(0, hist_volatility * 0.3, days_diff)  # Damped volatility
-            # Adjust noise to ensure we hit the end target (drift correction)
-            cumulative_noise = np.cumsum(segment_noise)
-            if len(cumulative_noise) > 0:
-                correction = cumulative_noise[-1] / days_diff
-                segment_noise = segment_noise - correction
-            
-            current_sim_date = start_date
-            day_idx = 0
-            cumulative_noise_effect = 0
-            
-            while current_sim_date < end_date:
-                dt = (current_sim_date - start_date).days
-                
-                # Base interpolated price
-                base_price = start_price * np.exp(growth_rate * dt)
-                
-                # Add accumulated noise effect (makes the path wavy but still reaches target)
-                if day_idx < len(segment_noise):
-                    cumulative_noise_effect += segment_noise[day_idx]
-                
-                noisy_price = base_price * (1 + cumulative_noise_effect)
-                
-                # Add point (skip start to avoid dupes)
-                if current_sim_date > start_date:
-                    adjusted_weekly_path.append({
-                        'date': current_sim_date, 
-                        'price': max(noisy_price, 0.01)  # Ensure positive price
-                    })
-                
-                # Daily resolution
-                current_sim_date += pd.Timedelta(days=1)
-                day_idx += 1
-                
+        path_dates, paths = simulate_forecast_paths(key_points, hist_volatility, n_paths=FORECAST_PATH_COUNT)
+
+        # Path 0 is the displayed path; the rest only feed the confidence band
+        adjusted_weekly_path = [{'date': d, 'price': float(p)} for d, p in zip(path_dates, paths[0])]
+        band_low, band_high = np.percentile(paths, FORECAST_BAND_PERCENTILES, axis=0) if len(path_dates) else ([], [])
+        forecast_band = [{'date': d, 'low': float(lo), 'high': float(hi)} for d, lo, hi in zip(path_dates, band_low, band_high)]
+
         # Add final point exactly
         adjusted_weekly_path.append({'date': sorted_dates[-1], 'price': key_points[sorted_dates[-1]]})
+        forecast_band.append({'date': sorted_dates[-1], 'low': float(key_points[sorted_dates[-1]]), 'high': float(key_points[sorted_dates[-1]])})
         if not is_called_by_ai: print(f"   -> Generated {len(adjusted_weekly_path)} forecast points.")
 
         # 5. Output Final Results
@@ -473,13 +478,16 @@ async def _run_single_forecast_impl(ticker: str, is_called_by_ai: bool, ai_param
                         "label": f"Target {idx+1}" # Simple label
                     })
 
+                chart_band = [{"date": pt['date'].isoformat(), "low": pt['low'], "high": pt['high']} for pt in forecast_band]
+
                 return {
                     "table": results, 
                     "graph": graph_filename,
                     "chart_data": {
                         "historical": chart_data_hist,
                         "forecast": chart_data_forecast,
-                        "anchors": chart_anchors
+                        "anchors": chart_anchors,
+                        "band": chart_band
                     }
                 }
         else:
@@ -163,9 +163,77 @@ async def _save_nexus_config(config_data: Dict[str, Any]):
     except Exception as e:
         print(f"Error saving nexus config: {e}")
 
-async def _resolve_nexus_component(comp_type: str, comp_value: str, allocated_value: float, parent_path: str, allow_fractional: bool = True, pre_calculated_data: Any = None, progress_callback=None) -> List[Dict[str, Any]]:
+class _NexusResolution:
+    """
+    Per-request memo for Nexus resolution. Command components (Market, Breakout,
+    Cultivate) and live price lookups are started once as shared tasks, and
+    every component that needs one awaits the same task.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Tuple, asyncio.Future] = {}
+
+    def _shared(self, key: Tuple, factory) -> asyncio.Future:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+        return task
+
+    def start_commands(self, nexus_config: Dict[str, Any]) -> None:
+        """
+        Kicks off the weight-independent command components so they overlap with
+        everything else. Like process_nexus_portfolio, zero-weight components are
+        skipped unless no component has a weight.
+        """
+        num_components = int(nexus_config.get('num_components', 0))
+        weights = {i: safe_float(nexus_config.get(f'component_{i}_weight', 0)) for i in range(1, num_components + 1)}
+        weighted = sum(weights.values()) > 0
+        for i in range(1, num_components + 1):
+            if str(nexus_config.get(f'component_{i}_type', '')).lower() != 'command':
+                continue
+            if weighted and weights[i] <= 0:
+                continue
+            c_value = str(nexus_config.get(f'component_{i}_value', '')).lower()
+            if "market" in c_value:
+                self.market_tickers()
+            elif "breakout" in c_value:
+                self.breakout()
+
+    def market_tickers(self) -> asyncio.Future:
+        async def run():
+            sp500 = await asyncio.to_thread(get_sp500_symbols_singularity)
+            if not sp500:
+                return []
+            scores = await calculate_market_invest_scores_singularity(sp500, 2)
+            valid_scores = [s for s in scores if s.get('score') is not None]
+            return [s['ticker'] for s in valid_scores[:10]]
+        return self._shared(('market',), run)
+
+    def breakout(self) -> asyncio.Future:
+        return self._shared(('breakout',), lambda: run_breakout_analysis_singularity(is_called_by_ai=True, include_charts=False))
+
+    def cultivate(self, code: str, portfolio_value: float, frac_shares: bool) -> asyncio.Future:
+        # Cultivate tailors to the allocated value, so only identical components can share a run
+        return self._shared(('cultivate', code, round(portfolio_value, 2), frac_shares), lambda: run_cultivate_analysis_singularity(
+            portfolio_value=portfolio_value, frac_shares=frac_shares, cultivate_code_str=code, is_called_by_ai=True))
+
+    async def prices(self, tickers: List[str]) -> List[Any]:
+        tasks = [self._shared(('price', t), lambda t=t: calculate_ema_invest(t, 2, is_called_by_ai=True)) for t in tickers]
+        return await asyncio.gather(*tasks)
+
+    def close(self) -> None:
+        """Cancels shared work no component ended up needing (e.g. a zero-weight Market)."""
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception() # Mark failures as retrieved
+
+async def _resolve_nexus_component(comp_type: str, comp_value: str, allocated_value: float, parent_path: str, allow_fractional: bool = True, pre_calculated_data: Any = None, progress_callback=None, resolution: Optional[_NexusResolution] = None) -> List[Dict[str, Any]]:
     print(f"[DEBUG NEXUS] Resolving Component: Type={comp_type}, Value={comp_value}, Alloc=${allocated_value:.2f}, Frac={allow_fractional}")
     holdings = []
+    resolution = resolution or _NexusResolution()
     try:
         if comp_type.lower() == 'portfolio':
             sub_config = await load_portfolio_config(comp_value)
@@ -253,13 +321,8 @@ async def _resolve_nexus_component(comp_type: str, comp_value: str, allocated_va
             if "market" in comp_val_lower:
                 print("[DEBUG NEXUS] Resolving 'Market' command...")
                 if progress_callback: await progress_callback(f"  - Scanning Top Market Candidates...")
-                sp500 = await asyncio.to_thread(get_sp500_symbols_singularity)
-                if sp500:
-                    if progress_callback: await progress_callback(f"  - Scoring {len(sp500)} Tickers...")
-                    scores = await calculate_market_invest_scores_singularity(sp500, 2)
-                    valid_scores = [s for s in scores if s.get('score') is not None]
-                    tickers = [s['ticker'] for s in valid_scores[:10]]
-                    print(f"[DEBUG NEXUS] Market generated {len(tickers)} tickers")
+                tickers = list(await resolution.market_tickers())
+                print(f"[DEBUG NEXUS] Market generated {len(tickers)} tickers")
             
             elif "breakout" in comp_val_lower:
                 print("[DEBUG NEXUS] Resolving 'Breakout' command...")
@@ -269,7 +332,7 @@ async def _resolve_nexus_component(comp_type: str, comp_value: str, allocated_va
                     res = pre_calculated_data
                 else:
                     if progress_callback: await progress_callback("  - Running Breakout Analysis...")
-                    res = await run_breakout_analysis_singularity(is_called_by_ai=True)
+                    res = await resolution.breakout()
                 
                 if isinstance(res, dict) and res.get('status') == 'success':
                     # Fix: Handle potential key differences
@@ -293,12 +356,7 @@ async def _resolve_nexus_component(comp_type: str, comp_value: str, allocated_va
                 code = code_raw
                 # Cultivate logic
                 if progress_callback: await progress_callback(f"  - Running Cultivate Strategy ({code})...")
-                cult_res = await run_cultivate_analysis_singularity(
-                    portfolio_value=allocated_value, 
-                    frac_shares=allow_fractional, 
-                    cultivate_code_str=code, 
-                    is_called_by_ai=True
-                )
+                cult_res = await resolution.cultivate(code, allocated_value, allow_fractional)
                 tailored = []
                 if isinstance(cult_res, (list, tuple)):
                     for item in cult_res:
@@ -332,8 +390,7 @@ async def _resolve_nexus_component(comp_type: str, comp_value: str, allocated_va
             if tickers:
                 weight_per_stock = allocated_value / len(tickers)
                 print(f"[DEBUG NEXUS] Allocating ${weight_per_stock:.2f} to top tickers: {tickers}")
-                tasks = [calculate_ema_invest(t, 2, is_called_by_ai=True) for t in tickers]
-                prices = await asyncio.gather(*tasks)
+                prices = await resolution.prices(tickers)
                 
                 for i, t in enumerate(tickers):
                     price_info = prices[i]
@@ -382,11 +439,15 @@ async def process_nexus_portfolio(nexus_config, total_value, nexus_code, ai_para
     
     breakout_cache = {}
 
+    # Shared per-request results; Market/Breakout start now and overlap with the breakout pre-scan
+    resolution = _NexusResolution()
+    resolution.start_commands(nexus_config)
+
     if breakout_indices:
         print(f"[DEBUG NEXUS] Found Breakout Components at indices: {breakout_indices}. Checking for tickers...")
         # Run Breakout Once
         try:
-            bk_res = await run_breakout_analysis_singularity(is_called_by_ai=True)
+            bk_res = await resolution.breakout()
             bk_list = bk_res.get('current_breakout_stocks', []) if isinstance(bk_res, dict) else []
             
             if not bk_list:
@@ -436,8 +497,8 @@ async def process_nexus_portfolio(nexus_config, total_value, nexus_code, ai_para
         auto_weight = 100.0 / num_components
         print(f"[DEBUG NEXUS] Warning: Total Weight is 0. Auto-balancing to {auto_weight:.2f}% each.")
 
+    component_jobs = []
     for i in range(1, num_components + 1):
-        if progress_callback: await progress_callback(f"Resolving Component {i}/{num_components}...")
         c_type = nexus_config.get(f'component_{i}_type')
         c_value = nexus_config.get(f'component_{i}_value')
         c_weight = float(nexus_config.get(f'component_{i}_weight', 0))
@@ -457,8 +518,15 @@ async def process_nexus_portfolio(nexus_config, total_value, nexus_code, ai_para
             if 'data' in breakout_cache:
                 pre_calc = breakout_cache['data']
         
-        res = await _resolve_nexus_component(c_type, c_value, alloc, nexus_code, allow_fractional, pre_calculated_data=pre_calc, progress_callback=progress_callback)
-        if res: all_holdings.extend(res)
+        component_jobs.append(_resolve_nexus_component(c_type, c_value, alloc, nexus_code, allow_fractional, pre_calculated_data=pre_calc, progress_callback=progress_callback, resolution=resolution))
+
+    # Components are independent once weights are fixed: resolve them concurrently, merge in config order
+    if progress_callback: await progress_callback(f"Resolving {len(component_jobs)} Components...")
+    try:
+        for res in await asyncio.gather(*component_jobs):
+            if res: all_holdings.extend(res)
+    finally:
+        resolution.close()
 
     # Aggregation
     if progress_callback: await progress_callback("Aggregating Holdings & Optimizing...")
@@ -900,6 +968,27 @@ async def fetch_nexus_tickers(nexus_code: str) -> List[str]:
     
     # Cache to prevent infinite recursion
     visited_codes = set()
+    # Config lookups are shared: an item referenced from several places is looked up once
+    config_lookups: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    def _lookup(kind: str, code: str) -> asyncio.Future:
+        key = (kind, code.strip().lower())
+        if key not in config_lookups:
+            loader = load_portfolio_config if kind == 'custom' else _load_nexus_config
+            config_lookups[key] = asyncio.ensure_future(loader(code))
+        return config_lookups[key]
+
+    async def _classify_item(item: str, depth: int):
+        # A quick heuristic: try to load it. If it loads, it's a portfolio; otherwise assume a ticker.
+        try:
+            sub_cfg = await _lookup('custom', item)
+        except Exception:
+            sub_cfg = None
+        if sub_cfg:
+            print(f"[DEBUG IMPORT] '{item}' is a sub-portfolio. Recursing...")
+            await _recursive_fetch(item, depth + 1)
+        elif len(item) <= 5 and item.isalpha():
+            unique_tickers.add(item)
 
     async def _recursive_fetch(code: str, depth: int = 0):
         if depth > 5: return 
@@ -909,7 +998,7 @@ async def fetch_nexus_tickers(nexus_code: str) -> List[str]:
 
         # 1. Try Custom Portfolio Config (DB CSV) - PRIORITIZED
         try:
-            custom_cfg = await load_portfolio_config(code_clean)
+            custom_cfg = await _lookup('custom', code_clean)
             if custom_cfg:
                 print(f"[DEBUG IMPORT] Found Custom Config for '{code}'")
                 try:
@@ -918,31 +1007,12 @@ async def fetch_nexus_tickers(nexus_code: str) -> List[str]:
                 except (ValueError, TypeError):
                     num_subs = 0
                 
-                # Iterate through all ticker fields
+                # Items of every sub-portfolio are independent: resolve them concurrently
+                items = []
                 for i in range(1, num_subs + 1):
                     t_str = str(custom_cfg.get(f'tickers_{i}', '')).upper()
-                    if not t_str: continue
-                    
-                    # Split into individual items
-                    items = [t.strip() for t in t_str.split(',') if t.strip()]
-                    
-                    for item in items:
-                        # Check if this item is ITSELF a portfolio
-                        # A quick heuristic: try to load it. If it loads, it's a portfolio.
-                        # If not, assume it's a ticker.
-                        is_sub_portfolio = False
-                        try:
-                            sub_cfg = await load_portfolio_config(item)
-                            if sub_cfg:
-                                print(f"[DEBUG IMPORT] '{item}' is a sub-portfolio. Recursing...")
-                                await _recursive_fetch(item, depth + 1)
-                                is_sub_portfolio = True
-                        except: pass
-                        
-                        if not is_sub_portfolio:
-                            # Verify it looks like a ticker
-                            if len(item) <= 5 and item.isalpha():
-                                unique_tickers.add(item)
+                    items.extend(t.strip() for t in t_str.split(',') if t.strip())
+                await asyncio.gather(*[_classify_item(item, depth) for item in dict.fromkeys(items)])
                 return 
         except Exception as e:
             print(f"[DEBUG IMPORT] Error checking custom config for {code}: {e}")
@@ -950,10 +1020,11 @@ async def fetch_nexus_tickers(nexus_code: str) -> List[str]:
         # 2. Try Nexus Config (CSV) - FALLBACK
         # Only if NOT found as a custom portfolio
         try:
-            nexus_cfg = await _load_nexus_config(code)
+            nexus_cfg = await _lookup('nexus', code)
             if nexus_cfg:
                 print(f"[DEBUG IMPORT] Found Nexus Config for '{code}'")
                 num = int(nexus_cfg.get('num_components', 0))
+                sub_fetches = []
                 for i in range(1, num + 1):
                     c_type = str(nexus_cfg.get(f'component_{i}_type', '')).lower()
                     c_val = str(nexus_cfg.get(f'component_{i}_value', '')).strip()
@@ -961,13 +1032,14 @@ async def fetch_nexus_tickers(nexus_code: str) -> List[str]:
                     if not c_val: continue
                     
                     if c_type == 'portfolio':
-                        await _recursive_fetch(c_val, depth + 1)
+                        sub_fetches.append(_recursive_fetch(c_val, depth + 1))
                     elif c_type == 'command':
                         continue # Skip dynamic
                     else:
                         target = c_val.upper()
                         if len(target) <= 5 and target.isalpha():
                             unique_tickers.add(target)
+                await asyncio.gather(*sub_fetches)
                 return
         except Exception as e:
             print(f"[DEBUG IMPORT] Error checking nexus config for {code}: {e}")
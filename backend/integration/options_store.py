@@ -0,0 +1,255 @@
+# options_store.py
+# Local cache for option chains and a per-ticker implied volatility history.
+# Expiration lists and chains are kept in SQLite per underlying and expiry with
+# an intraday TTL, so repeat Assess runs and market-data detail requests read
+# them locally. Every ATM IV computed is also recorded (one value per ticker
+# per day), which lets IV rank be computed from the stored history instead of
+# refetching anything.
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from io import StringIO
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+try:
+    from backend.integration.price_store import SingleFlight
+    from backend.integration.rate_limiter import yahoo_rate_limiter
+except ImportError:
+    from integration.price_store import SingleFlight
+    from integration.rate_limiter import yahoo_rate_limiter
+
+# --- Constants ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OPTIONS_STORE_PATH = os.path.join(BASE_DIR, 'data', 'options_store.sqlite')
+
+CHAIN_TTL = 30 * 60 # Seconds; quotes and IVs move during the session
+EXPIRATIONS_TTL = 6 * 3600 # The listed expiries change at most daily
+CHAIN_COLUMNS = ['contractSymbol', 'strike', 'lastPrice', 'bid', 'ask', 'volume', 'openInterest', 'impliedVolatility', 'inTheMoney']
+ATM_TARGET_DAYS = 30
+IV_RANK_LOOKBACK_DAYS = 365
+IV_RANK_MIN_POINTS = 20
+
+options_store_logger = logging.getLogger('OPTIONS_STORE')
+
+
+def _symbol(ticker: Any) -> str:
+    return str(ticker).replace('.', '-').upper().strip()
+
+
+def _chain_frame(frame: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """The stored subset of a yfinance calls/puts frame, with a fresh RangeIndex."""
+    if frame is None or frame.empty:
+        return pd.DataFrame(columns=CHAIN_COLUMNS)
+    return frame.reindex(columns=CHAIN_COLUMNS).reset_index(drop=True)
+
+
+def closest_expiration(expirations: List[str], target_days: int = ATM_TARGET_DAYS, today: Optional[datetime] = None) -> Optional[str]:
+    """The listed expiry closest to `target_days` from today."""
+    if not expirations:
+        return None
+    target_date = (today or datetime.now()) + timedelta(days=target_days)
+    return min(expirations, key=lambda d: abs(datetime.strptime(d, '%Y-%m-%d') - target_date))
+
+
+def _rank(value: float, lo: float, hi: float) -> float:
+    lo, hi = min(lo, value), max(hi, value)
+    if hi - lo <= 0:
+        return 50.0
+    return float(np.clip((value - lo) / (hi - lo) * 100, 0, 100))
+
+
+def atm_iv_from_chain(calls: pd.DataFrame, puts: pd.DataFrame, last_price: float) -> Optional[float]:
+    """Average IV of the call and the put struck closest to `last_price` (ignoring zero/NaN IVs)."""
+    valid_ivs = []
+    for side in (calls, puts):
+        if side is None or side.empty:
+            continue
+        strikes = pd.to_numeric(side['strike'], errors='coerce')
+        if strikes.isna().all():
+            continue
+        iv = pd.to_numeric(side['impliedVolatility'], errors='coerce').iloc[int(np.nanargmin((strikes - last_price).abs().to_numpy()))]
+        if pd.notna(iv) and iv > 0:
+            valid_ivs.append(float(iv))
+    return sum(valid_ivs) / len(valid_ivs) if valid_ivs else None
+
+
+class OptionsStore:
+    """
+    (symbol) -> expirations and (symbol, expiry) -> calls/puts, persisted in
+    SQLite and served until their TTL; plus a daily ATM IV history per symbol.
+    Upstream requests go through the shared rate limiter and concurrent
+    requests for the same chain share one fetch.
+    """
+
+    def __init__(self, path: str = OPTIONS_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self._ready = False
+
+    # --- SQLite ---
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute("""CREATE TABLE IF NOT EXISTS expirations (
+                                        symbol TEXT PRIMARY KEY,
+                                        expires_at REAL NOT NULL,
+                                        payload TEXT NOT NULL)""")
+                    conn.execute("""CREATE TABLE IF NOT EXISTS chains (
+                                        symbol TEXT NOT NULL,
+                                        expiry TEXT NOT NULL,
+                                        fetched_at REAL NOT NULL,
+                                        expires_at REAL NOT NULL,
+                                        calls TEXT NOT NULL,
+                                        puts TEXT NOT NULL,
+                                        PRIMARY KEY (symbol, expiry))""")
+                    conn.execute("""CREATE TABLE IF NOT EXISTS iv_history (
+                                        symbol TEXT NOT NULL,
+                                        date TEXT NOT NULL,
+                                        iv REAL NOT NULL,
+                                        PRIMARY KEY (symbol, date))""")
+                    conn.commit()
+                    self._ready = True
+        return conn
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def _write(self, sql: str, params: Tuple = ()) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(sql, params)
+            conn.commit()
+        finally:
+            conn.close()
+
+    # --- Upstream ---
+    @staticmethod
+    def _fetch_expirations(symbol: str) -> List[str]:
+        yahoo_rate_limiter.acquire()
+        try:
+            expirations = list(yf.Ticker(symbol).options or [])
+        except Exception as e:
+            yahoo_rate_limiter.report_error(e)
+            raise
+        if expirations:
+            yahoo_rate_limiter.report_success()
+        else:
+            yahoo_rate_limiter.report_empty()
+        return expirations
+
+    @staticmethod
+    def _fetch_chain(symbol: str, expiry: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        yahoo_rate_limiter.acquire()
+        try:
+            chain = yf.Ticker(symbol).option_chain(expiry)
+        except Exception as e:
+            yahoo_rate_limiter.report_error(e)
+            raise
+        calls, puts = _chain_frame(chain.calls), _chain_frame(chain.puts)
+        if calls.empty and puts.empty:
+            yahoo_rate_limiter.report_empty()
+        else:
+            yahoo_rate_limiter.report_success()
+        return calls, puts
+
+    # --- Chains ---
+    def expirations(self, ticker: str, refresh: bool = False) -> List[str]:
+        """Listed expiries ('YYYY-MM-DD'); the stored list, or upstream once it expires."""
+        symbol = _symbol(ticker)
+        rows = self._query("SELECT expires_at, payload FROM expirations WHERE symbol = ?", (symbol,))
+        if rows and not refresh and rows[0][0] > time.time():
+            return json.loads(rows[0][1])
+        try:
+            expirations = self._fetch_expirations(symbol)
+        except Exception as e:
+            options_store_logger.warning(f"Expirations failed for {symbol}: {type(e).__name__}: {e}")
+            return json.loads(rows[0][1]) if rows else []
+        if expirations:
+            self._write("INSERT OR REPLACE INTO expirations VALUES (?, ?, ?)",
+                        (symbol, time.time() + EXPIRATIONS_TTL, json.dumps(expirations)))
+        return expirations
+
+    def chain(self, ticker: str, expiry: str, refresh: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """(calls, puts) for one expiry, limited to CHAIN_COLUMNS. Empty frames if unavailable."""
+        symbol = _symbol(ticker)
+        rows = self._query("SELECT expires_at, calls, puts FROM chains WHERE symbol = ? AND expiry = ?", (symbol, expiry))
+        if rows and not refresh and rows[0][0] > time.time():
+            return self._decode(rows[0][1]), self._decode(rows[0][2])
+        try:
+            calls, puts = self._fetch_chain(symbol, expiry)
+        except Exception as e:
+            options_store_logger.warning(f"Option chain failed for {symbol} {expiry}: {type(e).__name__}: {e}")
+            if rows:
+                return self._decode(rows[0][1]), self._decode(rows[0][2])
+            return _chain_frame(None), _chain_frame(None)
+        now = time.time()
+        self._write("INSERT OR REPLACE INTO chains VALUES (?, ?, ?, ?, ?, ?)",
+                    (symbol, expiry, now, now + CHAIN_TTL, calls.to_json(orient='split'), puts.to_json(orient='split')))
+        return calls, puts
+
+    @staticmethod
+    def _decode(payload: str) -> pd.DataFrame:
+        return _chain_frame(pd.read_json(StringIO(payload), orient='split', dtype=False, convert_dates=False))
+
+    def atm_iv(self, ticker: str, last_price: float, target_days: int = ATM_TARGET_DAYS) -> Optional[float]:
+        """
+        ATM implied volatility from the expiry closest to `target_days` out, as
+        used by Assess. Each value computed is recorded in the IV history.
+        """
+        expiry = closest_expiration(self.expirations(ticker), target_days)
+        if expiry is None:
+            return None
+        calls, puts = self.chain(ticker, expiry)
+        iv = atm_iv_from_chain(calls, puts, last_price)
+        if iv is not None:
+            self.record_iv(ticker, iv)
+        return iv
+
+    async def atm_iv_async(self, ticker: str, last_price: float, target_days: int = ATM_TARGET_DAYS) -> Optional[float]:
+        symbol = _symbol(ticker)
+        return await self._flights.run(('atm_iv', symbol, round(float(last_price), 4), target_days),
+                                       asyncio.to_thread, self.atm_iv, symbol, last_price, target_days)
+
+    # --- IV history ---
+    def record_iv(self, ticker: str, iv: float, date: Optional[str] = None) -> None:
+        """Stores `iv` as the ticker's value for `date` (today by default; the latest value of a day wins)."""
+        self._write("INSERT OR REPLACE INTO iv_history VALUES (?, ?, ?)",
+                    (_symbol(ticker), date or datetime.now().strftime('%Y-%m-%d'), float(iv)))
+
+    def iv_history(self, ticker: str, lookback_days: int = IV_RANK_LOOKBACK_DAYS) -> pd.Series:
+        """Daily IVs recorded over the last `lookback_days`, oldest first."""
+        cutoff = (datetime.now() - timedelta(days=lookback_days)).strftime('%Y-%m-%d')
+        rows = self._query("SELECT date, iv FROM iv_history WHERE symbol = ? AND date >= ? ORDER BY date",
+                           (_symbol(ticker), cutoff))
+        return pd.Series([iv for _, iv in rows], index=pd.to_datetime([d for d, _ in rows]), dtype=float, name=_symbol(ticker))
+
+    def iv_rank(self, ticker: str, current_iv: Optional[float] = None, lookback_days: int = IV_RANK_LOOKBACK_DAYS) -> Optional[float]:
+        """
+        IV rank (0-100) of `current_iv` (default: the latest recorded IV) within
+        the stored history. None until IV_RANK_MIN_POINTS days are recorded.
+        """
+        history = self.iv_history(ticker, lookback_days)
+        if len(history) < IV_RANK_MIN_POINTS:
+            return None
+        current_iv = float(history.iloc[-1]) if current_iv is None else float(current_iv)
+        return _rank(current_iv, float(history.min()), float(history.max()))
+
+# --- Shared instance ---
+options_store = OptionsStore()
@@ -1,8 +1,6 @@
 import asyncio
 import pandas as pd
 import yfinance as yf
-import requests
-from io import StringIO
 from typing import List, Dict, Any, Optional
 import logging
 import json
@@ -14,8 +12,10 @@ from concurrent.futures import ThreadPoolExecutor
 # or implement efficient bulk versions here.
 try:
     from backend.integration import assess_command, quickscore_command
+    from backend.integration.index_constituents import get_index_constituents, get_index_sectors
 except ImportError:
     from integration import assess_command, quickscore_command
+    from integration.index_constituents import get_index_constituents, get_index_sectors
 
 logger = logging.getLogger("performance_stream_command")
 
@@ -24,21 +24,12 @@ HEATMAP_CACHE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspat
 DETAILS_CACHE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "heatmap_details_cache.json")
 
 def get_sp500_list() -> List[str]:
-    """Fetches S&P 500 symbols from Wikipedia."""
-    try:
-        url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=15)
-        dfs = pd.read_html(StringIO(response.text))
-        df = dfs[0]
-        # Clean symbols
-        symbols = [str(s).replace('.', '-') for s in df['Symbol'].tolist()]
-        # Get sectors too if possible
-        sector_map = dict(zip(df['Symbol'].apply(lambda x: str(x).replace('.', '-')), df['GICS Sector']))
-        return symbols, sector_map
-    except Exception as e:
-        logger.error(f"Error fetching S&P 500 list: {e}")
+    """S&P 500 symbols and their GICS sectors from the shared constituents cache."""
+    symbols = get_index_constituents('sp500')
+    if not symbols:
+        logger.error("Error fetching S&P 500 list.")
         return [], {}
+    return symbols, get_index_sectors('sp500')
 
 async def fetch_bulk_market_data(tickers: List[str]):
     """Fetches price and market cap data for all tickers."""
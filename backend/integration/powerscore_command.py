@@ -6,7 +6,6 @@ from typing import List, Dict, Any, Optional, Tuple
 import random
 import configparser
 
-import yfinance as yf
 import numpy as np
 import pandas as pd
 from tabulate import tabulate
@@ -18,6 +17,10 @@ from backend.ai_service import ai
 # --- Imports from other command modules ---
 from backend.integration.invest_command import calculate_ema_invest
 from backend.integration.sentiment_command import handle_sentiment_command, GEMINI_API_LOCK
+from backend.integration.price_store import download_async
+from backend.integration.info_store import info_store
+from backend.integration.powerscore_snapshot import PowerScoreSnapshot
+from backend.integration.result_cache import result_cache
 try:
     from backend.usage_counter import increment_usage
 except ImportError:
@@ -28,6 +31,7 @@ except ImportError:
 
 # --- Global Variables & Constants ---
 YFINANCE_API_SEMAPHORE = asyncio.Semaphore(8)
+ML_HISTORY_PERIOD = "5y"
 
 # --- Helper Functions ---
 
@@ -40,7 +44,7 @@ class Colors:
 async def fetch_step_with_retry(step_name: str, coro_func, *args, retries=3, **kwargs):
     """
     Executes a specific scoring step with dedicated retries and verbose logging.
-    Executes sequentially (await) to ensure isolation.
+    Never raises: a step that keeps failing returns None.
     """
     print(f"   [DEBUG] Starting Step: {step_name}...")
     
@@ -77,8 +81,8 @@ async def get_yfinance_info_robustly(ticker: str) -> Optional[Dict[str, Any]]:
     async with YFINANCE_API_SEMAPHORE:
         for attempt in range(3):
             try:
-                await asyncio.sleep(random.uniform(0.2, 0.5))
-                stock_info = await asyncio.to_thread(lambda: yf.Ticker(ticker).info)
+                # Retries bypass the stored copy in case it is the incomplete one
+                stock_info = await info_store.get_info_async(ticker, refresh=attempt > 0)
                 if stock_info and ('regularMarketPrice' in stock_info or 'currentPrice' in stock_info):
                     return stock_info
                 else:
@@ -92,18 +96,17 @@ async def get_yf_download_robustly(tickers: list, **kwargs) -> pd.DataFrame:
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            await asyncio.sleep(random.uniform(0.3, 0.7)) 
             kwargs.setdefault('progress', False)
             kwargs.setdefault('auto_adjust', True) 
             
             print(f"   [DEBUG_YF] Downloading data for {tickers} with kwargs: {kwargs}...")
-            data = await asyncio.to_thread(yf.download, tickers=tickers, **kwargs)
+            data = await download_async(tickers, **kwargs)
 
             if data.empty:
                 print(f"   [DEBUG_YF] Returned EMPTY dataframe for {tickers}. Retrying with auto_adjust=False...")
                 # Automatic fallback for common yfinance bug
                 kwargs['auto_adjust'] = False
-                data = await asyncio.to_thread(yf.download, tickers=tickers, **kwargs)
+                data = await download_async(tickers, **kwargs)
 
             if data.empty and len(tickers) == 1:
                  raise IOError(f"yf.download returned empty DataFrame for single ticker: {tickers[0]}")
@@ -120,6 +123,14 @@ async def get_yf_download_robustly(tickers: list, **kwargs) -> pd.DataFrame:
                 return pd.DataFrame() 
     return pd.DataFrame() 
 
+async def _from_snapshot(read) -> pd.DataFrame:
+    """Awaits a snapshot read; a failed snapshot load gives an empty frame so the step downloads directly."""
+    try:
+        return await read
+    except Exception as e:
+        print(f"   -> WARNING: PowerScore snapshot unavailable ({type(e).__name__}: {e}). Downloading directly.")
+        return pd.DataFrame()
+
 async def get_yf_data_singularity(tickers: List[str], period: str = "10y", interval: str = "1d", is_called_by_ai: bool = False) -> pd.DataFrame:
     if not tickers: return pd.DataFrame()
     data = await get_yf_download_robustly(
@@ -151,7 +162,8 @@ async def calculate_portfolio_beta_correlation_singularity(
     portfolio_holdings: List[Dict[str, Any]], 
     total_portfolio_value: float,
     backtest_period: str, 
-    is_called_by_ai: bool = False 
+    is_called_by_ai: bool = False,
+    snapshot: Optional[PowerScoreSnapshot] = None
 ) -> Optional[tuple[float, float]]:
     if not portfolio_holdings or total_portfolio_value <= 0: return None
     valid_holdings = [h for h in portfolio_holdings if isinstance(h.get('value'), (int, float)) and h['value'] > 1e-9]
@@ -162,7 +174,11 @@ async def calculate_portfolio_beta_correlation_singularity(
     stock_tickers = [h['ticker'] for h in valid_holdings if h.get('ticker') and h['ticker'].upper() != 'CASH']
     if not stock_tickers: return 0.0, 0.0
 
-    hist_data = await get_yf_data_singularity(list(set(stock_tickers + ['SPY'])), period=backtest_period, interval="1d", is_called_by_ai=True)
+    hist_data = pd.DataFrame()
+    if snapshot is not None and snapshot.covers(stock_tickers):
+        hist_data = await _from_snapshot(snapshot.closes(stock_tickers + ['SPY'], backtest_period))
+    if hist_data.empty:
+        hist_data = await get_yf_data_singularity(list(set(stock_tickers + ['SPY'])), period=backtest_period, interval="1d", is_called_by_ai=True)
     if hist_data.empty or 'SPY' not in hist_data.columns or hist_data['SPY'].dropna().shape[0] < 20: return None
 
     daily_returns = hist_data.pct_change(fill_method=None).iloc[1:]
@@ -205,12 +221,20 @@ async def calculate_portfolio_beta_correlation_singularity(
     
     return w_beta, w_corr
 
-async def get_single_stock_beta_corr(ticker: str, period: str, is_called_by_ai: bool = True) -> tuple[Optional[float], Optional[float]]:
+async def get_single_stock_beta_corr(ticker: str, period: str, is_called_by_ai: bool = True,
+                                     snapshot: Optional[PowerScoreSnapshot] = None) -> tuple[Optional[float], Optional[float]]:
     portfolio = [{'ticker': ticker, 'value': 100.0}]
-    result = await calculate_portfolio_beta_correlation_singularity(portfolio, 100.0, period, is_called_by_ai)
+    result = await calculate_portfolio_beta_correlation_singularity(portfolio, 100.0, period, is_called_by_ai, snapshot=snapshot)
     return result if result else (None, None)
 
 async def get_market_invest_score_for_powerscore() -> Optional[float]:
+    """Market component (R); it does not depend on the ticker, so requests in the same refresh window share it."""
+    return await result_cache.get_or_compute(
+        'powerscore_market', (), _calculate_market_invest_score, interval='1d',
+        tickers=['^VIX', 'SPY'], cacheable=lambda score: score is not None
+    )
+
+async def _calculate_market_invest_score() -> Optional[float]:
     try:
         vix_data = await get_yf_download_robustly(['^VIX'], period="5d")
         if vix_data.empty: return None
@@ -258,9 +282,13 @@ async def get_market_invest_score_for_powerscore() -> Optional[float]:
         print(f"   [DEBUG] Market Score Error: {e}")
         return None
 
-async def calculate_volatility_metrics(ticker: str, period: str) -> tuple[Optional[float], Optional[float]]:
+async def calculate_volatility_metrics(ticker: str, period: str, snapshot: Optional[PowerScoreSnapshot] = None) -> tuple[Optional[float], Optional[float]]:
     try:
-        hist_data = await get_yf_download_robustly([ticker], period=period, auto_adjust=True)
+        hist_data = pd.DataFrame()
+        if snapshot is not None and snapshot.covers([ticker]):
+            hist_data = await _from_snapshot(snapshot.history(ticker, period))
+        if hist_data.empty:
+            hist_data = await get_yf_download_robustly([ticker], period=period, auto_adjust=True)
         if hist_data.empty or 'Close' not in hist_data.columns or len(hist_data) <= 30: return None, None
 
         hist_data['daily_return'] = hist_data['Close'].pct_change()
@@ -335,7 +363,7 @@ def calculate_technical_indicators(data: pd.DataFrame) -> pd.DataFrame:
             if c not in data: data[c] = 0
     return data
 
-async def handle_mlforecast_command_internal(ai_params: dict, is_called_by_ai: bool = True):
+async def handle_mlforecast_command_internal(ai_params: dict, is_called_by_ai: bool = True, snapshot: Optional[PowerScoreSnapshot] = None):
     ticker = ai_params.get("ticker")
     if not ticker: 
         print("   [DEBUG ML] No ticker provided.")
@@ -343,7 +371,11 @@ async def handle_mlforecast_command_internal(ai_params: dict, is_called_by_ai: b
     
     # Debug: Check Data Download
     print(f"   [DEBUG ML] Downloading 5y data for {ticker}...")
-    data = await get_yf_download_robustly([ticker], period="5y", auto_adjust=True)
+    data = pd.DataFrame()
+    if snapshot is not None and snapshot.covers([ticker]):
+        data = await _from_snapshot(snapshot.history(ticker, ML_HISTORY_PERIOD))
+    if data.empty:
+        data = await get_yf_download_robustly([ticker], period=ML_HISTORY_PERIOD, auto_adjust=True)
     
     if data.empty:
         print(f"   [DEBUG ML] Data download empty for {ticker}.")
@@ -375,6 +407,10 @@ async def handle_mlforecast_command_internal(ai_params: dict, is_called_by_ai: b
         print(f"   [DEBUG ML] Missing features: {missing_feats}")
         return []
 
+    # Training is CPU-bound; keep it off the event loop so the other steps keep running
+    return await asyncio.to_thread(_forecast_powerscore_horizons, data, features)
+
+def _forecast_powerscore_horizons(data: pd.DataFrame, features: List[str]) -> List[Dict[str, str]]:
     results = []
     horizons = {
         "5-Day": 5, 
@@ -466,84 +502,106 @@ async def stream_powerscore_analysis(ticker: str, sensitivity: int, is_called_by
     backtest_period = period_map[sensitivity]
     
     raw = {}
-    component_errors = []
-    
-    # 1. Market Score (R)
-    yield {"type": "step_start", "step": "Market Score", "key": "R", "progress": 10}
-    raw['R'] = await fetch_step_with_retry("Market Score (R)", get_market_invest_score_for_powerscore)
-    if raw['R'] is None: component_errors.append("R (Market)")
-    yield {"type": "step_complete", "step": "Market Score", "key": "R", "value": raw['R'], "progress": 20}
-
-    # 2. Beta/Correlation (ABB, ABC)
-    yield {"type": "step_start", "step": "Beta/Correlation", "key": "AB", "progress": 25}
-    beta_res = await fetch_step_with_retry("Beta/Corr (AB)", get_single_stock_beta_corr, ticker, backtest_period)
-    if beta_res: 
-        raw['ABB'], raw['ABC'] = beta_res
-    else: 
-        raw['ABB'], raw['ABC'] = None, None
-        component_errors.append("AB (Beta/Corr)")
-    yield {"type": "step_complete", "step": "Beta/Correlation", "key": "AB", "value": beta_res, "progress": 40}
-
-    # 3. Volatility (AA)
-    yield {"type": "step_start", "step": "Volatility Analysis", "key": "AA", "progress": 45}
-    vol_res = await fetch_step_with_retry("Volatility (AA)", calculate_volatility_metrics, ticker, backtest_period)
-    raw['AA'] = vol_res[1] if vol_res else None
-    if raw['AA'] is None: component_errors.append("AA (Volatility)")
-    yield {"type": "step_complete", "step": "Volatility Analysis", "key": "AA", "value": raw['AA'], "progress": 55}
-
-    # 4. Fundamentals (F)
-    yield {"type": "step_start", "step": "Fundamentals", "key": "F", "progress": 60}
-    fund_res = await fetch_step_with_retry("Fundamentals (F)", handle_fundamentals_command_internal, ai_params={'ticker': ticker})
-    raw['F'] = fund_res.get('fundamental_score') if fund_res else None
-    if raw['F'] is None: component_errors.append("F (Fundamentals)")
-    yield {"type": "step_complete", "step": "Fundamentals", "key": "F", "value": raw['F'], "progress": 70}
-
-    # 5. QuickScore / Technicals (Q)
-    yield {"type": "step_start", "step": "Technical Analysis", "key": "Q", "progress": 75}
-    q_res = await fetch_step_with_retry("QuickScore (Q)", calculate_ema_invest, ticker, sensitivity, is_called_by_ai=True)
-    raw['Q'] = q_res[1] if q_res else None
-    if raw['Q'] is None: component_errors.append("Q (Technicals)")
-    yield {"type": "step_complete", "step": "Technical Analysis", "key": "Q", "value": raw['Q'], "progress": 85}
-
-    # 6. Sentiment (S)
-    yield {"type": "step_start", "step": "Sentiment Analysis", "key": "S", "progress": 88}
-    sent_res = await fetch_step_with_retry(
-        "Sentiment (S)", 
-        handle_sentiment_command, 
-        ai_params={'ticker': ticker}, 
-        is_called_by_ai=True,
-        retries=3 
-    )
-    if sent_res and isinstance(sent_res, dict):
-        if 'sentiment_score_raw' in sent_res:
-            raw['S'] = sent_res['sentiment_score_raw']
+    step_errors = {}
+    # Beta/correlation, volatility and the ML forecast all read daily bars of the
+    # ticker and SPY; load them once over the longest window they need.
+    snapshot = PowerScoreSnapshot(ticker, [backtest_period, ML_HISTORY_PERIOD])
+
+    def record_market(res):
+        raw['R'] = res
+        if raw['R'] is None: step_errors['R'] = "R (Market)"
+        return raw['R']
+
+    def record_beta(beta_res):
+        if beta_res: 
+            raw['ABB'], raw['ABC'] = beta_res
+        else: 
+            raw['ABB'], raw['ABC'] = None, None
+            step_errors['AB'] = "AB (Beta/Corr)"
+        return beta_res
+
+    def record_volatility(vol_res):
+        raw['AA'] = vol_res[1] if vol_res else None
+        if raw['AA'] is None: step_errors['AA'] = "AA (Volatility)"
+        return raw['AA']
+
+    def record_fundamentals(fund_res):
+        raw['F'] = fund_res.get('fundamental_score') if fund_res else None
+        if raw['F'] is None: step_errors['F'] = "F (Fundamentals)"
+        return raw['F']
+
+    def record_quickscore(q_res):
+        raw['Q'] = q_res[1] if q_res else None
+        if raw['Q'] is None: step_errors['Q'] = "Q (Technicals)"
+        return raw['Q']
+
+    def record_sentiment(sent_res):
+        if sent_res and isinstance(sent_res, dict):
+            if 'sentiment_score_raw' in sent_res:
+                raw['S'] = sent_res['sentiment_score_raw']
+            else:
+                raw['S'] = None
+                step_errors['S'] = "S (Sentiment - Missing Key)"
         else:
             raw['S'] = None
-            component_errors.append("S (Sentiment - Missing Key)")
-    else:
-        raw['S'] = None
-        component_errors.append("S (Sentiment - Failed)")
-    yield {"type": "step_complete", "step": "Sentiment Analysis", "key": "S", "value": raw['S'], "progress": 92}
-
-    # 7. ML Forecast (M)
-    yield {"type": "step_start", "step": "ML Forecast", "key": "M", "progress": 95}
-    ml_res = await fetch_step_with_retry("ML Forecast (M)", handle_mlforecast_command_internal, ai_params={'ticker': ticker})
-    raw['M'], used_m_period = None, "N/A"
-    if ml_res:
-        m_period_map = {1: ["1-Year (52-Week)", "6-Month (26-Week)"],
-                        2: ["6-Month (26-Week)", "3-Month (63-Day)"],
-                        3: ["1-Month (21-Day)", "5-Day"]}
-        m_lookup = {item.get("Period"): item for item in ml_res}
-        for period in m_period_map[sensitivity]:
-            if period in m_lookup:
-                try:
-                    pct_str = m_lookup[period].get("Est. % Change", "0%").replace('%', '')
-                    raw['M'] = float(pct_str)
-                    used_m_period = period
-                    break 
-                except: pass
-    if raw['M'] is None: component_errors.append("M (ML Forecast)")
-    yield {"type": "step_complete", "step": "ML Forecast", "key": "M", "value": raw['M'], "progress": 98}
+            step_errors['S'] = "S (Sentiment - Failed)"
+        return raw['S']
+
+    def record_ml(ml_res):
+        raw['M'] = None
+        if ml_res:
+            m_period_map = {1: ["1-Year (52-Week)", "6-Month (26-Week)"],
+                            2: ["6-Month (26-Week)", "3-Month (63-Day)"],
+                            3: ["1-Month (21-Day)", "5-Day"]}
+            m_lookup = {item.get("Period"): item for item in ml_res}
+            for period in m_period_map[sensitivity]:
+                if period in m_lookup:
+                    try:
+                        pct_str = m_lookup[period].get("Est. % Change", "0%").replace('%', '')
+                        raw['M'] = float(pct_str)
+                        break 
+                    except: pass
+        if raw['M'] is None: step_errors['M'] = "M (ML Forecast)"
+        return raw['M']
+
+    # (key, step, recorder, fetch_step_with_retry args, kwargs), in display order
+    steps = [
+        ("R", "Market Score", record_market,
+         ("Market Score (R)", get_market_invest_score_for_powerscore), {}),
+        ("AB", "Beta/Correlation", record_beta,
+         ("Beta/Corr (AB)", get_single_stock_beta_corr, ticker, backtest_period), {'snapshot': snapshot}),
+        ("AA", "Volatility Analysis", record_volatility,
+         ("Volatility (AA)", calculate_volatility_metrics, ticker, backtest_period), {'snapshot': snapshot}),
+        ("F", "Fundamentals", record_fundamentals,
+         ("Fundamentals (F)", handle_fundamentals_command_internal), {'ai_params': {'ticker': ticker}}),
+        ("Q", "Technical Analysis", record_quickscore,
+         ("QuickScore (Q)", calculate_ema_invest, ticker, sensitivity), {'is_called_by_ai': True}),
+        ("S", "Sentiment Analysis", record_sentiment,
+         ("Sentiment (S)", handle_sentiment_command), {'ai_params': {'ticker': ticker}, 'is_called_by_ai': True, 'retries': 3}),
+        ("M", "ML Forecast", record_ml,
+         ("ML Forecast (M)", handle_mlforecast_command_internal), {'ai_params': {'ticker': ticker}, 'snapshot': snapshot}),
+    ]
+
+    # The steps are independent: start them all and stream each one as it finishes
+    for key, step, _, _, _ in steps:
+        yield {"type": "step_start", "step": step, "key": key, "progress": 10}
+    tasks = {asyncio.ensure_future(fetch_step_with_retry(*args, **kwargs)): (key, step, record)
+             for key, step, record, args, kwargs in steps}
+    pending, completed = set(tasks), 0
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                key, step, record = tasks[task]
+                value = record(task.result())
+                completed += 1
+                progress = 10 + int(88 * completed / len(tasks))
+                yield {"type": "step_complete", "step": step, "key": key, "value": value, "progress": progress}
+    finally:
+        for task in pending:
+            task.cancel()
+
+    component_errors = [step_errors[key] for key, _, _, _, _ in steps if key in step_errors]
 
     # --- Calculate Prime Scores ---
     yield {"type": "status", "message": "Finalizing Calculations...", "progress": 99}
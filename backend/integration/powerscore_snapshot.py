@@ -0,0 +1,96 @@
+# powerscore_snapshot.py
+# Per-request data snapshot for PowerScore. The price-based steps (beta and
+# correlation, volatility rank, ML forecast) all read daily bars of the ticker
+# and SPY over different windows; the snapshot loads both once over the
+# longest window and hands each step the slice a fresh request would return.
+import asyncio
+import logging
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+try:
+    from backend.integration.price_store import download_async, period_start, trim_to_period
+except ImportError:
+    from integration.price_store import download_async, period_start, trim_to_period
+
+# --- Constants ---
+BENCHMARK = 'SPY'
+
+powerscore_snapshot_logger = logging.getLogger('POWERSCORE_SNAPSHOT')
+
+
+class PowerScoreSnapshot:
+    """
+    Daily adjusted bars for `ticker` and SPY covering every period in
+    `periods`. Loaded lazily on first use; concurrent steps share the load.
+    """
+
+    def __init__(self, ticker: str, periods: Iterable[str]):
+        self.ticker = ticker.upper().strip()
+        self.symbols = list(dict.fromkeys([self.ticker, BENCHMARK]))
+        now = pd.Timestamp.now(tz='UTC')
+        starts = {p: period_start(p, now) for p in periods}
+        # The earliest start wins; 'max' (no start) covers everything
+        self.period = min(starts, key=lambda p: starts[p].value if starts[p] is not None else -2**63)
+        self._task: Optional[asyncio.Task] = None
+
+    async def _load(self) -> pd.DataFrame:
+        data = await download_async(self.symbols, period=self.period, interval='1d', auto_adjust=True,
+                                    group_by='ticker', ignore_tz=False, progress=False)
+        # An empty or partial answer is a failed load, not a result to share:
+        # raising lets data() forget it and the steps fall back to a fresh download
+        loaded = set(data.columns.get_level_values(0)) if not data.empty else set()
+        missing = [s for s in self.symbols if s not in loaded]
+        if missing:
+            raise LookupError(f"PowerScore snapshot returned no bars for {', '.join(missing)}")
+        return data
+
+    async def data(self) -> pd.DataFrame:
+        """
+        The full (Ticker, Price) frame, exchange-timezone index. A failed load
+        (an error, or no bars for a symbol) is forgotten, so the next call (a
+        step's retry) loads again.
+        """
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._load())
+        task = self._task
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            if self._task is task and task.done():
+                self._task = None
+            raise
+
+    def covers(self, symbols: Iterable[str]) -> bool:
+        return all(str(s).upper().strip() in self.symbols for s in symbols)
+
+    async def history(self, symbol: str, period: str) -> pd.DataFrame:
+        """
+        Flat OHLCV bars for one symbol over `period`, shaped like
+        download_async([symbol], period=period, auto_adjust=True) after its
+        ticker level is dropped. Empty if the symbol has no data.
+        """
+        data = await self.data()
+        symbol = symbol.upper().strip()
+        if data.empty or symbol not in data.columns.get_level_values(0):
+            return pd.DataFrame()
+        frame = trim_to_period(data[symbol].dropna(how='all'), period)
+        frame = frame.copy()
+        if frame.index.tz is not None:
+            frame.index = frame.index.tz_localize(None)
+        frame.columns.name = None
+        return frame
+
+    async def closes(self, symbols: List[str], period: str) -> pd.DataFrame:
+        """Close columns per symbol over `period` (each series' own bars, outer-joined)."""
+        series = []
+        for symbol in dict.fromkeys(symbols):
+            frame = await self.history(symbol, period)
+            if not frame.empty and 'Close' in frame.columns:
+                close = pd.to_numeric(frame['Close'], errors='coerce').dropna()
+                if not close.empty:
+                    series.append(close.rename(symbol))
+        if not series:
+            return pd.DataFrame()
+        return pd.concat(series, axis=1).dropna(axis=0, how='all').dropna(axis=1, how='all')
@@ -0,0 +1,484 @@
+# price_store.py
+# Shared on-disk OHLCV store. Bars are kept per (ticker, interval) as columnar
+# .npz files and only the missing tail since the last stored bar is fetched
+# from yfinance. Both yf.download-shaped and Ticker.history-shaped frames can
+# be served from the same files.
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+try:
+    from backend.integration.rate_limiter import yahoo_rate_limiter
+except ImportError:
+    from integration.rate_limiter import yahoo_rate_limiter
+
+# --- Constants ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRICE_STORE_DIR = os.path.join(BASE_DIR, 'data', 'price_store')
+
+RAW_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+ADJUSTED_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Intervals worth persisting. Minute bars are passed straight through.
+CACHEABLE_INTERVALS = {'1h', '1d', '5d', '1wk', '1mo', '3mo'}
+INTRADAY_INTERVALS = {'1h'}
+INTRADAY_MAX_LOOKBACK = pd.Timedelta(days=729) # yfinance serves 1h bars for ~730 days only
+
+# How long a stored tail is considered current before asking yfinance again (seconds)
+REFRESH_TTL = {'1h': 300, '1d': 900, '5d': 3600, '1wk': 3600, '1mo': 3600, '3mo': 3600}
+# max_age for readings that report or allocate on the latest price (any interval)
+LIVE_MAX_AGE = 60
+
+# Bars re-fetched behind the last stored bar; used to detect split/dividend re-adjustments
+TAIL_OVERLAP_BARS = 5
+DOWNLOAD_WORKERS = 8
+ADJUSTMENT_TOLERANCE = 1e-4
+
+# yf.download keyword arguments the store understands (everything else is passed through)
+_STORE_DOWNLOAD_KWARGS = {'period', 'interval', 'start', 'end', 'auto_adjust', 'group_by',
+                          'progress', 'timeout', 'threads', 'ignore_tz', 'multi_level_index'}
+
+_MAX_COVERAGE = np.iinfo(np.int64).min # Sentinel: history was fetched with period="max"
+
+price_store_logger = logging.getLogger('PRICE_STORE')
+
+
+def _period_start(period: str, now: pd.Timestamp) -> Optional[pd.Timestamp]:
+    """Translates a yfinance period string ('10y', '6mo', 'ytd', 'max', ...) into a start timestamp."""
+    period = (period or '').strip().lower()
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return now.normalize().replace(month=1, day=1)
+    for suffix, unit in (('mo', 'months'), ('wk', 'weeks'), ('y', 'years'), ('d', 'days')):
+        if period.endswith(suffix):
+            try:
+                amount = int(period[:-len(suffix)])
+            except ValueError:
+                break
+            return now - pd.DateOffset(**{unit: amount})
+    raise ValueError(f"Unsupported period '{period}'")
+
+
+def period_start(period: str, now: Optional[pd.Timestamp] = None) -> Optional[pd.Timestamp]:
+    """Start of a yfinance period window as of `now` (None for 'max')."""
+    return _period_start(period, now if now is not None else pd.Timestamp.now(tz='UTC'))
+
+
+def trim_to_period(frame: pd.DataFrame, period: str, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Rows of a tz-aware bar frame that a fresh request for `period` would
+    return, so one long load can serve several shorter windows.
+    """
+    start = period_start(period, now)
+    if start is None or frame.empty:
+        return frame
+    if frame.index.tz is None:
+        start = start.tz_localize(None)
+    return frame[frame.index >= start]
+
+
+def _to_exchange_ts(value: Any, tz: Optional[str]) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    if tz:
+        ts = ts.tz_localize(tz) if ts.tzinfo is None else ts.tz_convert(tz)
+    return ts
+
+
+class _Entry:
+    """In-memory image of one stored (ticker, interval) file."""
+    __slots__ = ('frame', 'tz', 'coverage_start', 'fetched_at', 'mtime')
+
+    def __init__(self, frame: pd.DataFrame, tz: Optional[str], coverage_start: int, fetched_at: float, mtime: float = 0.0):
+        self.frame = frame
+        self.tz = tz
+        self.coverage_start = coverage_start
+        self.fetched_at = fetched_at
+        self.mtime = mtime
+
+
+class PriceStore:
+    """
+    Per-ticker, per-interval OHLCV store.
+
+    Bars are stored unadjusted together with 'Adj Close', so a single file
+    serves both auto_adjust=True and auto_adjust=False requests. When the
+    re-fetched overlap no longer matches the stored bars (new split or
+    dividend) the full window is reloaded.
+    """
+
+    def __init__(self, root_dir: str = PRICE_STORE_DIR):
+        self.root_dir = root_dir
+        self._entries: Dict[Tuple[str, str], _Entry] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._refresh_listeners: List[Callable[[str, str], None]] = []
+
+    # --- Refresh notifications ---
+
+    def add_refresh_listener(self, listener: Callable[[str, str], None]) -> None:
+        """Registers listener(ticker, interval), called whenever a tail refresh changes stored bars. Must be cheap."""
+        if listener not in self._refresh_listeners:
+            self._refresh_listeners.append(listener)
+
+    def _notify_refresh(self, ticker: str, interval: str) -> None:
+        for listener in list(self._refresh_listeners):
+            try:
+                listener(ticker, interval)
+            except Exception as e:
+                price_store_logger.warning(f"Refresh listener failed for {ticker} {interval}: {e}")
+
+    # --- Storage ---
+
+    def _path(self, ticker: str, interval: str) -> str:
+        return os.path.join(self.root_dir, interval, f"{ticker}.npz")
+
+    def _lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def _load(self, ticker: str, interval: str) -> Optional[_Entry]:
+        key = (ticker, interval)
+        path = self._path(ticker, interval)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            self._entries.pop(key, None)
+            return None
+
+        cached = self._entries.get(key)
+        if cached is not None and cached.mtime == mtime:
+            return cached
+
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                tz = str(npz['tz']) or None
+                index = pd.to_datetime(npz['index'], unit='ns', utc=True)
+                index = index.tz_convert(tz) if tz else index.tz_localize(None)
+                frame = pd.DataFrame({col: npz[f"col_{i}"] for i, col in enumerate(RAW_COLUMNS)}, index=index)
+                frame.index.name = 'Datetime' if interval in INTRADAY_INTERVALS else 'Date'
+                entry = _Entry(frame, tz, int(npz['coverage_start']), float(npz['fetched_at']), mtime)
+        except Exception as e:
+            price_store_logger.warning(f"Discarding unreadable price store file {path}: {e}")
+            return None
+
+        self._entries[key] = entry
+        return entry
+
+    def _save(self, ticker: str, interval: str, entry: _Entry) -> None:
+        path = self._path(ticker, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        index = entry.frame.index
+        index_utc = index.tz_convert('UTC') if index.tz is not None else index.tz_localize('UTC')
+        arrays = {f"col_{i}": entry.frame[col].to_numpy(dtype='float64') for i, col in enumerate(RAW_COLUMNS)}
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, index=index_utc.as_unit('ns').asi8, tz=np.array(entry.tz or ''),
+                     coverage_start=np.int64(entry.coverage_start),
+                     fetched_at=np.float64(entry.fetched_at), **arrays)
+        os.replace(tmp_path, path)
+        entry.mtime = os.path.getmtime(path)
+        self._entries[(ticker, interval)] = entry
+
+    # --- Upstream ---
+
+    @staticmethod
+    def _fetch(ticker: str, interval: str, **kwargs) -> pd.DataFrame:
+        yahoo_rate_limiter.acquire()
+        try:
+            data = yf.Ticker(ticker).history(interval=interval, auto_adjust=False, actions=False, **kwargs)
+        except Exception as e:
+            yahoo_rate_limiter.report_error(e)
+            raise
+        yahoo_rate_limiter.report_result(data)
+        if data is None or data.empty:
+            return pd.DataFrame(columns=RAW_COLUMNS)
+        if 'Adj Close' not in data.columns:
+            data['Adj Close'] = data['Close']
+        return data[RAW_COLUMNS].astype('float64')
+
+    def _fetch_full(self, ticker: str, interval: str, start: Any, period: Optional[str]) -> Optional[_Entry]:
+        now = pd.Timestamp.now(tz='UTC')
+        if period == 'max' or (start is None and period is None):
+            frame = self._fetch(ticker, interval, period='max')
+        elif period is not None:
+            frame = self._fetch(ticker, interval, period=period)
+        else:
+            start_ts = pd.Timestamp(start)
+            if interval in INTRADAY_INTERVALS:
+                floor = now - INTRADAY_MAX_LOOKBACK
+                if start_ts.tzinfo is None:
+                    floor = floor.tz_localize(None)
+                start_ts = max(start_ts, floor)
+            frame = self._fetch(ticker, interval, start=start_ts)
+        if frame.empty:
+            return None
+
+        tz = str(frame.index.tz) if frame.index.tz is not None else None
+        if period == 'max' or (start is None and period is None):
+            coverage = _MAX_COVERAGE
+        elif period is not None:
+            coverage = _period_start(period, now).value
+        else:
+            coverage = _to_exchange_ts(start_ts, tz).value
+        return _Entry(frame, tz, coverage, time.time())
+
+    def _extend_tail(self, ticker: str, interval: str, entry: _Entry) -> _Entry:
+        stored = entry.frame
+        overlap_start = stored.index[max(0, len(stored) - TAIL_OVERLAP_BARS)]
+        if interval not in INTRADAY_INTERVALS:
+            overlap_start = overlap_start.normalize()
+        tail = self._fetch(ticker, interval, start=overlap_start)
+        if tail.empty:
+            entry.fetched_at = time.time()
+            return entry
+
+        if tail.index.tz is not None and entry.tz and str(tail.index.tz) != entry.tz:
+            tail.index = tail.index.tz_convert(entry.tz)
+
+        # The newest stored bar may have been a live (partial) bar; only the ones before it must match.
+        settled = stored.index[:-1].intersection(tail.index)
+        if len(settled):
+            before = stored.loc[settled, ['Close', 'Adj Close']].to_numpy()
+            after = tail.loc[settled, ['Close', 'Adj Close']].to_numpy()
+            drift = np.nanmax(np.abs(after / before - 1.0)) if before.size else 0.0
+            if drift > ADJUSTMENT_TOLERANCE:
+                price_store_logger.info(f"{ticker} {interval}: history re-adjusted upstream (drift {drift:.4%}); reloading.")
+                if entry.coverage_start == _MAX_COVERAGE:
+                    refreshed = self._fetch_full(ticker, interval, None, 'max')
+                else:
+                    refreshed = self._fetch_full(ticker, interval, pd.Timestamp(entry.coverage_start, tz='UTC'), None)
+                return refreshed or entry
+
+        merged = pd.concat([stored[stored.index < tail.index[0]], tail])
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+        return _Entry(merged, entry.tz, entry.coverage_start, time.time())
+
+    # --- Public API ---
+
+    def get_raw(self, ticker: str, period: Optional[str] = None, interval: str = '1d',
+                start: Any = None, end: Any = None, max_age: Optional[float] = None) -> pd.DataFrame:
+        """
+        Returns unadjusted bars (plus 'Adj Close') for one ticker, refreshing the
+        stored tail only when the requested window reaches past what is on disk.
+        `max_age` (seconds) overrides the interval's REFRESH_TTL; 0 always
+        refreshes the tail, for readings that must include the current bar.
+        """
+        ticker = ticker.upper().strip()
+        key = (ticker, interval)
+        with self._lock(key):
+            entry = self._load(ticker, interval)
+            tz = entry.tz if entry else None
+            now = pd.Timestamp.now(tz='UTC')
+
+            if period is not None:
+                start_ts = _period_start(period, now)
+                end_ts = None
+            else:
+                start_ts = _to_exchange_ts(start, tz) if start is not None else None
+                end_ts = _to_exchange_ts(end, tz) if end is not None else None
+            wanted_start = _MAX_COVERAGE if start_ts is None else start_ts.value
+
+            if entry is None or wanted_start < entry.coverage_start:
+                fresh = self._fetch_full(ticker, interval, start, period)
+                if fresh is None:
+                    return pd.DataFrame(columns=RAW_COLUMNS)
+                self._save(ticker, interval, fresh)
+                entry = fresh
+            else:
+                covered_to_end = end_ts is not None and len(entry.frame) and end_ts <= entry.frame.index[-1]
+                ttl = REFRESH_TTL.get(interval, 900) if max_age is None else max_age
+                stale = time.time() - entry.fetched_at >= ttl
+                if stale and not covered_to_end:
+                    try:
+                        refreshed = self._extend_tail(ticker, interval, entry)
+                        self._save(ticker, interval, refreshed)
+                        changed = refreshed is not entry and not refreshed.frame.equals(entry.frame)
+                        entry = self._entries[key]
+                        if changed:
+                            self._notify_refresh(ticker, interval)
+                    except Exception as e:
+                        # Serving slightly stale bars beats failing the caller
+                        price_store_logger.warning(f"Tail refresh failed for {ticker} {interval}: {e}")
+
+            frame = entry.frame
+            if start_ts is not None:
+                if entry.tz is None and start_ts.tzinfo is not None:
+                    start_ts = start_ts.tz_localize(None)
+                frame = frame[frame.index >= start_ts]
+            if end_ts is not None:
+                if entry.tz is None and end_ts.tzinfo is not None:
+                    end_ts = end_ts.tz_localize(None)
+                frame = frame[frame.index < end_ts]
+            return frame.copy()
+
+    def get_history(self, ticker: str, period: Optional[str] = None, interval: str = '1d',
+                    start: Any = None, end: Any = None, auto_adjust: bool = True,
+                    max_age: Optional[float] = None) -> pd.DataFrame:
+        """Ticker.history-shaped bars (exchange timezone, flat columns)."""
+        if interval not in CACHEABLE_INTERVALS:
+            yahoo_rate_limiter.acquire()
+            try:
+                data = yf.Ticker(ticker).history(period=period, interval=interval, start=start, end=end, auto_adjust=auto_adjust)
+            except Exception as e:
+                yahoo_rate_limiter.report_error(e)
+                raise
+            yahoo_rate_limiter.report_result(data)
+            return data
+        if period is None and start is None:
+            period = '1mo' # Ticker.history default
+        raw = self.get_raw(ticker, period=period, interval=interval, start=start, end=end, max_age=max_age)
+        return _adjust(raw) if auto_adjust else raw
+
+    def download(self, tickers: Any, period: Optional[str] = None, interval: str = '1d',
+                 start: Any = None, end: Any = None, auto_adjust: bool = True,
+                 group_by: str = 'column', max_age: Optional[float] = None, **kwargs) -> pd.DataFrame:
+        """
+        Drop-in replacement for yf.download backed by the store. Requests the
+        store cannot represent (minute bars, prepost, actions, ...) go straight
+        to yfinance. `max_age` is passed to get_raw for every ticker.
+        """
+        unsupported = set(kwargs) - _STORE_DOWNLOAD_KWARGS
+        if interval not in CACHEABLE_INTERVALS or unsupported:
+            yahoo_rate_limiter.acquire(len(tickers) if isinstance(tickers, (list, tuple, set)) else 1)
+            try:
+                data = yf.download(tickers=tickers, period=period, interval=interval, start=start, end=end,
+                                   auto_adjust=auto_adjust, group_by=group_by, **kwargs)
+            except Exception as e:
+                yahoo_rate_limiter.report_error(e)
+                raise
+            yahoo_rate_limiter.report_result(data)
+            return data
+
+        if isinstance(tickers, str):
+            tickers = tickers.replace(',', ' ').split()
+        symbols = list(dict.fromkeys(str(t).upper().strip() for t in tickers if str(t).strip()))
+        if period is None and start is None:
+            period = '1mo' # yf.download default
+
+        ignore_tz = kwargs.get('ignore_tz')
+        if ignore_tz is None:
+            ignore_tz = interval not in INTRADAY_INTERVALS
+
+        def load(symbol: str) -> pd.DataFrame:
+            try:
+                return self.get_raw(symbol, period=period, interval=interval, start=start, end=end, max_age=max_age)
+            except Exception as e:
+                price_store_logger.warning(f"Price store failed for {symbol}: {e}")
+                return pd.DataFrame(columns=RAW_COLUMNS)
+
+        # Cache misses fan out over a few threads; the shared rate limiter paces them upstream
+        if len(symbols) > 1:
+            with ThreadPoolExecutor(max_workers=min(DOWNLOAD_WORKERS, len(symbols))) as pool:
+                raws = list(pool.map(load, symbols))
+        else:
+            raws = [load(s) for s in symbols]
+
+        frames: Dict[str, pd.DataFrame] = {}
+        for symbol, raw in zip(symbols, raws):
+            frame = _adjust(raw) if auto_adjust else raw
+            if ignore_tz and isinstance(frame.index, pd.DatetimeIndex) and frame.index.tz is not None:
+                frame.index = frame.index.tz_localize(None)
+            frames[symbol] = frame
+
+        if not any(not f.empty for f in frames.values()):
+            return pd.DataFrame()
+        if not ignore_tz:
+            # Align to a common exchange timezone like yf.download does
+            zones = [str(f.index.tz) for f in frames.values() if not f.empty and f.index.tz is not None]
+            if zones:
+                common_tz = max(set(zones), key=zones.count)
+                for frame in frames.values():
+                    if not frame.empty and frame.index.tz is not None:
+                        frame.index = frame.index.tz_convert(common_tz)
+
+        data = pd.concat(frames.values(), axis=1, sort=True, keys=frames.keys(), names=['Ticker', 'Price'])
+        if group_by == 'column':
+            data.columns = data.columns.swaplevel(0, 1)
+            data = data.sort_index(level=0, axis=1)
+        if not kwargs.get('multi_level_index', True) and len(symbols) == 1:
+            data = data.droplevel(0 if group_by == 'ticker' else 1, axis=1).rename_axis(None, axis=1)
+        return data
+
+
+def _adjust(raw: pd.DataFrame) -> pd.DataFrame:
+    """Mirrors yfinance's auto_adjust: scales OHLC by Adj Close / Close and drops 'Adj Close'."""
+    if raw.empty:
+        return pd.DataFrame(columns=ADJUSTED_COLUMNS, index=raw.index)
+    ratio = (raw['Adj Close'] / raw['Close']).to_numpy()
+    adjusted = pd.DataFrame({
+        'Open': raw['Open'] * ratio,
+        'High': raw['High'] * ratio,
+        'Low': raw['Low'] * ratio,
+        'Close': raw['Adj Close'],
+        'Volume': raw['Volume'],
+    }, index=raw.index)
+    return adjusted
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical async calls: the first caller starts the
+    work, everyone arriving while it is in flight awaits the same task.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[int, Any], asyncio.Task] = {}
+
+    async def run(self, key: Any, func, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key) # Futures cannot be shared across event loops
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = loop.create_task(func(*args, **kwargs))
+            self._inflight[flight_key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(flight_key, None))
+        # Shielded so one cancelled waiter does not cancel the fetch for the others
+        result = await asyncio.shield(task)
+        # Callers routinely add columns to what they get back; hand each its own copy
+        return result.copy() if isinstance(result, pd.DataFrame) else result
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+
+def _request_key(kind: str, tickers: Any, kwargs: Dict[str, Any]) -> Tuple:
+    if isinstance(tickers, str):
+        tickers = tickers.replace(',', ' ').split()
+    symbols = tuple(sorted({str(t).upper().strip() for t in tickers}))
+    options = tuple(sorted((k, str(v)) for k, v in kwargs.items() if k not in ('progress', 'timeout', 'threads')))
+    return (kind, symbols, options)
+
+
+# --- Shared instances ---
+price_store = PriceStore()
+market_data_flights = SingleFlight()
+
+
+async def download_async(tickers: Any, **kwargs) -> pd.DataFrame:
+    """
+    Async yf.download-compatible call served from the shared store. Identical
+    requests already in flight are joined instead of issued again.
+    """
+    return await market_data_flights.run(
+        _request_key('download', tickers, kwargs),
+        asyncio.to_thread, price_store.download, tickers, **kwargs
+    )
+
+
+async def history_async(ticker: str, **kwargs) -> pd.DataFrame:
+    """Async Ticker.history-compatible call served from the shared store (coalesced)."""
+    return await market_data_flights.run(
+        _request_key('history', [ticker], kwargs),
+        asyncio.to_thread, price_store.get_history, ticker, **kwargs
+    )
@@ -0,0 +1,65 @@
+# process_pool.py
+# The one process pool behind every CPU-bound fan-out (GA backtests, forecast
+# model fitting, breakout chart rendering). A single pool keeps the whole app
+# inside one worker budget instead of each module sizing its own pool for the
+# full machine. Workers are started with forkserver (spawn where unavailable)
+# so they never inherit the server's threads, locks or open sockets.
+import os
+import random
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+# --- Constants ---
+PROCESS_WORKERS = max(1, min(8, (os.cpu_count() or 1) - 1)) # Worker budget shared by every caller
+WORKER_SEED = 1729 # Workers are reseeded so any sampling in a task is reproducible
+
+
+def _start_method() -> str:
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def _init_worker() -> None:
+    random.seed(WORKER_SEED)
+    np.random.seed(WORKER_SEED)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def pool_workers() -> int:
+    """Workers in the shared pool; callers split their work into this many chunks."""
+    return PROCESS_WORKERS
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared pool, started lazily. None on single-core hosts (callers use a thread)."""
+    global _pool
+    if PROCESS_WORKERS < 2:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context(_start_method()),
+                initializer=_init_worker
+            )
+        return _pool
+
+
+def reset_process_pool() -> None:
+    """Drops a broken pool; the next get_process_pool() starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def shutdown_process_pool() -> None:
+    """Stops the worker processes (they are restarted lazily on the next task)."""
+    reset_process_pool()
@@ -10,7 +10,6 @@ import sys
 import io
 import google.generativeai as genai # Ensure this is installed
 import logging
-import yfinance as yf
 from dateutil.relativedelta import relativedelta
 from typing import Dict, List, Any, Callable, Optional, Tuple
 import numpy as np
@@ -24,6 +23,18 @@ import uuid # Needed for temporary filenames
 import aiosqlite
 import statistics
 import requests
+import hashlib
+
+try:
+    from backend.integration.price_store import download_async
+    from backend.integration.rate_limiter import yahoo_rate_limiter, is_rate_limit_error
+    from backend.integration.backtest_command import load_backtest_data, parse_backtest_params
+    from backend.integration.backtest_pool import SharedFrame, evaluate_population_parallel
+except ImportError:
+    from integration.price_store import download_async
+    from integration.rate_limiter import yahoo_rate_limiter, is_rate_limit_error
+    from integration.backtest_command import load_backtest_data, parse_backtest_params
+    from integration.backtest_pool import SharedFrame, evaluate_population_parallel
 
 # --- Constants ---
 SYNTHESIZED_WORKFLOWS_FILE = 'synthesized_workflows.json'
@@ -34,6 +45,7 @@ LEARNED_MEMORY_FILE = 'prometheus_memory.json' # <-- Persist best params across
 PROMETHEUS_STATE_FILE = 'prometheus_state.json'
 DEFAULT_CORR_INTERVAL_HOURS = 6
 DEFAULT_WORKFLOW_CHANCE = 0.1
+FITNESS_CACHE_VERSION = 1 # Bump when backtest/simulation semantics change to orphan old fitness rows
 
 # --- Prometheus Core Logger ---
 prometheus_logger = logging.getLogger('PROMETHEUS_CORE')
@@ -63,8 +75,8 @@ def force_flush_logger():
 
 async def get_yf_download_robustly(tickers: list, **kwargs) -> pd.DataFrame:
     """ 
-    Robust wrapper for yf.download with random delays and retry logic.
-    Updated to be compatible with latest yfinance/curl_cffi.
+    Robust wrapper for yf.download with retry logic.
+    Upstream pacing is handled by the shared rate limiter in the price store.
     """
     max_retries = 3
     
@@ -79,13 +91,8 @@ async def get_yf_download_robustly(tickers: list, **kwargs) -> pd.DataFrame:
 
     for attempt in range(max_retries):
         try:
-            # ANTIBOT: Random sleep is the key to fixing the original timeouts.
-            # We wait 2-5 seconds between calls to space out the 20+ backtests.
-            sleep_time = random.uniform(2.0, 5.0) + (attempt * 2)
-            await asyncio.sleep(sleep_time)
-            
-            # Run blocking download in thread (No 'session' argument)
-            data = await asyncio.to_thread(yf.download, tickers=tickers, **kwargs)
+            # Served from the local price store; only the missing tail goes upstream
+            data = await download_async(tickers, **kwargs)
 
             if data is not None and not data.empty:
                 return data
@@ -94,10 +101,11 @@ async def get_yf_download_robustly(tickers: list, **kwargs) -> pd.DataFrame:
             prometheus_logger.warning(f"Attempt {attempt+1}: Empty data for {tickers}. Retrying...")
             
         except Exception as e:
-            error_msg = str(e)
-            if "Too Many Requests" in error_msg or "429" in error_msg:
-                prometheus_logger.warning(f"Rate limited on {tickers}. Cooling down for 15s...")
-                await asyncio.sleep(15)
+            if is_rate_limit_error(e):
+                # The limiter owns the cooldown; wait it out without taking a token
+                yahoo_rate_limiter.report_throttled()
+                prometheus_logger.warning(f"Rate limited on {tickers}. Waiting for the shared limiter...")
+                await yahoo_rate_limiter.acquire_async(0)
             else:
                 prometheus_logger.warning(f"Attempt {attempt+1} failed for {tickers}: {e}")
 
@@ -404,6 +412,23 @@ class Prometheus:
             if 'buy_hold_return_pct' not in conv_results_columns:
                 cursor.execute("ALTER TABLE convergence_results ADD COLUMN buy_hold_return_pct REAL")
 
+            # --- 5. fitness_cache Table (GA backtest results reused across runs) ---
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS fitness_cache (
+                strategy TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                data_window TEXT NOT NULL,
+                params_hash TEXT NOT NULL,
+                params_json TEXT,
+                fitness REAL,
+                sharpe_ratio REAL,
+                trade_count INTEGER,
+                buy_hold_return_pct REAL,
+                created_at TEXT,
+                PRIMARY KEY (strategy, ticker, data_window, params_hash)
+            )
+            """)
+
             conn.commit()
             prometheus_logger.info("KB schema verified (incl. backtest & B&H columns)."); 
             print("   -> Prometheus Core: Knowledge Base ready.")
@@ -1753,6 +1778,70 @@ class Prometheus:
 
 # --- NEW: Core Genetic Algorithm Functions ---
 
+    # --- Persistent Fitness Cache ---
+    def _fitness_data_window(self, data: pd.DataFrame) -> str:
+        """
+        Identifies the exact bars a backtest ran on: date span, bar count and a
+        fingerprint of the prices, so relative periods ('1y') or revised history
+        never hit stale fitness rows.
+        """
+        price_cols = [c for c in ['Open', 'High', 'Low', 'Close', 'Adj Close'] if c in data.columns]
+        fingerprint = hashlib.sha1(np.ascontiguousarray(data[price_cols].to_numpy(dtype=float)).tobytes()).hexdigest()[:16]
+        return f"{data.index[0].date()}:{data.index[-1].date()}:{len(data)}:{fingerprint}"
+
+    def _fitness_params_hash(self, params: Dict[str, Any]) -> str:
+        canonical = json.dumps({"v": FITNESS_CACHE_VERSION, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+    async def _load_cached_fitness(self, strategy: str, ticker: str, data_window: str, params_hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Returns {params_hash: backtest-style metrics} for the hashes already scored on this data window."""
+        found = {}
+        if not params_hashes:
+            return found
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                for i in range(0, len(params_hashes), 500): # Stay under SQLite's bound-parameter limit
+                    chunk = params_hashes[i:i + 500]
+                    cursor = await db.execute(
+                        f"""SELECT params_hash, fitness, sharpe_ratio, trade_count, buy_hold_return_pct
+                            FROM fitness_cache
+                            WHERE strategy = ? AND ticker = ? AND data_window = ? AND params_hash IN ({','.join('?' * len(chunk))})""",
+                        (strategy, ticker, data_window, *chunk)
+                    )
+                    for params_hash, fitness, sharpe, trades, buy_hold in await cursor.fetchall():
+                        found[params_hash] = {
+                            "total_return_pct": fitness,
+                            "sharpe_ratio": sharpe,
+                            "trade_count": trades,
+                            "buy_hold_return_pct": buy_hold
+                        }
+        except Exception as e:
+            prometheus_logger.warning(f"Fitness cache lookup failed: {e}")
+        return found
+
+    async def _store_cached_fitness(self, strategy: str, ticker: str, data_window: str, rows: List[Tuple[str, Dict[str, Any], Dict[str, Any]]]):
+        """Persists (params_hash, params, result) rows for successful backtests."""
+        if not rows:
+            return
+        now = datetime.now().isoformat()
+        values = [
+            (strategy, ticker, data_window, params_hash, json.dumps(params, sort_keys=True, default=str),
+             float(result.get("total_return_pct", -999.0)), result.get("sharpe_ratio", 0.0),
+             result.get("trade_count", 0), result.get("buy_hold_return_pct", 0.0), now)
+            for params_hash, params, result in rows
+        ]
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.executemany(
+                    """INSERT OR REPLACE INTO fitness_cache
+                       (strategy, ticker, data_window, params_hash, params_json, fitness, sharpe_ratio, trade_count, buy_hold_return_pct, created_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    values
+                )
+                await db.commit()
+        except Exception as e:
+            prometheus_logger.warning(f"Fitness cache write failed: {e}")
+
     def _select_parents(self, population_with_fitness: List[Tuple[Dict[str, Any], float]], num_parents: int) -> List[Dict[str, Any]]:
         """
         Selects the top-performing individuals as parents for the next generation.
@@ -1976,8 +2065,11 @@ class Prometheus:
         generations: int = 10, 
         population_size: int = 20, 
         num_parents: int = 10, 
-        mutation_rate: float = 0.1
+        mutation_rate: float = 0.1,
+        write_status: bool = True
     ) -> Tuple[Optional[Dict[str, Any]], float, Dict[str, Any]]:
+        # write_status=False keeps concurrent runs (convergence cells) from all
+        # overwriting the single optimization_status.json the UI polls
         
         start_time = datetime.now()
         
@@ -2018,128 +2110,189 @@ class Prometheus:
         # Cache to avoid re-running same params
         fitness_cache = {} 
 
-        for gen in range(generations):
-            prometheus_logger.info(f"--- [Generation {gen+1}/{generations}] ---")
+        # Backtest runs share one price series: load it once instead of once per genome
+        preloaded_data = None
+        preloaded_period = ""
+        if command_name.strip('/') == "backtest":
+            preloaded_data, preloaded_period = await load_backtest_data(ticker.upper(), period=period.lower() if period else None, start=start_date, end=end_date)
+            if preloaded_data.empty:
+                prometheus_logger.warning(f"Optimization: no preloaded data for {ticker}; falling back to per-genome /backtest calls.")
+                preloaded_data = None
+        # Published once to shared memory so pool workers don't receive the frame with every batch
+        shared_frame = None
+        fitness_window = None
+        if preloaded_data is not None:
+            fitness_window = self._fitness_data_window(preloaded_data)
+            try:
+                shared_frame = SharedFrame(preloaded_data)
+            except Exception as e:
+                prometheus_logger.warning(f"Optimization: could not share price data with workers ({e}); scoring in-process.")
+
+        try:
+            for gen in range(generations):
+                prometheus_logger.info(f"--- [Generation {gen+1}/{generations}] ---")
             
-            # Identify new individuals
-            new_individuals = []
-            for ind in population:
-                ind_hash = self.make_hashable(ind)
-                if ind_hash not in fitness_cache:
-                    new_individuals.append(ind)
+                # Identify new individuals
+                new_individuals = []
+                for ind in population:
+                    ind_hash = self.make_hashable(ind)
+                    if ind_hash not in fitness_cache:
+                        new_individuals.append(ind)
             
-            # Run backtests for new individuals
-            if new_individuals:
-                prometheus_logger.info(f" -> Queuing {len(new_individuals)} new backtests...")
-                # In a real scenario, you might parallelize this. 
-                # For safety/rate-limits, we run sequentially or in small batches.
-                for ind in new_individuals:
-                    # Construct args. If using /backtest, args are [ticker, strategy, period, json_params]
-                    params_json = json.dumps(ind)
-                    period_arg = period if period else json.dumps({"start": start_date, "end": end_date})
-                    
-                    # Execute
-                    result = await self.execute_and_log(
-                        command_name_with_slash=f"{command_name.strip('/')}",
-                        args=[ticker, strategy_name, period_arg, params_json],
-                        called_by_user=False,
-                        internal_call=True
-                    )
-                    
-                    # YIELD CONTROL to allow API requests (logs/status) to be processed
-                    await asyncio.sleep(0)
+                # Run backtests for new individuals
+                if new_individuals:
+                    prometheus_logger.info(f" -> Queuing {len(new_individuals)} new backtests...")
+                    if preloaded_data is not None:
+                        # Score the whole batch against the shared frame, fanned out across the process
+                        # pool (indicators are computed once per distinct window within each chunk).
+                        batch_results = [None] * len(new_individuals)
+                        parsed = {}
+                        for i, ind in enumerate(new_individuals):
+                            try:
+                                params = parse_backtest_params(strategy_name.lower(), [json.dumps(ind)])
+                                parsed[i] = (params, self._fitness_params_hash(params))
+                            except Exception as e:
+                                batch_results[i] = {"status": "error", "message": f"{type(e).__name__} - {e}"}
+
+                        # Genomes already scored on these exact bars (any earlier run) skip the backtest
+                        cached = await self._load_cached_fitness(
+                            strategy_name.lower(), ticker.upper(), fitness_window, sorted({h for _, h in parsed.values()})
+                        )
+                        batch_slots = [i for i, (_, params_hash) in parsed.items() if params_hash not in cached]
+                        if len(batch_slots) < len(parsed):
+                            prometheus_logger.info(f" -> {len(parsed) - len(batch_slots)} genomes served from the persistent fitness cache.")
+                        batch_params = [parsed[i][0] for i in batch_slots]
+                        try:
+                            evaluated = await evaluate_population_parallel(
+                                preloaded_data, shared_frame, ticker.upper(), strategy_name.lower(), batch_params, preloaded_period
+                            ) if batch_params else []
+                        except Exception as e:
+                            evaluated = [{"status": "error", "message": f"{type(e).__name__} - {e}"}] * len(batch_params)
+                        for i, result in zip(batch_slots, evaluated):
+                            batch_results[i] = result
+                        for i, (_, params_hash) in parsed.items():
+                            if params_hash in cached:
+                                batch_results[i] = {"status": "success", **cached[params_hash]}
+
+                        new_rows = [
+                            (parsed[i][1], parsed[i][0], result) for i, result in zip(batch_slots, evaluated)
+                            if isinstance(result, dict) and result.get("status") == "success"
+                        ]
+                        await self._store_cached_fitness(strategy_name.lower(), ticker.upper(), fitness_window, new_rows)
+                    else:
+                        batch_results = None
+
+                    for idx, ind in enumerate(new_individuals):
+                        if batch_results is not None:
+                            result = batch_results[idx]
+                        else:
+                            # Construct args. If using /backtest, args are [ticker, strategy, period, json_params]
+                            params_json = json.dumps(ind)
+                            period_arg = period if period else json.dumps({"start": start_date, "end": end_date})
+                            result = await self.execute_and_log(
+                                command_name_with_slash=f"{command_name.strip('/')}",
+                                args=[ticker, strategy_name, period_arg, params_json],
+                                called_by_user=False,
+                                internal_call=True
+                            )
+                            # YIELD CONTROL to allow API requests (logs/status) to be processed
+                            await asyncio.sleep(0)
                     
-                    # Process result
-                    ind_hash = self.make_hashable(ind)
-                    if isinstance(result, dict) and result.get("status") == "success":
-                        fitness = float(result.get("total_return_pct", -999.0))
-                        fitness_cache[ind_hash] = {
-                            "fitness": fitness,
-                            "metrics": {
-                                "sharpe_ratio": result.get("sharpe_ratio", 0.0),
-                                "trade_count": result.get("trade_count", 0),
-                                "buy_hold_return_pct": result.get("buy_hold_return_pct", 0.0)
+                        # Process result
+                        ind_hash = self.make_hashable(ind)
+                        if isinstance(result, dict) and result.get("status") == "success":
+                            fitness = float(result.get("total_return_pct", -999.0))
+                            fitness_cache[ind_hash] = {
+                                "fitness": fitness,
+                                "metrics": {
+                                    "sharpe_ratio": result.get("sharpe_ratio", 0.0),
+                                    "trade_count": result.get("trade_count", 0),
+                                    "buy_hold_return_pct": result.get("buy_hold_return_pct", 0.0)
+                                }
                             }
-                        }
-                    else:
-                        # Penalty for failure
-                        fitness_cache[ind_hash] = {"fitness": -999.0, "metrics": {}}
-                        error_msg = result.get('message', 'Unknown error') if isinstance(result, dict) else str(result)
-                        prometheus_logger.warning(f"Generation {gen+1}: Backtest failed for params {ind}. Error: {error_msg[:100]}...")
-
-            # Evaluate entire population
-            pop_with_fitness = []
-            for ind in population:
-                ind_hash = self.make_hashable(ind)
-                data = fitness_cache.get(ind_hash, {"fitness": -999.0, "metrics": {}})
-                pop_with_fitness.append((ind, data["fitness"], data["metrics"]))
+                        else:
+                            # Penalty for failure
+                            fitness_cache[ind_hash] = {"fitness": -999.0, "metrics": {}}
+                            error_msg = result.get('message', 'Unknown error') if isinstance(result, dict) else str(result)
+                            prometheus_logger.warning(f"Generation {gen+1}: Backtest failed for params {ind}. Error: {error_msg[:100]}...")
+
+                # Evaluate entire population
+                pop_with_fitness = []
+                for ind in population:
+                    ind_hash = self.make_hashable(ind)
+                    data = fitness_cache.get(ind_hash, {"fitness": -999.0, "metrics": {}})
+                    pop_with_fitness.append((ind, data["fitness"], data["metrics"]))
             
-            # Sort descending by fitness (Return %)
-            pop_with_fitness.sort(key=lambda x: x[1], reverse=True)
+                # Sort descending by fitness (Return %)
+                pop_with_fitness.sort(key=lambda x: x[1], reverse=True)
             
-            # Check for new best
-            current_best_ind, current_best_fit, current_best_met = pop_with_fitness[0]
-            if current_best_fit > best_fitness:
-                best_fitness = current_best_fit
-                best_params = current_best_ind # This is the hashable version
-                best_individual = current_best_ind # Store the actual dict
-                best_metrics = current_best_met # Capture the metrics of the winner!
+                # Check for new best
+                current_best_ind, current_best_fit, current_best_met = pop_with_fitness[0]
+                if current_best_fit > best_fitness:
+                    best_fitness = current_best_fit
+                    best_params = current_best_ind # This is the hashable version
+                    best_individual = current_best_ind # Store the actual dict
+                    best_metrics = current_best_met # Capture the metrics of the winner!
                 
-                # Live Update for UI
-                live_data = {
-                    "best_params": best_individual,
-                    "best_return": best_fitness,
-                    "buy_hold_return": best_metrics.get('buy_hold_return_pct', 0.0),
-                    "sharpe_ratio": best_metrics.get('sharpe_ratio', 0.0),
-                    "trade_count": best_metrics.get('trade_count', 0),
-                    "generation": gen + 1,
-                    "status": "running",
-                    "previous_best_return": previous_best_return # <-- Passed to UI
-                }
-                prometheus_logger.debug(f"[LIVE UPDATE] {json.dumps(live_data)}")
+                    # Live Update for UI
+                    live_data = {
+                        "best_params": best_individual,
+                        "best_return": best_fitness,
+                        "buy_hold_return": best_metrics.get('buy_hold_return_pct', 0.0),
+                        "sharpe_ratio": best_metrics.get('sharpe_ratio', 0.0),
+                        "trade_count": best_metrics.get('trade_count', 0),
+                        "generation": gen + 1,
+                        "status": "running",
+                        "previous_best_return": previous_best_return # <-- Passed to UI
+                    }
+                    prometheus_logger.debug(f"[LIVE UPDATE] {json.dumps(live_data)}")
                 
-                # --- NEW: Save to status file for API ---
-                try:
-                    with open("optimization_status.json", "w") as f:
-                        json.dump(live_data, f)
-                except Exception as e:
-                    prometheus_logger.error(f"Failed to write optimization_status.json: {e}")
-                # ----------------------------------------
-
-                prometheus_logger.info(f" -> Best Fitness (Return %) in Gen {gen+1}: {best_fitness:.2f}%")
-                prometheus_logger.info(f"    Params: {best_individual}")
-                prometheus_logger.info(f"    ✨ New Overall Best Found! ✨")
-            else:
-                prometheus_logger.info(f" -> Best Fitness in Gen {gen+1}: {current_best_fit:.2f}% (Overall Best: {best_fitness:.2f}%)")
-                # Also update status file even if no new best, just to convert generation count? 
-                # Ideally yes, but let's stick to updating on new best or at end of gen.
-                # Actually, user wants "Current Generation" displayed.
+                    # --- NEW: Save to status file for API ---
+                    if write_status:
+                        try:
+                            with open("optimization_status.json", "w") as f:
+                                json.dump(live_data, f)
+                        except Exception as e:
+                            prometheus_logger.error(f"Failed to write optimization_status.json: {e}")
+                    # ----------------------------------------
+
+                    prometheus_logger.info(f" -> Best Fitness (Return %) in Gen {gen+1}: {best_fitness:.2f}%")
+                    prometheus_logger.info(f"    Params: {best_individual}")
+                    prometheus_logger.info(f"    ✨ New Overall Best Found! ✨")
+                else:
+                    prometheus_logger.info(f" -> Best Fitness in Gen {gen+1}: {current_best_fit:.2f}% (Overall Best: {best_fitness:.2f}%)")
+                    # Also update status file even if no new best, just to convert generation count? 
+                    # Ideally yes, but let's stick to updating on new best or at end of gen.
+                    # Actually, user wants "Current Generation" displayed.
                 
-            # Update status file at end of EVERY generation to show progress (Gen X/Y)
-            try:
-                current_status = {
-                    "best_params": best_individual,
-                    "best_return": best_fitness,
-                    "buy_hold_return": best_metrics.get('buy_hold_return_pct', 0.0),
-                    "sharpe_ratio": best_metrics.get('sharpe_ratio', 0.0),
-                    "trade_count": best_metrics.get('trade_count', 0),
-                    "generation": gen + 1,
-                    "status": "running"
-                }
-                with open("optimization_status.json", "w") as f:
-                    json.dump(current_status, f)
-            except Exception as e:
-                prometheus_logger.error(f"Failed to write optimization_status.json: {e}")
-
-
-            # Evolution (Selection, Crossover, Mutation)
-            if gen < generations - 1:
-                parents = self._select_parents(pop_with_fitness, num_parents)
-                offspring = self._crossover(parents, population_size - len(parents))
-                offspring = self._mutate(offspring, command_name, strategy_name, mutation_rate)
-                population = parents + offspring
-                prometheus_logger.info(f" -> New generation size: {len(population)}")
-
+                # Update status file at end of EVERY generation to show progress (Gen X/Y)
+                if write_status:
+                    try:
+                        current_status = {
+                            "best_params": best_individual,
+                            "best_return": best_fitness,
+                            "buy_hold_return": best_metrics.get('buy_hold_return_pct', 0.0),
+                            "sharpe_ratio": best_metrics.get('sharpe_ratio', 0.0),
+                            "trade_count": best_metrics.get('trade_count', 0),
+                            "generation": gen + 1,
+                            "status": "running"
+                        }
+                        with open("optimization_status.json", "w") as f:
+                            json.dump(current_status, f)
+                    except Exception as e:
+                        prometheus_logger.error(f"Failed to write optimization_status.json: {e}")
+
+
+                # Evolution (Selection, Crossover, Mutation)
+                if gen < generations - 1:
+                    parents = self._select_parents(pop_with_fitness, num_parents)
+                    offspring = self._crossover(parents, population_size - len(parents))
+                    offspring = self._mutate(offspring, command_name, strategy_name, mutation_rate)
+                    population = parents + offspring
+                    prometheus_logger.info(f" -> New generation size: {len(population)}")
+        finally:
+            if shared_frame is not None:
+                shared_frame.close()
         prometheus_logger.info("--- Optimization Finished ---")
         if best_individual:
             prometheus_logger.info("🏆 Best Parameters Found:")
@@ -2156,8 +2309,9 @@ class Prometheus:
             
             # --- NEW: Save final status ---
             try:
-                with open("optimization_status.json", "w") as f:
-                    json.dump(optimization_result_data, f)
+                if write_status:
+                    with open("optimization_status.json", "w") as f:
+                        json.dump(optimization_result_data, f)
                     
                 if best_individual:
                     self._save_learned_memory(strategy_name, ticker, best_individual, best_fitness, period)
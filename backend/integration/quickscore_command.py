@@ -1,14 +1,12 @@
 # --- quickscore_command.py ---
 # Standalone module for the /quickscore command.
 
-import yfinance as yf
 import pandas as pd
 import asyncio
 import uuid
 import matplotlib
 matplotlib.use('Agg') # Set backend for non-GUI environments
 import matplotlib.pyplot as plt
-import numpy as np
 import io
 import base64
 from tabulate import tabulate
@@ -20,6 +18,7 @@ except ImportError:
         from usage_counter import increment_usage
     except ImportError:
         def increment_usage(*args): pass
+from backend.integration.price_store import price_store, history_async, LIVE_MAX_AGE
 
 # --- Dependencies for this command ---
 YFINANCE_API_SEMAPHORE = asyncio.Semaphore(8)
@@ -27,12 +26,10 @@ YFINANCE_API_SEMAPHORE = asyncio.Semaphore(8)
 async def calculate_ema_invest(ticker: str, ema_interval: int, is_called_by_ai: bool = False) -> tuple[Optional[float], Optional[float]]:
     """Calculates EMA-based investment score for a ticker."""
     async with YFINANCE_API_SEMAPHORE:
-        stock = yf.Ticker(ticker.replace('.', '-'))
         interval_map = {1: "1wk", 2: "1d", 3: "1h"}
         period_map = {1: "max", 2: "10y", 3: "2y"}
         try:
-            await asyncio.sleep(np.random.uniform(0.1, 0.3))
-            data = await asyncio.to_thread(stock.history, period=period_map.get(ema_interval, "2y"), interval=interval_map.get(ema_interval, "1h"))
+            data = await history_async(ticker.replace('.', '-'), period=period_map.get(ema_interval, "2y"), interval=interval_map.get(ema_interval, "1h"), max_age=LIVE_MAX_AGE)
             if data.empty or 'Close' not in data.columns: return None, None
             data['EMA_8'] = data['Close'].ewm(span=8, adjust=False).mean()
             data['EMA_55'] = data['Close'].ewm(span=55, adjust=False).mean()
@@ -49,13 +46,12 @@ async def calculate_ema_invest(ticker: str, ema_interval: int, is_called_by_ai:
 def plot_ticker_graph(ticker: str, ema_interval: int, is_called_by_ai: bool = False) -> Optional[str]:
     """Generates and saves a price/EMA graph for a ticker."""
     ticker_yf_format = ticker.replace('.', '-')
-    stock = yf.Ticker(ticker_yf_format)
     interval_map = {1: "1wk", 2: "1d", 3: "1h"}
     period_map = {1: "5y", 2: "1y", 3: "6mo"}
     interval_str = interval_map.get(ema_interval, "1h")
     period_str = period_map.get(ema_interval, "1y")
     try:
-        data = stock.history(period=period_str, interval=interval_str)
+        data = price_store.get_history(ticker_yf_format, period=period_str, interval=interval_str)
         if data.empty or 'Close' not in data.columns: raise ValueError("No data")
         data['EMA_55'] = data['Close'].ewm(span=55, adjust=False).mean()
         data['EMA_8'] = data['Close'].ewm(span=8, adjust=False).mean()
@@ -91,7 +87,6 @@ def plot_ticker_graph(ticker: str, ema_interval: int, is_called_by_ai: bool = Fa
 async def get_chart_data(ticker: str, ema_interval: int) -> List[Dict]:
     """Generates JSON data for frontend charts."""
     ticker_yf_format = ticker.replace('.', '-')
-    stock = yf.Ticker(ticker_yf_format)
     interval_map = {1: "1wk", 2: "1d", 3: "1h"}
     # Match plot_ticker_graph periods
     period_map = {1: "5y", 2: "1y", 3: "6mo"} 
@@ -100,7 +95,7 @@ async def get_chart_data(ticker: str, ema_interval: int) -> List[Dict]:
     
     try:
         # Run in thread since yfinance is blocking
-        data = await asyncio.to_thread(stock.history, period=period_str, interval=interval_str)
+        data = await history_async(ticker_yf_format, period=period_str, interval=interval_str)
         if data.empty or 'Close' not in data.columns: return []
         
         data['EMA_55'] = data['Close'].ewm(span=55, adjust=False).mean()
@@ -0,0 +1,130 @@
+# rate_limiter.py
+# Process-wide token bucket for upstream market-data calls (Yahoo Finance).
+# Replaces the blind random sleeps that used to precede every download: callers
+# take a token before each request, and the refill rate adapts to what upstream
+# actually tolerates (multiplicative decrease on 429, additive increase on success).
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Any
+
+# --- Defaults (requests per second) ---
+YAHOO_RATE = 8.0
+YAHOO_MIN_RATE = 0.5
+YAHOO_MAX_RATE = 20.0
+YAHOO_BURST = 20
+
+THROTTLE_BACKOFF_BASE = 5.0   # First cooldown after a 429 (seconds), doubles per consecutive 429
+THROTTLE_BACKOFF_MAX = 120.0
+THROTTLE_PENALTY = 0.5
+RECOVERY_STEP = 0.05          # Added to the rate after each successful call
+
+rate_limiter_logger = logging.getLogger('RATE_LIMITER')
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for yfinance/HTTP errors that mean 'slow down'."""
+    text = f"{type(error).__name__} {error}".lower()
+    return 'ratelimit' in text or 'rate limit' in text or 'too many requests' in text or '429' in text
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with AIMD rate adaptation.
+
+    Fetches run both on the event loop (acquire_async) and inside
+    asyncio.to_thread workers (acquire), so the bucket state is guarded by a
+    plain threading.Lock and waiting always happens outside of it.
+    """
+
+    def __init__(self, rate: float, capacity: int, min_rate: float, max_rate: float, name: str = 'bucket'):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._cooldown_until = 0.0
+        self._consecutive_throttles = 0
+        self._lock = threading.Lock()
+
+    def _try_take(self, tokens: float) -> float:
+        """Takes tokens if available and returns 0, otherwise returns the seconds to wait."""
+        tokens = min(tokens, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            if now < self._cooldown_until:
+                return self._cooldown_until - now
+            # Nothing accrues during a cooldown, so its end does not release a full burst
+            refill_from = max(self._last_refill, self._cooldown_until)
+            self._tokens = min(self.capacity, self._tokens + max(0.0, now - refill_from) * self.rate)
+            self._last_refill = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Blocks the calling (worker) thread until tokens are available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            wait = self._try_take(tokens)
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        """Event-loop friendly variant of acquire()."""
+        waited = 0.0
+        while True:
+            wait = self._try_take(tokens)
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def report_success(self) -> None:
+        with self._lock:
+            self._consecutive_throttles = 0
+            self.rate = min(self.max_rate, self.rate + RECOVERY_STEP)
+
+    def report_empty(self) -> None:
+        # Delisted or invalid symbols legitimately come back empty; only 429s slow the bucket down
+        pass
+
+    def report_throttled(self) -> None:
+        with self._lock:
+            self._consecutive_throttles += 1
+            self.rate = max(self.min_rate, self.rate * THROTTLE_PENALTY)
+            backoff = min(THROTTLE_BACKOFF_MAX, THROTTLE_BACKOFF_BASE * 2 ** (self._consecutive_throttles - 1))
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + backoff)
+            self._tokens = 0.0
+        rate_limiter_logger.warning(f"{self.name}: upstream throttled; cooling down {backoff:.0f}s, rate now {self.rate:.2f}/s")
+
+    def report_result(self, data: Any) -> None:
+        """Convenience: classify a returned frame (None/empty vs. data)."""
+        if data is None or getattr(data, 'empty', False):
+            self.report_empty()
+        else:
+            self.report_success()
+
+    def report_error(self, error: BaseException) -> None:
+        if is_rate_limit_error(error):
+            self.report_throttled()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'name': self.name,
+                'rate': round(self.rate, 3),
+                'tokens': round(self._tokens, 2),
+                'cooldown_remaining': max(0.0, round(self._cooldown_until - time.monotonic(), 2)),
+                'consecutive_throttles': self._consecutive_throttles,
+            }
+
+
+# --- Shared instance for every Yahoo Finance fetch path ---
+yahoo_rate_limiter = TokenBucket(YAHOO_RATE, YAHOO_BURST, YAHOO_MIN_RATE, YAHOO_MAX_RATE, name='yahoo')
@@ -0,0 +1,160 @@
+# result_cache.py
+# Short-lived cache for whole-universe command results (Market scores,
+# Breakout, Cultivate). A result is keyed by command, arguments and the
+# as-of bucket of the bar interval it was computed from, so everyone asking
+# within the same refresh window shares one computation. Entries are dropped
+# early when the price store pulls changed bars for a ticker they depend on.
+import copy
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+try:
+    from backend.integration.price_store import REFRESH_TTL, SingleFlight, price_store
+except ImportError:
+    from integration.price_store import REFRESH_TTL, SingleFlight, price_store
+
+# --- Constants ---
+DEFAULT_RESULT_TTL = 900 # Seconds, for intervals REFRESH_TTL does not list
+MAX_RESULTS = 64
+
+result_cache_logger = logging.getLogger('RESULT_CACHE')
+
+Dependencies = Union[None, Iterable[str], Callable[[Any], Optional[Iterable[str]]]]
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable, order-stable form of a command's arguments."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(v) for v in value))
+    if isinstance(value, float):
+        return round(value, 6)
+    return value
+
+
+def _symbol(ticker: Any) -> str:
+    return str(ticker).replace('.', '-').upper().strip()
+
+
+class _Result:
+    __slots__ = ('value', 'interval', 'tickers', 'expires_at')
+
+    def __init__(self, value: Any, interval: str, tickers: Optional[frozenset], expires_at: float):
+        self.value = value
+        self.interval = interval
+        self.tickers = tickers
+        self.expires_at = expires_at
+
+
+class ResultCache:
+    """
+    (command, args, as-of) -> result, valid until the end of the interval's
+    refresh bucket (REFRESH_TTL) or until one of its tickers is refreshed with
+    changed bars, whichever comes first. Concurrent misses for the same key
+    are coalesced, and every caller receives its own deep copy.
+    """
+
+    def __init__(self):
+        self._results: Dict[Tuple, _Result] = {}
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    # --- Keys ---
+    @staticmethod
+    def ttl(interval: str) -> int:
+        return REFRESH_TTL.get(interval, DEFAULT_RESULT_TTL)
+
+    @classmethod
+    def as_of(cls, interval: str, now: Optional[float] = None) -> int:
+        """Start (epoch seconds) of the refresh bucket `now` falls in."""
+        ttl = cls.ttl(interval)
+        now = time.time() if now is None else now
+        return int(now // ttl) * ttl
+
+    def key(self, command: str, args: Any, interval: str, now: Optional[float] = None) -> Tuple:
+        return (command, _freeze(args), interval, self.as_of(interval, now))
+
+    # --- Lookup / store ---
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """(hit, deep copy of the cached value)."""
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None and time.time() >= result.expires_at:
+                del self._results[key]
+                result = None
+        if result is None:
+            return False, None
+        return True, copy.deepcopy(result.value)
+
+    def put(self, key: Tuple, value: Any, tickers: Optional[Iterable[str]] = None) -> None:
+        interval, as_of = key[2], key[3]
+        symbols = frozenset(_symbol(t) for t in tickers) if tickers is not None else None
+        with self._lock:
+            self._results[key] = _Result(value, interval, symbols, as_of + self.ttl(interval))
+            if len(self._results) > MAX_RESULTS:
+                oldest = min(self._results, key=lambda k: self._results[k].expires_at)
+                del self._results[oldest]
+
+    async def get_or_compute(
+        self,
+        command: str,
+        args: Any,
+        compute: Callable[[], Any],
+        interval: str = '1d',
+        tickers: Dependencies = None,
+        cacheable: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Returns the cached result for (command, args) in the current bucket, or
+        awaits `compute()` (a coroutine factory) once for all concurrent callers.
+        `tickers` (or a function of the result returning them) limits which
+        price-store refreshes invalidate the entry; None means any refresh of
+        `interval`. Results rejected by `cacheable`, and exceptions, are not kept.
+        """
+        key = self.key(command, args, interval)
+        hit, value = self.get(key)
+        if hit:
+            result_cache_logger.info(f"Serving cached {command} result (as of {key[3]}).")
+            return value
+
+        async def run() -> Any:
+            value = await compute()
+            if cacheable is None or cacheable(value):
+                self.put(key, value, tickers(value) if callable(tickers) else tickers)
+            return value
+
+        value = await self._flights.run(key, run)
+        return copy.deepcopy(value)
+
+    # --- Invalidation ---
+    def invalidate(self, command: Optional[str] = None) -> int:
+        """Drops every result (or every result of one command). Returns the number dropped."""
+        with self._lock:
+            keys = [k for k in self._results if command is None or k[0] == command]
+            for k in keys:
+                del self._results[k]
+        return len(keys)
+
+    def note_refresh(self, ticker: str, interval: str) -> None:
+        """Price-store listener: drops results that depend on `ticker` at `interval`."""
+        symbol = _symbol(ticker)
+        with self._lock:
+            stale = [k for k, r in self._results.items()
+                     if r.interval == interval and (r.tickers is None or symbol in r.tickers)]
+            for k in stale:
+                del self._results[k]
+        if stale:
+            result_cache_logger.info(f"{symbol} {interval} refreshed; dropped {len(stale)} cached result(s).")
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+
+# --- Shared instance ---
+result_cache = ResultCache()
+price_store.add_refresh_listener(result_cache.note_refresh)
@@ -1,11 +1,10 @@
 # --- Imports for risk_command ---
 import asyncio
 import os
-import csv
+import time
 import logging
 import uuid
 from typing import Optional, List, Dict, Any
-from io import StringIO
 from datetime import datetime, timedelta
 import tabulate
 
@@ -13,11 +12,9 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 import pytz
-import requests
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-from scipy.stats import percentileofscore
 try:
     from backend.usage_counter import increment_usage
 except ImportError:
@@ -25,14 +22,29 @@ except ImportError:
         from usage_counter import increment_usage
     except ImportError:
         def increment_usage(*args): pass
+try:
+    from backend.integration.index_constituents import get_index_constituents
+    from backend.integration.matrix_cache import MatrixCache
+    from backend.integration.price_store import price_store
+    from backend.integration.rate_limiter import yahoo_rate_limiter
+    from backend.integration.risk_state import risk_state_store, MarketHistoryWindow
+except ImportError:
+    from integration.index_constituents import get_index_constituents
+    from integration.matrix_cache import MatrixCache
+    from integration.price_store import price_store
+    from integration.rate_limiter import yahoo_rate_limiter
+    from integration.risk_state import risk_state_store, MarketHistoryWindow
 
 # --- Global Constants and Configuration ---
 EST_TIMEZONE = pytz.timezone('US/Eastern')
 RISK_CSV_FILE = 'market_data.csv'
 RISK_EOD_CSV_FILE = 'risk_eod_data.csv'
 RISK_LOG_FILE = 'risk_calculations.log'
-SP500_CACHE_FILE = 'sp500_risk_cache.csv'
-SP100_CACHE_FILE = 'sp100_risk_cache.csv'
+SP500_CACHE_FILE = 'sp500_risk_cache' # MatrixCache segment directories
+SP100_CACHE_FILE = 'sp100_risk_cache'
+CACHE_CHUNK_SIZE = 50
+TAIL_REFRESH_OVERLAP_DAYS = 5 # Re-fetched behind the last cached bar so late corrections land
+MARKET_CLOSE_HOUR = 16 # US/Eastern; a session's daily bar is final after this
 
 # --- Logging Setup ---
 risk_logger = logging.getLogger('RISK_MODULE_EXTERNAL')
@@ -46,15 +58,17 @@ if not risk_logger.hasHandlers():
 
 # --- NEW: Download Helper with Timeout and Retry Logic ---
 async def _download_with_retry(tickers: List[str], timeout: int, **kwargs) -> pd.DataFrame:
-    """Wraps yf.download with a strict timeout and a retry loop."""
+    """Wraps yf.download with a strict timeout and a retry loop, paced by the shared rate limiter."""
     max_retries = 3
     for attempt in range(max_retries):
         try:
+            await yahoo_rate_limiter.acquire_async(len(tickers))
             # Create the blocking yfinance task
             download_task = asyncio.to_thread(yf.download, tickers=tickers, progress=False, **kwargs)
             
             # Wrap the task in asyncio.wait_for to enforce the timeout
             data = await asyncio.wait_for(download_task, timeout=timeout)
+            yahoo_rate_limiter.report_result(data)
             return data # Success
             
         except asyncio.TimeoutError:
@@ -64,6 +78,7 @@ async def _download_with_retry(tickers: List[str], timeout: int, **kwargs) -> pd
             else:
                 risk_logger.info(f"[RISK_DEBUG]     ! All retry attempts failed for this batch.")
         except Exception as e:
+            yahoo_rate_limiter.report_error(e)
             risk_logger.info(f"[RISK_DEBUG]     ! An unexpected download error occurred: {e}")
             break # Do not retry on other errors
     
@@ -73,125 +88,180 @@ async def _download_with_retry(tickers: List[str], timeout: int, **kwargs) -> pd
 # --- Helper Functions ---
 
 def get_sp500_symbols_singularity() -> List[str]:
-    try:
-        url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        df = pd.read_html(StringIO(response.text))[0]
-        symbols = [str(s).replace('.', '-') for s in df['Symbol'].tolist() if isinstance(s, str)]
-        return sorted(list(set(symbols)))
-    except Exception as e:
-        risk_logger.info(f"[RISK_DEBUG] FAILED to fetch S&P 500 symbols: {e}")
-        return []
+    symbols = get_index_constituents('sp500')
+    if not symbols:
+        risk_logger.info(f"[RISK_DEBUG] FAILED to fetch S&P 500 symbols.")
+    return symbols
 
 def get_sp100_symbols_risk() -> list:
+    symbols = get_index_constituents('sp100')
+    if not symbols:
+        risk_logger.info(f"[RISK_DEBUG] FAILED to fetch S&P 100 symbols.")
+    return symbols
+
+def _last_closed_session(now: Optional[datetime] = None) -> datetime:
+    """Close time (US/Eastern) of the latest weekday session that has ended. Exchange holidays are not known here."""
+    now = datetime.now(EST_TIMEZONE) if now is None else now.astimezone(EST_TIMEZONE)
+    day = now.date() if now.hour >= MARKET_CLOSE_HOUR else now.date() - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return EST_TIMEZONE.localize(datetime(day.year, day.month, day.day, MARKET_CLOSE_HOUR))
+
+def _tail_checked_at(cache_filename: str) -> float:
     try:
-        url = 'https://en.wikipedia.org/wiki/S%26P_100'
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        df = pd.read_html(StringIO(response.text))[2]
-        symbols = df['Symbol'].tolist()
-        return [s.replace('.', '-') for s in symbols if isinstance(s, str)]
-    except Exception as e:
-        risk_logger.info(f"[RISK_DEBUG] FAILED to fetch S&P 100 symbols: {e}")
-        return []
+        with open(f"{cache_filename}.tail_checked", 'r') as f:
+            return float(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0.0
+
+def _mark_tail_checked(cache_filename: str) -> None:
+    try:
+        with open(f"{cache_filename}.tail_checked", 'w') as f:
+            f.write(str(time.time()))
+    except OSError as e:
+        risk_logger.info(f"[RISK_DEBUG] Could not record tail refresh time for {cache_filename}: {e}")
 
 async def fetch_and_cache_data(symbols: List[str], cache_filename: str, period: str):
-    
-    cached_tickers = set()
-    if os.path.exists(cache_filename):
-        cached_df = pd.read_csv(cache_filename, header=[0, 1], index_col=0, parse_dates=True)
-        cached_tickers = set(cached_df.columns.get_level_values(1))
-        
-        last_date = cached_df.index.max()
-        if last_date.date() >= datetime.now().date() - timedelta(days=1) and len(cached_tickers) >= len(symbols):
-            return cached_df
+    """
+    Returns the yf.download-shaped frame for `symbols`, keeping an incremental
+    on-disk cache: tickers not cached yet are downloaded for the full `period`,
+    and once a session has closed after the last cached bar, only the latest
+    bars are fetched for the rest. The time of each tail fetch is recorded, so
+    weekends and holidays (where the last bar cannot move) refresh at most once.
+    Each download is appended as a new cache segment; nothing is rewritten.
+    """
+    cache = MatrixCache(cache_filename)
+    legacy_csv = f"{cache_filename}.csv"
+    if not cache.exists() and os.path.exists(legacy_csv):
+        # One-time import of the old MultiIndex CSV cache
+        try:
+            await asyncio.to_thread(cache.append, pd.read_csv(legacy_csv, header=[0, 1], index_col=0, parse_dates=True))
+            os.remove(legacy_csv)
+        except Exception as e:
+            risk_logger.info(f"[RISK_DEBUG] Could not import legacy cache {legacy_csv}: {e}")
+
+    cached_df = await asyncio.to_thread(cache.load)
+    cached_tickers = set(cached_df.columns.get_level_values(1)) if not cached_df.empty else set()
 
+    updated = False
     symbols_to_download = [s for s in symbols if s not in cached_tickers]
-    
     if symbols_to_download:
         risk_logger.info(f"[RISK_DEBUG] Cache incomplete. Needing to download {len(symbols_to_download)} tickers...")
-        chunk_size = 50
-        for i in range(0, len(symbols_to_download), chunk_size):
-            chunk = symbols_to_download[i:i + chunk_size]
-            
+        for i in range(0, len(symbols_to_download), CACHE_CHUNK_SIZE):
+            chunk = symbols_to_download[i:i + CACHE_CHUNK_SIZE]
             chunk_data = await _download_with_retry(tickers=chunk, timeout=60, period=period)
-            
             if chunk_data.empty:
                 risk_logger.info(f"[RISK_DEBUG]     Chunk failed after all retries. Moving to next chunk.")
                 continue
-
-            if os.path.exists(cache_filename):
-                existing_data = pd.read_csv(cache_filename, header=[0, 1], index_col=0, parse_dates=True)
-                combined_data = pd.concat([existing_data, chunk_data], axis=1)
-                combined_data = combined_data.loc[:, ~combined_data.columns.duplicated()]
-                combined_data.to_csv(cache_filename)
-            else:
-                chunk_data.to_csv(cache_filename)
-            await asyncio.sleep(1)
-
-    if os.path.exists(cache_filename):
-        return pd.read_csv(cache_filename, header=[0, 1], index_col=0, parse_dates=True)
-    else:
-        return pd.DataFrame()
-
-def _calculate_ma_percentage_from_data(symbols: List[str], data: pd.DataFrame, ma_window: int) -> float:
+            await asyncio.to_thread(cache.append, chunk_data)
+            updated = True
+
+    stale_tickers = [s for s in symbols if s in cached_tickers]
+    last_date = cached_df.index.max() if not cached_df.empty else None
+    session_close = _last_closed_session()
+    behind = last_date is not None and last_date.date() < session_close.date()
+    if stale_tickers and behind and _tail_checked_at(cache_filename) < session_close.timestamp():
+        tail_start = (last_date - timedelta(days=TAIL_REFRESH_OVERLAP_DAYS)).strftime('%Y-%m-%d')
+        risk_logger.info(f"[RISK_DEBUG] Cache behind ({last_date.date()}). Fetching bars since {tail_start} for {len(stale_tickers)} tickers...")
+        for i in range(0, len(stale_tickers), CACHE_CHUNK_SIZE * 2):
+            chunk = stale_tickers[i:i + CACHE_CHUNK_SIZE * 2]
+            tail_data = await _download_with_retry(tickers=chunk, timeout=60, start=tail_start)
+            if not tail_data.empty:
+                await asyncio.to_thread(cache.append, tail_data)
+                updated = True
+        _mark_tail_checked(cache_filename)
+
+    if updated:
+        return await asyncio.to_thread(cache.load)
+    return cached_df
+
+def _calculate_ma_percentages_from_data(symbols: List[str], data: pd.DataFrame, ma_windows: List[int]) -> Dict[int, float]:
+    """
+    Percent of `symbols` whose latest close is above its N-day SMA, for every N in
+    `ma_windows`, computed over the whole close matrix at once. Per ticker, the
+    SMA uses that ticker's last N valid closes (gaps are skipped, as with dropna),
+    and tickers with fewer than N closes are left out of that window's count.
+    """
+    results = {window: 0.0 for window in ma_windows}
     if not symbols or data.empty:
         risk_logger.info("[RISK_DEBUG] MA% calculation skipped: No symbols or data.")
-        return 0.0
-    
-    above_ma_count, valid_stocks_count = 0, 0
-    
-    # --- START: Robust Data Extraction Logic ---
+        return results
+
     try:
-        # FIX: The slice must be ['Close', :] to select the 'Close' metric from the top level.
         close_prices_df = data.loc[:, pd.IndexSlice['Close', :]]
-        # Drop the top-level column name ('Close') to get columns with just ticker names
         close_prices_df.columns = close_prices_df.columns.droplevel(0)
     except KeyError:
         risk_logger.info("[RISK_DEBUG]   ! 'Close' column not found in downloaded data. Cannot calculate MA%.")
-        return 0.0
-    # --- END: Robust Data Extraction Logic ---
-
-    for symbol in symbols:
-        if symbol in close_prices_df.columns:
-            close_prices = close_prices_df[symbol].dropna()
-            if len(close_prices) >= ma_window:
-                valid_stocks_count += 1
-                ma = close_prices.rolling(window=ma_window).mean().iloc[-1]
-                if pd.notna(ma) and close_prices.iloc[-1] > ma:
-                    above_ma_count += 1
-    
-    result = (above_ma_count / valid_stocks_count) * 100 if valid_stocks_count > 0 else 0.0
-    return result
+        return results
+
+    columns = [s for s in dict.fromkeys(symbols) if s in close_prices_df.columns]
+    if not columns:
+        return results
+    closes = close_prices_df[columns].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(closes)
+    # Stable sort pushes each column's NaNs to the top, keeping valid closes in date order at the bottom
+    packed = np.take_along_axis(closes, np.argsort(valid, axis=0, kind='stable'), axis=0)
+    valid_counts = valid.sum(axis=0)
+    last_close = packed[-1] if len(packed) else np.full(len(columns), np.nan)
+
+    for window in ma_windows:
+        eligible = valid_counts >= window
+        valid_stocks_count = int(eligible.sum())
+        if window <= 0 or valid_stocks_count == 0:
+            continue
+        with np.errstate(invalid='ignore'):
+            ma = packed[-window:].mean(axis=0)
+        above_ma_count = int((eligible & (last_close > ma)).sum())
+        results[window] = (above_ma_count / valid_stocks_count) * 100
+    return results
+
+def _calculate_ma_percentage_from_data(symbols: List[str], data: pd.DataFrame, ma_window: int) -> float:
+    return _calculate_ma_percentages_from_data(symbols, data, [ma_window])[ma_window]
+
+def _rolling_series_reading(ticker: str, period: str, interval: str = '1d', ema_spans: tuple = (), sma_windows: tuple = (),
+                            live: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Live EMA/SMA reading for `ticker` from the rolling risk state. Only the bars
+    since the last settled one are read and folded in; the full `period` window
+    is loaded only to (re)build the state. With `live`, the price store's tail
+    is refreshed on every call instead of being reused for REFRESH_TTL.
+    """
+    max_age = 0 if live else None
+    key = risk_state_store.key(ticker, interval, ema_spans, sma_windows)
+    resume_from = risk_state_store.resume_point(key)
+    if resume_from is not None:
+        tail = price_store.get_history(ticker, interval=interval, start=resume_from, max_age=max_age)
+        if not tail.empty:
+            reading = risk_state_store.advance(key, tail['Close'], ema_spans, sma_windows)
+            if reading is not None:
+                return reading
+    hist = price_store.get_history(ticker, period=period, interval=interval, max_age=max_age)
+    if hist.empty:
+        return None
+    return risk_state_store.advance(key, hist['Close'], ema_spans, sma_windows, rebuild=True)
 
 async def get_live_price_and_ma_risk(ticker: str, ma_windows: List[int], is_called_by_ai: bool = False) -> tuple[Optional[float], Dict[int, Optional[float]]]:
     ma_values = {ma: None for ma in ma_windows}
     try:
         period = '2y' if max(ma_windows, default=0) >= 200 else '1y'
-        hist = await asyncio.to_thread(yf.Ticker(ticker).history, period=period)
-        if hist.empty:
+        # The price reported here is the live one: fetch the current bar rather than a cached tail
+        reading = await asyncio.to_thread(_rolling_series_reading, ticker, period, sma_windows=tuple(ma_windows), live=True)
+        if reading is None:
             risk_logger.info(f"[RISK_DEBUG] FAILED for {ticker}: No history returned.")
             return None, ma_values
         
-        price = hist['Close'].iloc[-1]
         for window in ma_windows:
-            if len(hist) >= window:
-                ma_values[window] = hist['Close'].rolling(window=window).mean().iloc[-1]
-        return price, ma_values
+            ma_values[window] = reading['sma'][window]
+        return reading['price'], ma_values
     except Exception as e:
         risk_logger.info(f"[RISK_DEBUG] FAILED for {ticker}: {e}")
         return None, ma_values
 
 def calculate_ema_score_risk(ticker: str ="SPY", is_called_by_ai: bool = False) -> Optional[float]:
     try:
-        data = yf.Ticker(ticker).history(period="1y")
-        if data.empty or len(data) < 55: return None
-        data['EMA_8'] = data['Close'].ewm(span=8, adjust=False).mean()
-        data['EMA_55'] = data['Close'].ewm(span=55, adjust=False).mean()
-        ema_8, ema_55 = data['EMA_8'].iloc[-1], data['EMA_55'].iloc[-1]
+        reading = _rolling_series_reading(ticker, '1y', ema_spans=(8, 55))
+        if reading is None or reading['bars'] < 55: return None
+        ema_8, ema_55 = reading['ema'][8], reading['ema'][55]
         if pd.isna(ema_55) or ema_55 == 0: return None
         score = (((ema_8 - ema_55) / ema_55) * 5 + 0.5) * 100
         return float(np.clip(score, 0, 100))
@@ -205,6 +275,9 @@ RISK_SCORE_CACHE = {
     "timestamp": None
 }
 
+# IV rank window and score distribution over RISK_CSV_FILE, updated as rows are saved
+market_history = MarketHistoryWindow(RISK_CSV_FILE)
+
 async def calculate_risk_scores_singularity(is_called_by_ai: bool = False) -> tuple:
     # Check Memory Cache (Validity: 10 minutes)
     if RISK_SCORE_CACHE["data"] and RISK_SCORE_CACHE["timestamp"]:
@@ -219,10 +292,10 @@ async def calculate_risk_scores_singularity(is_called_by_ai: bool = False) -> tu
     sp500_data = await fetch_and_cache_data(sp500_symbols, SP500_CACHE_FILE, '2y')
     sp100_data = await fetch_and_cache_data(sp100_symbols, SP100_CACHE_FILE, '6mo')
     
-    s5tw_val = _calculate_ma_percentage_from_data(sp500_symbols, sp500_data, 20)
-    s5th_val = _calculate_ma_percentage_from_data(sp500_symbols, sp500_data, 200)
-    s1fd_val = _calculate_ma_percentage_from_data(sp100_symbols, sp100_data, 5)
-    s1tw_val = _calculate_ma_percentage_from_data(sp100_symbols, sp100_data, 20)
+    sp500_breadth = _calculate_ma_percentages_from_data(sp500_symbols, sp500_data, [20, 200])
+    sp100_breadth = _calculate_ma_percentages_from_data(sp100_symbols, sp100_data, [5, 20])
+    s5tw_val, s5th_val = sp500_breadth[20], sp500_breadth[200]
+    s1fd_val, s1tw_val = sp100_breadth[5], sp100_breadth[20]
     
     (spy_live_price, spy_mas), (vix_live_price, _), (rut_live_price, rut_mas), (oex_live_price, oex_mas) = await asyncio.gather(
         get_live_price_and_ma_risk('SPY', [20, 50], is_called_by_ai=True),
@@ -269,11 +342,9 @@ async def calculate_risk_scores_singularity(is_called_by_ai: bool = False) -> tu
 
 def calculate_recession_likelihood_ema_risk(ticker:str ="SPY", interval:str ="1mo", period:str ="5y", is_called_by_ai: bool = False) -> Optional[float]:
     try:
-        data = yf.Ticker(ticker).history(period=period, interval=interval)
-        if data.empty or len(data) < 55: return None
-        data['EMA_8'] = data['Close'].ewm(span=8, adjust=False).mean()
-        data['EMA_55'] = data['Close'].ewm(span=55, adjust=False).mean()
-        ema_8, ema_55 = data['EMA_8'].iloc[-1], data['EMA_55'].iloc[-1]
+        reading = _rolling_series_reading(ticker, period, interval=interval, ema_spans=(8, 55))
+        if reading is None or reading['bars'] < 55: return None
+        ema_8, ema_55 = reading['ema'][8], reading['ema'][55]
         if pd.isna(ema_8) or pd.isna(ema_55) or ema_55 == 0: return None
         x_value = (((ema_8 - ema_55) / ema_55) + 0.5) * 100
         likelihood = 100 * np.exp(-((45.622216 * x_value / 2750) ** 4))
@@ -304,8 +375,7 @@ def calculate_market_invest_score_risk(vix_contraction_chance: Optional[float],
 # --- Add this new helper function to risk_command.py ---
 def _save_risk_data_to_csv(data_row: Dict[str, Any]):
     """Appends a row of risk data to the market_data.csv file."""
-    market_data_csv_file = 'market_data.csv'
-    file_exists = os.path.isfile(market_data_csv_file)
+    market_data_csv_file = RISK_CSV_FILE
     
     header = [
         "Timestamp", "General Market Score", "Large Market Cap Score", "EMA Score", 
@@ -315,11 +385,8 @@ def _save_risk_data_to_csv(data_row: Dict[str, Any]):
     ]
     
     try:
-        with open(market_data_csv_file, 'a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=header)
-            if not file_exists:
-                writer.writeheader()
-            writer.writerow(data_row)
+        # Written through the IV rank / percentile window so it stays in step with the file
+        market_history.append_row(data_row, header)
         risk_logger.info(f"Successfully saved risk data to {market_data_csv_file}")
     except Exception as e:
         risk_logger.error(f"Failed to save risk data to CSV: {e}")
@@ -328,74 +395,25 @@ def calculate_market_score_percentile_risk(capped_mis_signal: Optional[float], i
     """Calculates the percentile of the current market score against historical data."""
     if capped_mis_signal is None: return None
     try:
-        if not os.path.exists(RISK_CSV_FILE): return 50.0
-        df = pd.read_csv(RISK_CSV_FILE)
-        
-        if 'Raw Market Invest Score' not in df.columns or df['Raw Market Invest Score'].isnull().all():
-            return 50.0
-
-        historical_scores = df['Raw Market Invest Score'].dropna()
-        if len(historical_scores) < 10: return 50.0
-        
-        percentile = percentileofscore(historical_scores, capped_mis_signal, kind='rank')
-        return float(percentile)
+        return market_history.score_percentile(capped_mis_signal)
     except Exception as e:
         risk_logger.warning(f"Percentile Calculation Error: {e}")
         return None
 
-def calculate_iv_and_ivr_risk(is_called_by_ai: bool = False) -> tuple[Optional[float], Optional[float]]:
+def calculate_iv_and_ivr_risk(is_called_by_ai: bool = False, current_iv: Optional[float] = None) -> tuple[Optional[float], Optional[float]]:
     """
-    Calculates the current market IV and its IV Rank based on historical data
-    from the main market_data.csv file.
+    Calculates the current market IV (VIX) and its IV Rank over the last year of
+    market_data.csv. Pass `current_iv` when the VIX price is already known.
     """
     try:
-        # Step 1: Fetch current implied volatility from live SPY options
-        # Step 1: Fetch current VIX as Market IV
-        vix = yf.Ticker('^VIX')
-        hist = vix.history(period='5d')
-        if hist.empty:
-            return None, None
-        
-        current_iv = hist['Close'].iloc[-1]
-        
-        # Step 2: Use market_data.csv for historical data
-        if not os.path.exists(RISK_CSV_FILE):
-            # If no history, return current IV but a neutral 50% IVR
-            return current_iv, 50.0
-        
-        df_hist = pd.read_csv(RISK_CSV_FILE, parse_dates=['Timestamp'])
-        df_hist = df_hist.set_index('Timestamp').sort_index()
-        
-        # Step 3: Prepare the historical IV data
-        if 'Market IV' not in df_hist.columns:
-            return current_iv, 50.0
-            
-        df_hist['Market IV'] = pd.to_numeric(df_hist['Market IV'], errors='coerce')
-        df_hist.dropna(subset=['Market IV'], inplace=True)
-
-        # Step 4: Filter for the last year and check for minimum data
-        one_year_ago = datetime.now(pytz.utc) - timedelta(days=365)
-        df_1y = df_hist[df_hist.index >= one_year_ago]
-
-        # Use a minimum of 20 data points for a meaningful rank
-        MIN_DATA_POINTS = 20
-        if df_1y.empty or len(df_1y) < MIN_DATA_POINTS:
-            return current_iv, 50.0 # Return neutral IVR if not enough data
-
-        # Step 5: Calculate IVR
-        min_iv = df_1y['Market IV'].min()
-        max_iv = df_1y['Market IV'].max()
-
-        # Also add the current IV to the calculation to ensure it's within the bounds
-        min_iv = min(min_iv, current_iv)
-        max_iv = max(max_iv, current_iv)
-
-        if (max_iv - min_iv) > 0:
-            ivr = ((current_iv - min_iv) / (max_iv - min_iv)) * 100
-        else:
-            ivr = 50.0 # If min and max are the same, rank is neutral
+        if current_iv is None:
+            hist = yf.Ticker('^VIX').history(period='5d')
+            if hist.empty:
+                return None, None
+            current_iv = hist['Close'].iloc[-1]
         
-        return float(current_iv), float(np.clip(ivr, 0, 100))
+        # Neutral 50% IVR until there are enough data points from the last year
+        return float(current_iv), market_history.iv_rank(float(current_iv))
 
     except Exception as e:
         risk_logger.warning(f"IV/IVR Calculation Error: {e}")
@@ -413,7 +431,7 @@ async def perform_risk_calculations_singularity(is_eod_save: bool = False, is_ca
 
     # --- NEW: Calculate Percentile and IV/IVR ---
     market_percentile = await asyncio.to_thread(calculate_market_score_percentile_risk, capped_mis_signal, is_called_by_ai=True)
-    market_iv, market_ivr = await asyncio.to_thread(calculate_iv_and_ivr_risk, is_called_by_ai=True)
+    market_iv, market_ivr = await asyncio.to_thread(calculate_iv_and_ivr_risk, is_called_by_ai=True, current_iv=vix_p)
 
     # Dictionary for screen display (and API response)
     results_summary = {
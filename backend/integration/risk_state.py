@@ -0,0 +1,301 @@
+# risk_state.py
+# Rolling state for the R.I.S.K. engine. Instead of recomputing EMAs and SMAs
+# from a full year (or five) of bars on every tick, each series keeps its
+# indicator values as of the last settled bar and folds in only the bars that
+# arrived since. The newest bar is treated as live: it is used for the current
+# reading but only committed once a later bar exists. The IV rank window and
+# the market score distribution are likewise maintained incrementally as rows
+# are appended to market_data.csv.
+import os
+import csv
+import json
+import bisect
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pytz
+
+# --- Constants ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RISK_STATE_FILE = os.path.join(BASE_DIR, 'data', 'risk_state.json')
+RISK_STATE_VERSION = 1
+ADJUSTMENT_TOLERANCE = 1e-4 # Relative move of a settled close that means history was re-adjusted
+IV_RANK_LOOKBACK = timedelta(days=365)
+IV_RANK_MIN_POINTS = 20
+PERCENTILE_MIN_POINTS = 10
+
+risk_state_logger = logging.getLogger('RISK_STATE')
+
+
+class RollingSeriesState:
+    """
+    EMA/SMA state for one close series. `commit` folds a settled bar in O(1);
+    `live` combines the committed state with the current (possibly partial) bar.
+    """
+
+    def __init__(self, ema_spans: Sequence[int] = (), sma_windows: Sequence[int] = ()):
+        self.ema_spans = sorted(set(int(s) for s in ema_spans))
+        self.sma_windows = sorted(set(int(w) for w in sma_windows))
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.last_ts: Optional[int] = None
+        self.last_close: Optional[float] = None
+        self.emas: Dict[int, float] = {}
+        # Sum of the last (w - 1) committed closes per window; the live bar completes the window
+        self.sums: Dict[int, float] = {w: 0.0 for w in self.sma_windows}
+        self.buffer = deque(maxlen=max([w - 1 for w in self.sma_windows] + [1]))
+
+    def commit(self, ts: int, close: float) -> None:
+        for span in self.ema_spans:
+            alpha = 2.0 / (span + 1.0)
+            self.emas[span] = close if self.count == 0 else alpha * close + (1.0 - alpha) * self.emas[span]
+        for w in self.sma_windows:
+            k = w - 1
+            if k <= 0:
+                continue
+            if len(self.buffer) >= k:
+                self.sums[w] -= self.buffer[-k]
+            self.sums[w] += close
+        self.buffer.append(close)
+        self.count += 1
+        self.last_ts, self.last_close = ts, close
+
+    def live(self, close: float) -> Dict[str, Any]:
+        """Indicator values with `close` as the newest bar (matches ewm(adjust=False) / rolling().mean())."""
+        bars = self.count + 1
+        emas = {}
+        for span in self.ema_spans:
+            alpha = 2.0 / (span + 1.0)
+            emas[span] = close if self.count == 0 else alpha * close + (1.0 - alpha) * self.emas[span]
+        smas = {w: ((self.sums[w] + close) / w if bars >= w else None) for w in self.sma_windows}
+        return {'price': close, 'bars': bars, 'ema': emas, 'sma': smas}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'ema_spans': self.ema_spans, 'sma_windows': self.sma_windows, 'count': self.count,
+            'last_ts': self.last_ts, 'last_close': self.last_close,
+            'emas': {str(k): v for k, v in self.emas.items()},
+            'buffer': list(self.buffer),
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> 'RollingSeriesState':
+        state = cls(payload['ema_spans'], payload['sma_windows'])
+        state.count = int(payload['count'])
+        state.last_ts = payload['last_ts']
+        state.last_close = payload['last_close']
+        state.emas = {int(k): float(v) for k, v in payload['emas'].items()}
+        state.buffer.extend(float(v) for v in payload['buffer'])
+        # Sums are rebuilt exactly from the buffer rather than carried over
+        values = list(state.buffer)
+        for w in state.sma_windows:
+            k = w - 1
+            state.sums[w] = float(sum(values[-k:])) if k > 0 else 0.0
+        return state
+
+
+def _series_arrays(closes: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    closes = pd.to_numeric(closes, errors='coerce').dropna()
+    index = pd.DatetimeIndex(closes.index)
+    return index.as_unit('ns').asi8, closes.to_numpy(dtype=np.float64)
+
+
+class RiskStateStore:
+    """Keyed RollingSeriesStates, persisted to a small JSON file whenever a bar is committed."""
+
+    def __init__(self, path: str = RISK_STATE_FILE):
+        self.path = path
+        self._states: Optional[Dict[str, RollingSeriesState]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(ticker: str, interval: str, ema_spans: Sequence[int], sma_windows: Sequence[int]) -> str:
+        spans = ','.join(str(s) for s in sorted(set(ema_spans)))
+        windows = ','.join(str(w) for w in sorted(set(sma_windows)))
+        return f"{ticker.upper()}|{interval}|ema={spans}|sma={windows}"
+
+    def _load(self) -> Dict[str, RollingSeriesState]:
+        if self._states is None:
+            self._states = {}
+            try:
+                with open(self.path, 'r') as f:
+                    payload = json.load(f)
+                if payload.get('version') == RISK_STATE_VERSION:
+                    self._states = {k: RollingSeriesState.from_dict(v) for k, v in payload.get('series', {}).items()}
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                risk_state_logger.warning(f"Ignoring unreadable risk state {self.path}: {e}")
+        return self._states
+
+    def _save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': RISK_STATE_VERSION, 'series': {k: s.to_dict() for k, s in self._states.items()}}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            risk_state_logger.warning(f"Could not persist risk state: {e}")
+
+    def resume_point(self, key: str) -> Optional[pd.Timestamp]:
+        """Timestamp of the last settled bar for `key`, or None when the series must be built from scratch."""
+        with self._lock:
+            state = self._load().get(key)
+            return pd.Timestamp(state.last_ts, tz='UTC') if state is not None and state.last_ts is not None else None
+
+    def advance(self, key: str, closes: pd.Series, ema_spans: Sequence[int] = (), sma_windows: Sequence[int] = (),
+                rebuild: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Folds `closes` into the state for `key` and returns the live reading.
+        Unless `rebuild` is set, `closes` must start at (or before) the last settled
+        bar; None is returned when it does not line up, so the caller can refetch
+        the full window and rebuild.
+        """
+        ts, values = _series_arrays(closes)
+        if len(values) == 0:
+            return None
+        with self._lock:
+            states = self._load()
+            state = states.get(key)
+            start = 0
+            if not rebuild:
+                if state is None or state.last_ts is None:
+                    return None
+                pos = int(np.searchsorted(ts, state.last_ts))
+                # The settled bar must be present and followed by at least the live bar
+                if pos >= len(ts) - 1 or ts[pos] != state.last_ts:
+                    return None
+                if abs(values[pos] / state.last_close - 1.0) > ADJUSTMENT_TOLERANCE:
+                    return None # History was re-adjusted (split/dividend) since it was folded in
+                start = pos + 1
+            else:
+                state = RollingSeriesState(ema_spans, sma_windows)
+                states[key] = state
+
+            settled_end = len(values) - 1
+            for i in range(start, settled_end):
+                state.commit(int(ts[i]), float(values[i]))
+            if rebuild or settled_end > start:
+                self._save()
+            return state.live(float(values[-1]))
+
+
+class MarketHistoryWindow:
+    """
+    The parts of market_data.csv the risk engine ranks against: a one-year
+    monotonic min/max window of Market IV (for IV rank) and the sorted raw
+    market invest scores (for the percentile). Seeded from the CSV once, then
+    updated row by row through append_row; reseeded if the file changes
+    underneath it.
+    """
+
+    def __init__(self, csv_path: str):
+        self.csv_path = csv_path
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[int, float]] = None
+        self._seeded = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self._iv_min = deque()  # (epoch seconds, iv), increasing iv
+        self._iv_max = deque()  # (epoch seconds, iv), decreasing iv
+        self._recent_iv_ts = deque(maxlen=IV_RANK_MIN_POINTS)
+        self._scores: List[float] = []
+
+    def _file_signature(self) -> Optional[Tuple[int, float]]:
+        try:
+            stat = os.stat(self.csv_path)
+            return stat.st_size, stat.st_mtime
+        except OSError:
+            return None
+
+    def _ensure_current(self) -> None:
+        signature = self._file_signature()
+        if self._seeded and signature == self._signature:
+            return
+        self._reset()
+        self._signature, self._seeded = signature, True
+        if signature is None:
+            return
+        try:
+            df = pd.read_csv(self.csv_path)
+        except Exception as e:
+            risk_state_logger.warning(f"Could not read {self.csv_path}: {e}")
+            return
+        if 'Raw Market Invest Score' in df.columns:
+            self._scores = sorted(pd.to_numeric(df['Raw Market Invest Score'], errors='coerce').dropna().tolist())
+        if 'Market IV' in df.columns and 'Timestamp' in df.columns:
+            hist = pd.DataFrame({
+                'ts': pd.to_datetime(df['Timestamp'], utc=True, errors='coerce', format='mixed'),
+                'iv': pd.to_numeric(df['Market IV'], errors='coerce'),
+            }).dropna().sort_values('ts', kind='stable')
+            for ts, iv in zip(hist['ts'], hist['iv']):
+                self._push_iv(ts.timestamp(), float(iv))
+
+    def _push_iv(self, ts: float, iv: float) -> None:
+        while self._iv_min and self._iv_min[-1][1] >= iv:
+            self._iv_min.pop()
+        self._iv_min.append((ts, iv))
+        while self._iv_max and self._iv_max[-1][1] <= iv:
+            self._iv_max.pop()
+        self._iv_max.append((ts, iv))
+        self._recent_iv_ts.append(ts)
+
+    def append_row(self, data_row: Dict[str, Any], fieldnames: List[str]) -> None:
+        """Appends `data_row` to the CSV (writing the header for a new file) and folds it into the window."""
+        with self._lock:
+            self._ensure_current()
+            file_exists = self._signature is not None
+            with open(self.csv_path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                if not file_exists:
+                    writer.writeheader()
+                writer.writerow(data_row)
+            self._signature = self._file_signature()
+
+            score = pd.to_numeric(data_row.get('Raw Market Invest Score'), errors='coerce')
+            if pd.notna(score):
+                bisect.insort(self._scores, float(score))
+            iv = pd.to_numeric(data_row.get('Market IV'), errors='coerce')
+            ts = pd.to_datetime(data_row.get('Timestamp'), utc=True, errors='coerce')
+            if pd.notna(iv) and pd.notna(ts):
+                self._push_iv(ts.timestamp(), float(iv))
+
+    def iv_rank(self, current_iv: float, now: Optional[datetime] = None) -> float:
+        """IV rank of `current_iv` within the last year (50.0 when there is too little history)."""
+        with self._lock:
+            self._ensure_current()
+            cutoff = ((now or datetime.now(pytz.utc)) - IV_RANK_LOOKBACK).timestamp()
+            for window in (self._iv_min, self._iv_max):
+                while window and window[0][0] < cutoff:
+                    window.popleft()
+            if len(self._recent_iv_ts) < IV_RANK_MIN_POINTS or self._recent_iv_ts[0] < cutoff or not self._iv_min:
+                return 50.0
+            min_iv = min(self._iv_min[0][1], current_iv)
+            max_iv = max(self._iv_max[0][1], current_iv)
+            if (max_iv - min_iv) > 0:
+                return float(np.clip(((current_iv - min_iv) / (max_iv - min_iv)) * 100, 0, 100))
+            return 50.0
+
+    def score_percentile(self, score: float) -> float:
+        """Same result as scipy's percentileofscore(history, score, kind='rank')."""
+        with self._lock:
+            self._ensure_current()
+            n = len(self._scores)
+            if n < PERCENTILE_MIN_POINTS:
+                return 50.0
+            left = bisect.bisect_left(self._scores, score)
+            right = bisect.bisect_right(self._scores, score)
+            return float((left + right + (1 if right > left else 0)) * (50.0 / n))
+
+
+# --- Shared instances ---
+risk_state_store = RiskStateStore()
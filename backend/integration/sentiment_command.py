@@ -22,6 +22,7 @@ from tabulate import tabulate
 from typing import Optional, Dict, Any, List 
 
 from backend.ai_service import ai
+from backend.integration.info_store import info_store
 
 # --- Module-Specific Configuration ---
 urllib3.disable_warnings(InsecureRequestWarning)
@@ -66,7 +67,7 @@ async def with_retry(coro_func, *args, retries=2, delay=2, **kwargs):
 
 async def get_company_name(ticker: str) -> str:
     try:
-        stock_info = await asyncio.to_thread(lambda: yf.Ticker(ticker).info)
+        stock_info = await info_store.get_info_async(ticker)
         if stock_info:
             return stock_info.get('longName') or stock_info.get('shortName') or ticker
         return ticker 
@@ -27,6 +27,7 @@ from backend.integration import (
     powerscore_command,
     quickscore_command
 )
+from backend.integration.info_store import info_store
 
 def safe_float(val):
     try:
@@ -57,13 +58,9 @@ async def handle_research_tool(params: Dict[str, Any]) -> Dict[str, Any]:
         tickers_source = params["tickers_source"]
         
         if isinstance(tickers_source, list):
-            import yfinance as yf
-            
             async def get_search_term(symbol):
                 try:
-                    # Run blocking yfinance call in a thread
-                    tick = await asyncio.to_thread(lambda: yf.Ticker(symbol))
-                    info = await asyncio.to_thread(lambda: tick.info)
+                    info = await info_store.get_info_async(symbol)
                     name = info.get('shortName') or info.get('longName')
                     return f"{symbol} ({name})" if name else symbol
                 except:
@@ -183,14 +180,12 @@ async def handle_summary_tool(params: Dict[str, Any]) -> Dict[str, Any]:
              for item in v:
                  if isinstance(item, dict) and "ticker" in item: all_tickers.add(item["ticker"])
     
-    import yfinance as yf
     name_map = {}
     
     if all_tickers:
         async def fetch_name(t):
             try:
-                tick = await asyncio.to_thread(lambda: yf.Ticker(t))
-                info = await asyncio.to_thread(lambda: tick.info)
+                info = await info_store.get_info_async(t)
                 return t, info.get('shortName') or info.get('longName') or t
             except:
                 return t, t
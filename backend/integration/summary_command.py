@@ -1,8 +1,7 @@
 # --- summary_command.py ---
-import asyncio
-import yfinance as yf
 from backend.ai_service import ai
 from backend.database import get_cached_summary, save_cached_summary
+from backend.integration.info_store import info_store
 try:
     from backend.usage_counter import increment_usage
 except ImportError:
@@ -14,7 +13,7 @@ except ImportError:
 # Helpers
 async def get_yf_info(ticker: str) -> dict:
     try:
-        return await asyncio.to_thread(lambda: yf.Ticker(ticker).info)
+        return await info_store.get_info_async(ticker)
     except:
         return {}
 
@@ -120,6 +120,12 @@ async def lifespan(app: FastAPI):
     try:
         stop_scheduler()
     except: pass
+    # Worker processes of the shared process pool must not outlive the server
+    try:
+        from backend.integration.process_pool import shutdown_process_pool
+        shutdown_process_pool()
+    except Exception as e:
+        logger.warning(f"Failed to stop the process pool: {e}")
     logger.info("Shutdown complete.")
 
 app = FastAPI(lifespan=lifespan)
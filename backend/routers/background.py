@@ -184,6 +184,12 @@ async def run_kronos_command(req: KronosRunRequest):
                 f"--conditions={conds}",
                 f"--strategies={strats}"
             ]
+            if params.get("parallel"):
+                parts.append(f"--parallel={params['parallel']}")
+            if params.get("resume_run_id"):
+                parts.append(f"--resume={params['resume_run_id']}")
+            elif params.get("resume"):
+                parts.append("--resume")
             await kronos_command._handle_kronos_convergence(parts, prom)
             return {"status": "success", "message": "Convergence run started."}
 
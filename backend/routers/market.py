@@ -8,6 +8,9 @@ import pandas as pd
 import time
 from datetime import datetime
 import asyncio
+from backend.integration.info_store import info_store
+from backend.integration.price_store import price_store
+from backend.integration.options_store import options_store
 
 # Attempt imports for integration
 try:
@@ -95,11 +98,14 @@ def get_market_data(request: MarketDataRequest):
             if current_time - timestamp < CACHE_TTL:
                 return data
         
-        # Use yf.download for batch processing (2y to ensure full 1y coverage)
-        df = yf.download(tickers, period="2y", interval="1d", progress=False, auto_adjust=True)
+        # Batch download through the shared price store (2y to ensure full 1y coverage)
+        df = price_store.download(tickers, period="2y", interval="1d", progress=False, auto_adjust=True)
         # Fetch 5d for accurate recent price/change (avoids 1y adjustment drift)
-        df_short = yf.download(tickers, period="5d", interval="1d", progress=False, auto_adjust=True)
+        df_short = price_store.download(tickers, period="5d", interval="1d", progress=False, auto_adjust=True)
         
+        # Fill missing/expired Ticker.info for the whole list in one batch
+        info_store.prefill(tickers)
+
         results = []
         for ticker in tickers:
             try:
@@ -225,7 +231,7 @@ def get_market_data(request: MarketDataRequest):
                     t = yf.Ticker(ticker)
                     mkt_cap = t.fast_info.market_cap
                     volume = t.fast_info.last_volume
-                    info = t.info
+                    info = info_store.get_info(ticker)
                     pe_ratio = info.get('trailingPE', 0)
                     company_name = info.get('shortName') or info.get('longName') or ""
                     if not volume: volume = info.get('volume', 0)
@@ -260,10 +266,12 @@ def get_market_data(request: MarketDataRequest):
 def get_market_data_details(request: MarketDataRequest):
     results = {}
     tickers = [t.upper().strip() for t in request.tickers if t]
+    info_store.prefill(tickers)
     
     for ticker in tickers:
         try:
             t = yf.Ticker(ticker)
+            info = info_store.get_info(ticker)
             earnings_date = "-"
             try:
                 cal = t.calendar
@@ -277,19 +285,19 @@ def get_market_data_details(request: MarketDataRequest):
                         earnings_date = str(vals.values[0])
             except: 
                 try:
-                    ts = t.info.get('earningsTimestamp')
+                    ts = info.get('earningsTimestamp')
                     if ts: earnings_date = datetime.fromtimestamp(ts).strftime('%Y-%m-%d')
                 except: pass
 
             iv = "-"
             try:
-                if t.info.get('impliedVolatility'):
-                     iv = f"{t.info['impliedVolatility'] * 100:.2f}%"
+                if info.get('impliedVolatility'):
+                     iv = f"{info['impliedVolatility'] * 100:.2f}%"
                 else:
-                    dates = t.options
+                    dates = options_store.expirations(ticker)
                     if dates:
-                        chain = t.option_chain(dates[0])
-                        valid_ivs = chain.calls[chain.calls['impliedVolatility'] > 0]['impliedVolatility']
+                        calls, _ = options_store.chain(ticker, dates[0])
+                        valid_ivs = calls[calls['impliedVolatility'] > 0]['impliedVolatility']
                         if not valid_ivs.empty:
                             iv = f"{valid_ivs.mean() * 100:.2f}%"
             except: pass
@@ -326,7 +334,7 @@ def get_chart_data(req: ChartRequest):
             period = "1y"
             interval = "1d"
             
-        df = yf.download(ticker, period=period, interval=interval, progress=False, auto_adjust=True)
+        df = price_store.download(ticker, period=period, interval=interval, progress=False, auto_adjust=True)
         if df.empty:
             return {"status": "error", "message": "No data found"}
             
@@ -1,28 +1,33 @@
 import sys
-from unittest.mock import MagicMock 
+import pytest
+from unittest.mock import MagicMock, patch
 
 # --- MOCKING SETUP START ---
 # We must mock everything that 'background.py' might touch via imports
-# specifically 'backend.integration' and all its submodules.
+# specifically 'backend.integration' and all its submodules. The mocks only
+# live in sys.modules while this file's tests run (see the router fixture),
+# so other test files still import the real integration package.
 
 mock_integration = MagicMock()
-sys.modules["backend.integration"] = mock_integration
-sys.modules["integration"] = mock_integration
+mock_modules = {
+    "backend.integration": mock_integration,
+    "integration": mock_integration,
+}
 
 # Mock specific submodules explicitly to ensure they are found
 mock_prom_core = MagicMock()
-sys.modules["backend.integration.prometheus_core"] = mock_prom_core
-sys.modules["integration.prometheus_core"] = mock_prom_core
+mock_modules["backend.integration.prometheus_core"] = mock_prom_core
+mock_modules["integration.prometheus_core"] = mock_prom_core
 
 mock_kronos = MagicMock()
-sys.modules["backend.integration.kronos_command"] = mock_kronos
-sys.modules["integration.kronos_command"] = mock_kronos
+mock_modules["backend.integration.kronos_command"] = mock_kronos
+mock_modules["integration.kronos_command"] = mock_kronos
 
 # Mock other commands imported inside get_prometheus_instance
 for mod in ["risk_command", "derivative_command", "mlforecast_command", 
             "sentiment_command", "fundamentals_command", "quickscore_command", "briefing_command"]:
-    sys.modules[f"backend.integration.{mod}"] = MagicMock()
-    sys.modules[f"integration.{mod}"] = MagicMock()
+    mock_modules[f"backend.integration.{mod}"] = MagicMock()
+    mock_modules[f"integration.{mod}"] = MagicMock()
 
 # Mock Prometheus Class Structure
 mock_prom_instance = MagicMock()
@@ -38,17 +43,23 @@ mock_kronos._load_schedule.return_value = [{"job": "mock_job", "next_run": "2029
 
 # --- MOCKING SETUP END ---
 
-# NOW import the router
 from fastapi.testclient import TestClient
 from fastapi import FastAPI
-from backend.routers.background import router
 
-# Setup minimal app
-app = FastAPI()
-app.include_router(router)
-client = TestClient(app)
 
-def test_status_endpoint():
+@pytest.fixture(scope="module")
+def client():
+    # Import the router against the mocks; patch.dict puts the real modules back afterwards
+    with patch.dict(sys.modules, mock_modules):
+        sys.modules.pop("backend.routers.background", None)
+        from backend.routers.background import router
+
+        # Setup minimal app
+        app = FastAPI()
+        app.include_router(router)
+        yield TestClient(app)
+
+def test_status_endpoint(client):
     # Act
     response = client.get("/api/background/status")
     
@@ -60,7 +71,7 @@ def test_status_endpoint():
     # Ensure it tried to load state
     mock_prom_instance._load_prometheus_state.assert_called()
 
-def test_toggle_endpoint():
+def test_toggle_endpoint(client):
     # Act - disable
     response = client.post("/api/background/toggle", json={"active": False})
     
@@ -70,7 +81,7 @@ def test_toggle_endpoint():
     assert mock_prom_instance.is_active is False
     mock_prom_instance._save_prometheus_state.assert_called()
 
-def test_run_command_optimize():
+def test_run_command_optimize(client):
     # Reset
     mock_kronos._handle_kronos_optimize.reset_mock()
     
@@ -94,7 +105,7 @@ def test_run_command_optimize():
     parts = call_args[0][0] # First arg is list of parts
     assert parts == ["optimize", "rsi", "SPY", "1y", "5", "10"]
 
-def test_run_command_convergence():
+def test_run_command_convergence(client):
     mock_kronos._handle_kronos_convergence.reset_mock()
     
     payload = {
@@ -117,7 +128,7 @@ def test_run_command_convergence():
     assert parts[1] == "Test1"
     assert "--universes=A,B" in parts
 
-def test_run_command_test_mode():
+def test_run_command_test_mode(client):
     mock_kronos._handle_kronos_test.reset_mock()
     
     payload = {
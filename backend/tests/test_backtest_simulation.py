@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+
+from backend.integration.backtest_command import simulate_population_equity, simulate_strategy_equity
+
+
+def reference_equity(prices, signals, allow_short, initial_capital=10000.0):
+    """The original bar-by-bar loop from run_strategy_backtest."""
+    cash, shares = initial_capital, 0.0
+    equity = np.empty(len(prices))
+    for i, (current_price, signal_value) in enumerate(zip(prices, signals)):
+        if np.isnan(current_price) or current_price <= 0:
+            equity[i] = equity[i - 1] if i > 0 else initial_capital
+            continue
+        equity[i] = cash + shares * current_price
+        if signal_value > 0:
+            if shares < 0:
+                cash += shares * current_price
+                shares = 0
+            if shares == 0:
+                shares_to_buy = cash / current_price
+                shares += shares_to_buy
+                cash -= shares_to_buy * current_price
+        elif signal_value < 0:
+            if shares > 0:
+                cash += shares * current_price
+                shares = 0
+            if allow_short and shares == 0:
+                shares_to_short = cash / current_price
+                shares -= shares_to_short
+                cash += shares_to_short * current_price
+    return equity
+
+
+@pytest.mark.parametrize('allow_short', [True, False])
+@pytest.mark.parametrize('signal_density', [0.02, 0.5, 1.0])
+def test_matches_bar_by_bar_loop(allow_short, signal_density):
+    rng = np.random.default_rng(7)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 2500)))
+    prices[rng.choice(len(prices), 25, replace=False)] = np.nan
+    prices[[0, 1000]] = [np.nan, 0.0]
+    signals = rng.choice([-1.0, 1.0], len(prices)) * (rng.random(len(prices)) < signal_density)
+    signals[[5, 6]] = [2.0, -2.0] # diff()-style signals
+
+    expected = reference_equity(prices, signals, allow_short)
+    assert np.array_equal(simulate_strategy_equity(prices, signals, allow_short), expected)
+
+
+@pytest.mark.parametrize('allow_short', [True, False])
+def test_population_matrix_matches_bar_by_bar_loop(allow_short):
+    rng = np.random.default_rng(11)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 1500)))
+    prices[rng.choice(len(prices), 15, replace=False)] = np.nan
+    density = np.linspace(0.0, 1.0, 12)[:, None]
+    signal_matrix = rng.choice([-1.0, 1.0], (12, len(prices))) * (rng.random((12, len(prices))) < density)
+
+    equity = simulate_population_equity(prices, signal_matrix, allow_short)
+    assert equity.shape == signal_matrix.shape
+    for row, signals in zip(equity, signal_matrix):
+        assert np.array_equal(row, reference_equity(prices, signals, allow_short))
+
+
+def test_population_matrix_handles_wiped_out_rows():
+    # A short squeezed past -100% leaves negative cash; the buy that follows goes short again
+    prices = np.array([10.0, 10.0, 30.0, 30.0, 10.0, 10.0, 20.0])
+    signal_matrix = np.array([[0, -1, 0, 1, 0, -1, 0], [0, 1, 0, -1, 0, 0, 0]], dtype=float)
+    equity = simulate_population_equity(prices, signal_matrix, allow_short=True)
+    for row, signals in zip(equity, signal_matrix):
+        assert np.array_equal(row, reference_equity(prices, signals, True))
+
+
+def test_no_signals_holds_cash():
+    prices = np.linspace(10, 20, 50)
+    equity = simulate_strategy_equity(prices, np.zeros(50), allow_short=True)
+    assert np.all(equity == 10000.0)
+
+
+def test_preloaded_run_matches_command_path():
+    import asyncio
+    import json
+    import pandas as pd
+    from unittest.mock import patch
+    from backend.integration import backtest_command as bc
+
+    index = pd.bdate_range('2016-01-01', periods=750)
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(3).normal(0, 0.02, len(index))))
+    frame = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                          'Close': close, 'Adj Close': close, 'Volume': 1e6}, index=index)
+    params = json.dumps({'short_ma': 40, 'long_ma': 15})
+
+    async def fake_download(*args, **kwargs):
+        return frame.copy()
+
+    with patch.object(bc, 'download_async', fake_download):
+        via_command = asyncio.run(bc.handle_backtest_command(['SPY', 'ma_crossover', '3y', params], is_called_by_ai=True))
+        data, period_display = asyncio.run(bc.load_backtest_data('SPY', period='3y'))
+
+    via_data = bc.run_strategy_backtest_on_data(data, 'SPY', 'ma_crossover', bc.parse_backtest_params('ma_crossover', [params]), period_display=period_display)
+    assert via_data == via_command
+    assert via_data['parameters'] == {'short_ma': 15, 'long_ma': 40}
+    assert 'signal' not in data.columns
+
+
+@pytest.mark.parametrize('strategy, population', [
+    ('ma_crossover', [{'short_ma': 10, 'long_ma': 50}, {'short_ma': 20, 'long_ma': 50}, {'short_ma': 10}]),
+    ('rsi', [{'rsi_period': 14, 'rsi_buy': 30, 'rsi_sell': 70}, {'rsi_period': 7, 'rsi_buy': 25, 'rsi_sell': 75}]),
+    ('macd', [{'fast_period': 26, 'slow_period': 12, 'signal_period': 9}, {'fast_period': 8, 'slow_period': 21, 'signal_period': 5}]),
+    ('mean_reversion', [{'bb_window': 20, 'bb_std': 1.5, 'rsi_period': 14, 'rsi_buy': 40, 'rsi_sell': 60}]),
+])
+def test_population_matches_single_runs(strategy, population):
+    import pandas as pd
+    from backend.integration import backtest_command as bc
+
+    index = pd.bdate_range('2016-01-01', periods=750)
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(5).normal(0, 0.02, len(index))))
+    frame = pd.DataFrame({'Open': close * 1.001, 'High': close * 1.01, 'Low': close * 0.99,
+                          'Close': close, 'Adj Close': close, 'Volume': 1e6}, index=index)
+
+    batch = bc.evaluate_strategy_population(frame, 'SPY', strategy, population, period_display='3y')
+    singles = [bc.run_strategy_backtest_on_data(frame, 'SPY', strategy, p, period_display='3y') for p in population]
+    assert batch == singles
+
+
+def test_process_pool_preserves_order(monkeypatch):
+    import asyncio
+    import pandas as pd
+    from backend.integration import backtest_command as bc
+    from backend.integration import backtest_pool as bp
+    from backend.integration import process_pool as pp
+
+    monkeypatch.setattr(pp, 'PROCESS_WORKERS', 2)
+    index = pd.bdate_range('2016-01-01', periods=500, tz='America/New_York')
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(9).normal(0, 0.02, len(index))))
+    frame = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                          'Close': close, 'Adj Close': close, 'Volume': 1e6}, index=index)
+    population = [{'short_ma': s, 'long_ma': 60} for s in range(5, 50, 4)]
+
+    async def scenario():
+        shared = bp.SharedFrame(frame)
+        try:
+            return await bp.evaluate_population_parallel(frame, shared, 'SPY', 'ma_crossover', population, '2y')
+        finally:
+            shared.close()
+            pp.shutdown_process_pool()
+
+    assert asyncio.run(scenario()) == bc.evaluate_strategy_population(frame, 'SPY', 'ma_crossover', population, '2y')
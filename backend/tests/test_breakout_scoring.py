@@ -0,0 +1,59 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from backend.integration import breakout_command as bc
+from backend.integration.result_cache import ResultCache
+
+INDEX = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=252, tz='America/New_York')
+TICKERS = ['AAA', 'BRK-B', 'CCC']
+
+
+def make_download():
+    rng = np.random.default_rng(3)
+    closes = pd.DataFrame(40 * np.exp(np.cumsum(rng.normal(0.002, 0.02, (len(INDEX), len(TICKERS))), axis=0)), index=INDEX, columns=TICKERS)
+    closes.iloc[:100, 2] = np.nan # CCC listed mid-year
+    frame = pd.concat({'Close': closes, 'Open': closes}, axis=1)
+    frame.columns.names = ['Price', 'Ticker']
+    calls = []
+
+    async def fake_download(tickers, **kwargs):
+        calls.append(list(tickers))
+        return frame[[c for c in frame.columns if c[1] in tickers]]
+    return closes, fake_download, calls
+
+
+def test_candidates_are_scored_from_one_close_matrix():
+    closes, fake_download, calls = make_download()
+    fallback = []
+
+    async def fake_invest(ticker, sens, is_called_by_ai=False):
+        fallback.append(ticker)
+        return 12.0, 70.0
+
+    with patch.object(bc, 'download_async', fake_download), patch.object(bc, 'calculate_ema_invest', fake_invest):
+        scored = asyncio.run(bc.score_breakout_candidates(['AAA', 'BRK.B', 'CCC', 'ZZZ']))
+
+    assert calls == [['AAA', 'BRK-B', 'CCC', 'ZZZ']]
+    assert fallback == ['ZZZ'] and scored['ZZZ'] == (12.0, 70.0, None)
+    for ticker, symbol in (('AAA', 'AAA'), ('BRK.B', 'BRK-B'), ('CCC', 'CCC')):
+        data = closes[symbol].dropna()
+        ema_8 = data.ewm(span=8, adjust=False).mean().iloc[-1]
+        ema_55 = data.ewm(span=55, adjust=False).mean().iloc[-1]
+        price, score, change = scored[ticker]
+        assert price == pytest.approx(data.iloc[-1])
+        assert score == pytest.approx((((ema_8 - ema_55) / ema_55) * 4 + 0.5) * 100)
+        assert change == pytest.approx((data.iloc[-1] / data.iloc[0] - 1) * 100)
+
+
+def test_charts_render_once_per_bucket_from_the_shared_matrix():
+    _, fake_download, calls = make_download()
+    with patch.object(bc, 'download_async', fake_download), patch.object(bc, 'result_cache', ResultCache()):
+        charts = asyncio.run(bc.render_breakout_charts(['AAA', 'BRK.B']))
+        again = asyncio.run(bc.render_breakout_charts(['AAA', 'BRK.B']))
+
+    assert set(charts) == {'AAA', 'BRK.B'}
+    assert all(c.startswith('data:image/png;base64,') for c in charts.values())
+    assert again == charts and len(calls) == 1
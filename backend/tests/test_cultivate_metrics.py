@@ -0,0 +1,69 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from backend.integration import cultivate_command as cc
+
+
+def make_closes(n_days=252, n_tickers=30, seed=4):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=n_days)
+    spy_ret = rng.normal(0.0004, 0.01, n_days)
+    betas = rng.uniform(0.3, 2.0, n_tickers)
+    rets = spy_ret[:, None] * betas + rng.normal(0, 0.015, (n_days, n_tickers))
+    closes = pd.DataFrame(100 * np.exp(np.cumsum(rets, axis=0)), index=index, columns=[f'T{i:02d}' for i in range(n_tickers)])
+    closes['SPY'] = 400 * np.exp(np.cumsum(spy_ret))
+    closes.iloc[:200, 0] = np.nan                                 # recent listing: 52 bars
+    closes.iloc[:240, 1] = np.nan                                 # too short to score
+    closes.iloc[rng.random(n_days) < 0.05, 2] = np.nan            # scattered gaps
+    closes.iloc[:, 3] = 50.0                                      # flat: zero returns
+    return closes
+
+
+def reference(closes):
+    returns = closes.pct_change(fill_method=None)
+    out = {}
+    for ticker in closes.columns:
+        aligned = pd.concat([returns[ticker], returns['SPY']], axis=1).dropna()
+        if len(aligned) <= 20:
+            continue
+        cov = np.cov(aligned.iloc[:, 0], aligned.iloc[:, 1])
+        if cov[1, 1] == 0:
+            continue
+        leverage = (aligned.iloc[:, 0] / aligned.iloc[:, 1]).replace([np.inf, -np.inf], np.nan).mean()
+        out[ticker] = {'beta_1y': cov[0, 1] / cov[1, 1], 'correlation_1y': aligned.iloc[:, 0].corr(aligned.iloc[:, 1]),
+                       'avg_leverage_general_1y': leverage}
+    return out
+
+
+def test_matrix_metrics_match_pairwise_reference():
+    closes = make_closes()
+    expected = reference(closes)
+    returns = closes.pct_change(fill_method=None)
+    got = cc._market_relative_metrics(returns.drop(columns='SPY'), returns['SPY']).to_dict('index')
+
+    assert 'T01' not in got and set(got) == set(expected) - {'SPY'}
+    for ticker, values in got.items():
+        for name, value in values.items():
+            if pd.isna(expected[ticker][name]):
+                assert pd.isna(value), (ticker, name)
+            else:
+                assert value == pytest.approx(expected[ticker][name], rel=1e-9), (ticker, name)
+
+
+def test_universe_and_spy_are_loaded_in_one_request():
+    closes = make_closes()
+    calls = []
+
+    async def fake_data(tickers, period="10y", interval="1d", is_called_by_ai=False):
+        calls.append((sorted(tickers), period))
+        return closes[[t for t in closes.columns if t in tickers]]
+
+    tickers = [c for c in closes.columns if c != 'SPY']
+    with patch.object(cc, 'get_yf_data_singularity', fake_data):
+        metrics = asyncio.run(cc.calculate_metrics_singularity(tickers, closes[['SPY']], is_called_by_ai=True))
+
+    assert calls == [(sorted(tickers + ['SPY']), '1y')]
+    assert metrics['T05']['beta_1y'] == pytest.approx(reference(closes)['T05']['beta_1y'])
@@ -0,0 +1,105 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from backend.integration import forecast_models as fm
+from backend.integration import process_pool as pp
+
+FEATURES = ['RSI', 'MACD', 'MACD_Signal', 'SMA_Diff', 'Volatility']
+
+
+def make_training_set(n=300, seed=5):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end='2026-10-16', periods=n)
+    X = pd.DataFrame(rng.normal(size=(n, len(FEATURES))), index=index, columns=FEATURES)
+    y_magnitude = pd.Series(X['MACD'] * 0.01 + rng.normal(0, 0.01, n), index=index)
+    y_direction = (y_magnitude > 0).astype(int)
+    close = pd.Series(100 + np.arange(n, dtype=float), index=index)
+    return X, y_direction, y_magnitude, close
+
+
+def test_fit_matches_inline_forests():
+    X, y_direction, y_magnitude, _ = make_training_set()
+    clf = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1).fit(X, y_direction)
+    reg = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1).fit(X, y_magnitude)
+    direction = clf.predict(X.iloc[-1:])[0]
+
+    got = fm.fit_horizon_models(X, y_direction, y_magnitude, n_jobs=1)
+    assert got[0] == direction
+    assert got[1] == pytest.approx(clf.predict_proba(X.iloc[-1:])[0][direction] * 100)
+    assert got[2] == pytest.approx(reg.predict(X.iloc[-1:])[0] * 100)
+
+
+def test_repeat_forecasts_on_the_same_bar_reuse_the_models():
+    X, y_direction, y_magnitude, close = make_training_set()
+    fits = []
+
+    def fake_fit(X, y_direction, y_magnitude, n_jobs=-1):
+        fits.append(len(X))
+        return 1, 60.0, 2.5
+
+    cache = fm.ForecastModelCache()
+
+    async def scenario():
+        first = await asyncio.gather(*[cache.forecast('aapl', '5-Day', X, y_direction, y_magnitude, close) for _ in range(3)])
+        again = await cache.forecast('AAPL', '5-Day', X, y_direction, y_magnitude, close)
+        other_horizon = await cache.forecast('AAPL', '1-Month (21-Day)', X, y_direction, y_magnitude, close)
+        next_bar = close.copy()
+        next_bar.loc[next_bar.index[-1] + pd.offsets.BDay()] = 500.0
+        after_new_bar = await cache.forecast('AAPL', '5-Day', X, y_direction, y_magnitude, next_bar)
+        return first, again, other_horizon, after_new_bar
+
+    with patch.object(pp, 'PROCESS_WORKERS', 1), patch.object(fm, 'fit_horizon_models', fake_fit):
+        first, again, _, _ = asyncio.run(scenario())
+
+    assert first == [(1, 60.0, 2.5)] * 3 and again == (1, 60.0, 2.5)
+    assert len(fits) == 3 # one per (horizon, bar): 5-Day, 1-Month, 5-Day on the new bar
+    assert len(cache) == 3
+
+
+def test_cache_is_bounded():
+    cache = fm.ForecastModelCache(max_size=2)
+    for i in range(3):
+        cache.put(('T', str(i)), (1, 50.0, 0.0))
+    assert len(cache) == 2 and cache.get(('T', '0')) is None
+
+
+def test_shared_features_with_horizon_labels_match_per_horizon_pipeline():
+    from backend.integration import mlforecast_command as mc
+
+    rng = np.random.default_rng(2)
+    index = pd.bdate_range(end='2026-10-16', periods=600)
+    close = 40 * np.exp(np.cumsum(rng.normal(0, 0.02, len(index))))
+    data = pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1e6}, index=index)
+
+    shared = mc.build_feature_matrix(data, 'D')
+    for horizon in (5, 21, 63):
+        legacy = mc.calculate_technical_indicators(data.copy(), freq='D')
+        legacy['Future_Close'] = legacy['Close'].shift(-horizon)
+        legacy['Pct_Change'] = (legacy['Future_Close'] - legacy['Close']) / legacy['Close']
+        legacy['Direction'] = (legacy['Future_Close'] > legacy['Close']).astype(int)
+        legacy.dropna(subset=mc.FORECAST_FEATURES + ['Direction', 'Pct_Change'], inplace=True)
+
+        X, y_direction, y_magnitude = mc.attach_horizon_labels(shared, horizon)
+        pd.testing.assert_frame_equal(X, legacy[mc.FORECAST_FEATURES])
+        pd.testing.assert_series_equal(y_direction, legacy['Direction'], check_names=False)
+        pd.testing.assert_series_equal(y_magnitude, legacy['Pct_Change'], check_names=False)
+
+
+def test_feature_matrix_is_built_once_per_snapshot():
+    _, _, _, close = make_training_set()
+    cache = fm.FeatureMatrixCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return pd.DataFrame({'Close': close})
+
+    first = cache.get_or_build('AAPL', 'D', close, build)
+    assert cache.get_or_build('aapl', 'D', close, build) is first
+    cache.get_or_build('AAPL', 'W', close, build)
+    cache.get_or_build('AAPL', 'D', close.iloc[:-1], build)
+    assert len(builds) == 3
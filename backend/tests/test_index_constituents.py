@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from backend.integration import index_constituents as ic
+
+
+def table(columns, rows):
+    head = ''.join(f"<th>{c}</th>" for c in columns)
+    body = ''.join('<tr>' + ''.join(f"<td>{v}</td>" for v in row) + '</tr>' for row in rows)
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+
+# Each page leads with a decoy table carrying the same symbol column, so only
+# the pinned (or first matching) components table yields the expected members
+PAGES = {
+    ic.INDEX_SOURCES['sp500']['url']: table(['Symbol', 'Security', 'GICS Sector'], [['BRK.B', 'Berkshire', 'Financials'], ['MSFT', 'Microsoft', 'Information Technology']])
+                                      + table(['Date', 'Symbol'], [['2024-01-02', 'OLD1']]),
+    ic.INDEX_SOURCES['sp100']['url']: table(['Date', 'Symbol'], [['2024-01-02', 'GONE']])
+                                      + table(['Year', 'Count'], [[2024, 100]])
+                                      + table(['Symbol', 'Name', 'Sector'], [['AAPL', 'Apple', 'Information Technology'], ['BRK.B', 'Berkshire', 'Financials']]),
+    ic.INDEX_SOURCES['nasdaq100']['url']: table(['Year', 'Count'], [[2024, 101]])
+                                          + table(['Company', 'Ticker', 'GICS Sector'], [['Nvidia', 'NVDA', 'Information Technology'], ['Amazon', 'AMZN', 'Consumer Discretionary']]),
+}
+
+
+def fake_get(url, headers=None, timeout=None):
+    return SimpleNamespace(text=f"<html><body>{PAGES[url]}</body></html>", raise_for_status=lambda: None)
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path):
+    with patch.object(ic, 'CONSTITUENTS_CACHE_FILE', str(tmp_path / 'index_constituents.json')), \
+         patch.object(ic, '_memo', {}), patch.object(ic, '_failed_at', {}), \
+         patch.object(ic, '_disk_loaded', False), \
+         patch.object(ic.requests, 'get', fake_get):
+        yield
+
+
+@pytest.mark.parametrize('index_name, expected', [
+    ('sp500', ['BRK-B', 'MSFT']),
+    ('sp100', ['AAPL', 'BRK-B']),
+    ('nasdaq100', ['AMZN', 'NVDA']),
+])
+def test_each_index_reads_its_components_table(index_name, expected):
+    assert ic.get_index_constituents(index_name) == expected
+
+
+def test_sectors_come_from_the_same_table():
+    assert ic.get_index_sectors('sp100') == {'AAPL': 'Information Technology', 'BRK-B': 'Financials'}
+    assert ic.get_index_sectors('nasdaq100')['NVDA'] == 'Information Technology'
+
+
+def test_pinned_table_without_the_column_falls_back_to_the_first_match():
+    sources = {**ic.INDEX_SOURCES, 'sp100': {**ic.INDEX_SOURCES['sp100'], 'table': 1}}
+    with patch.object(ic, 'INDEX_SOURCES', sources):
+        assert ic.get_index_constituents('sp100') == ['GONE']
+
+
+def test_failed_refresh_serves_the_stale_list_until_the_backoff_ends():
+    ic._memo['sp500'] = {'symbols': ['OLD'], 'sectors': {}, 'fetched_at': 0}
+    ic._disk_loaded = True
+    attempts = []
+
+    def failing_get(url, headers=None, timeout=None):
+        attempts.append(url)
+        raise ic.requests.ConnectionError("wikipedia down")
+
+    with patch.object(ic.requests, 'get', failing_get):
+        assert ic.get_index_constituents('sp500') == ['OLD']
+        assert ic.get_index_constituents('sp500') == ['OLD']
+        assert len(attempts) == 1
+
+        ic._failed_at['sp500'] -= ic.FAILURE_BACKOFF_SECONDS + 1
+        assert ic.get_index_constituents('sp500') == ['OLD']
+        assert len(attempts) == 2
+
+    assert ic.get_index_constituents('sp500', force_refresh=True) == ['BRK-B', 'MSFT']
+    assert 'sp500' not in ic._failed_at
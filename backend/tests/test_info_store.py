@@ -0,0 +1,69 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+from backend.integration import info_store as infos
+
+
+class FakeTicker:
+    calls = []
+    fail = False
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    @property
+    def info(self):
+        FakeTicker.calls.append(self.ticker)
+        if FakeTicker.fail:
+            raise RuntimeError("upstream down")
+        return {'symbol': self.ticker, 'shortName': f"{self.ticker} Inc.", 'regularMarketPrice': 10.0}
+
+
+def make_store(tmp_path):
+    FakeTicker.calls, FakeTicker.fail = [], False
+    return infos.InfoStore(str(tmp_path / 'info.sqlite'))
+
+
+def test_info_is_served_from_disk_until_expiry(tmp_path):
+    with patch.object(infos.yf, 'Ticker', FakeTicker):
+        store = make_store(tmp_path)
+        assert store.get_info('brk.b')['shortName'] == "BRK-B Inc."
+        # A fresh instance reads the same database without going upstream
+        assert infos.InfoStore(store.path).get_info('BRK-B')['symbol'] == 'BRK-B'
+        assert FakeTicker.calls == ['BRK-B']
+
+        store.put('BRK-B', {'symbol': 'BRK-B', 'regularMarketPrice': 10.0}, now=time.time() - infos.INFO_TTL_MAX)
+        store.get_info('BRK-B')
+    assert FakeTicker.calls == ['BRK-B', 'BRK-B']
+
+
+def test_failed_refresh_falls_back_to_stale_copy(tmp_path):
+    with patch.object(infos.yf, 'Ticker', FakeTicker):
+        store = make_store(tmp_path)
+        store.put('AAPL', {'symbol': 'AAPL', 'regularMarketPrice': 1.0}, now=time.time() - infos.INFO_TTL_MAX)
+        FakeTicker.fail = True
+        assert store.get_info('AAPL')['regularMarketPrice'] == 1.0
+        assert store.get_info('MSFT') == {}
+
+
+def test_ttl_is_stable_per_ticker_and_short_for_incomplete_data():
+    assert infos.info_ttl('AAPL') == infos.info_ttl('AAPL')
+    assert infos.INFO_TTL_MIN <= infos.info_ttl('AAPL') < infos.INFO_TTL_MAX
+    assert infos.info_ttl('AAPL', {'symbol': 'AAPL'}) == infos.INFO_TTL_INCOMPLETE
+
+
+def test_prefill_fetches_only_missing_tickers_and_async_calls_share_a_fetch(tmp_path):
+    with patch.object(infos.yf, 'Ticker', FakeTicker):
+        store = make_store(tmp_path)
+        store.get_info('AAPL')
+        assert store.prefill(['AAPL', 'MSFT', 'NVDA', 'msft']) == 2
+        assert sorted(FakeTicker.calls) == ['AAPL', 'MSFT', 'NVDA']
+        assert store.stale(['AAPL', 'MSFT', 'NVDA', 'TSLA']) == ['TSLA']
+
+        async def run():
+            return await asyncio.gather(*[store.get_info_async('TSLA') for _ in range(4)])
+
+        results = asyncio.run(run())
+    assert FakeTicker.calls.count('TSLA') == 1
+    assert all(r['symbol'] == 'TSLA' for r in results)
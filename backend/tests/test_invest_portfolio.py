@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from backend.integration import invest_command as ic
+
+CONFIGS = {
+    'root': {'portfolio_code': 'root', 'ema_sensitivity': '2', 'amplification': '1.5', 'num_portfolios': '3',
+             'tickers_1': 'AAPL,MSFT,shared', 'weight_1': '40',
+             'tickers_2': 'shared,NVDA,deep', 'weight_2': '35',
+             'tickers_3': 'cyc,ODD', 'weight_3': '25'},
+    'shared': {'portfolio_code': 'shared', 'ema_sensitivity': '2', 'amplification': '1', 'num_portfolios': '2',
+               'tickers_1': 'AAPL,GOOG,AMZN', 'weight_1': '60', 'tickers_2': 'deep', 'weight_2': '40'},
+    'deep': {'portfolio_code': 'deep', 'ema_sensitivity': '1', 'amplification': '2', 'num_portfolios': '1',
+             'tickers_1': 'TSLA,MSFT,META', 'weight_1': '100'},
+    'cyc': {'portfolio_code': 'cyc', 'ema_sensitivity': '3', 'amplification': '1', 'num_portfolios': '1',
+            'tickers_1': 'root,XOM,cyc', 'weight_1': '100'},
+}
+
+
+def fake_score(ticker, sensitivity):
+    return 10.0 + sum(map(ord, ticker)) % 50, float((sum(map(ord, ticker)) * 7 + sensitivity * 13) % 100)
+
+
+def run_portfolio():
+    calls = {'batch': [], 'single': [], 'resolved': []}
+    real_process = ic.process_custom_portfolio
+
+    async def fake_batch(tickers, sensitivity, **kwargs):
+        calls['batch'].append((tuple(tickers), sensitivity))
+        return {t: fake_score(t, sensitivity) for t in tickers if t != 'ODD'}
+
+    async def fake_single(ticker, sensitivity, is_called_by_ai=False):
+        calls['single'].append((ticker, sensitivity))
+        return fake_score(ticker, sensitivity)
+
+    async def fake_load(**kwargs):
+        return CONFIGS
+
+    async def counting_process(*args, **kwargs):
+        calls['resolved'].append(kwargs.get('portfolio_data_config', args[0] if args else {}).get('portfolio_code'))
+        return await real_process(*args, **kwargs)
+
+    with patch.object(ic, 'calculate_ema_invest_batch', fake_batch), \
+         patch.object(ic, 'calculate_ema_invest', fake_single), \
+         patch.object(ic, '_load_all_portfolio_configs', fake_load), \
+         patch.object(ic, 'process_custom_portfolio', counting_process):
+        result = asyncio.run(ic.process_custom_portfolio(CONFIGS['root'], True, True, 100000.0,
+                                                         is_called_by_ai=True, ignore_market_conditions=True))
+    return result, calls
+
+
+def test_tree_is_scored_once_per_sensitivity():
+    (_, combined, cash, tailored), calls = run_portfolio()
+    batched = [(t, s) for tickers, s in calls['batch'] for t in tickers]
+    assert len(batched) == len(set(batched))
+    assert sorted(s for _, s in calls['batch']) == [1, 2, 3]
+    assert calls['single'] == [('ODD', 2)] # Only what the batch could not score
+    # 'shared' is reached twice and 'deep' three times, but each is resolved once
+    assert calls['resolved'].count('shared') == 1 and calls['resolved'].count('deep') == 1
+    assert sum(e['combined_percent_allocation'] for e in combined) == pytest.approx(100.0)
+    assert sum(h['actual_money_allocation'] for h in tailored) + cash == pytest.approx(100000.0)
+
+
+def test_shared_subtrees_are_not_aliased():
+    (_, combined, _, _), _ = run_portfolio()
+    deep_items = [e for e in combined if e['ticker'] == 'TSLA']
+    assert len(deep_items) == 3
+    assert len({id(e) for e in deep_items}) == 3
+    assert len({e['sub_portfolio_id'] for e in deep_items}) == 3
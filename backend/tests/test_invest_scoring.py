@@ -0,0 +1,70 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from backend.integration import invest_scoring as isc
+
+
+def make_closes(n_days=300, n_tickers=25, seed=9):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=n_days)
+    tickers = [f'T{i:02d}' for i in range(n_tickers)]
+    values = 50 * np.exp(np.cumsum(rng.normal(0, 0.015, (n_days, n_tickers)), axis=0))
+    values[rng.random(values.shape) < 0.02] = np.nan # scattered gaps
+    values[:250, 0] = np.nan                          # recent listing
+    values[-1, 1] = np.nan                            # missing live bar
+    values[-40:, 2] = np.nan                          # stale ticker
+    values[:, 3] = np.nan                             # no data at all
+    return pd.DataFrame(values, index=index, columns=tickers)
+
+
+def reference_score(series):
+    data = series.dropna()
+    if data.empty:
+        return None, None
+    ema_8 = data.ewm(span=8, adjust=False).mean().iloc[-1]
+    ema_55 = data.ewm(span=55, adjust=False).mean().iloc[-1]
+    return data.iloc[-1], (((ema_8 - ema_55) / ema_55) * 4 + 0.5) * 100
+
+
+def test_matrix_scores_match_per_ticker_ewm():
+    closes = make_closes()
+    scores = isc.score_invest_matrix(closes)
+    for ticker in closes.columns:
+        price, score = reference_score(closes[ticker])
+        if price is None:
+            assert pd.isna(scores.at[ticker, 'live_price']) and pd.isna(scores.at[ticker, 'score'])
+            continue
+        assert scores.at[ticker, 'live_price'] == price
+        assert scores.at[ticker, 'score'] == pytest.approx(score, rel=1e-12)
+        assert scores.at[ticker, 'last_bar'] == closes[ticker].last_valid_index()
+
+
+def test_stale_tickers_are_dropped():
+    scores = isc.score_invest_matrix(make_closes(), max_staleness_days=10)
+    assert pd.isna(scores.at['T02', 'score']) and pd.isna(scores.at['T02', 'live_price'])
+    assert pd.notna(scores.at['T01', 'score'])
+
+
+@pytest.mark.parametrize("group_by", ['column', 'ticker'])
+def test_batch_scoring_from_one_download(group_by):
+    closes = make_closes()
+    frame = pd.concat({'Close': closes, 'Volume': closes * 0 + 1}, axis=1, names=['Price', 'Ticker'])
+    if group_by == 'ticker':
+        frame.columns = frame.columns.swaplevel(0, 1)
+    calls = []
+
+    async def fake_download(tickers, **kwargs):
+        calls.append((tuple(tickers), kwargs))
+        return frame
+
+    with patch.object(isc, 'download_async', fake_download):
+        results = asyncio.run(isc.calculate_ema_invest_batch(['T00', 'T01', 'T03', 'NOPE', 'T04'], 2))
+
+    assert len(calls) == 1 and calls[0][1]['interval'] == '1d' and calls[0][1]['period'] == '1y'
+    assert calls[0][1]['max_age'] == isc.LIVE_MAX_AGE # live prices come from a freshly refreshed tail
+    assert set(results) == {'T00', 'T01', 'T04'}
+    price, score = reference_score(closes['T04'])
+    assert results['T04'] == (pytest.approx(price), pytest.approx(score))
@@ -0,0 +1,129 @@
+import asyncio
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+
+from backend.integration import matrix_cache as mc
+from backend.integration import risk_command as rc
+
+
+def make_frame(tickers, dates, offset=0.0):
+    fields = ['Close', 'High', 'Low', 'Open', 'Volume']
+    columns = pd.MultiIndex.from_product([fields, tickers], names=['Price', 'Ticker'])
+    values = np.arange(len(dates) * len(columns), dtype=np.float64).reshape(len(dates), len(columns)) + offset
+    return pd.DataFrame(values, index=pd.DatetimeIndex(dates, name='Date'), columns=columns)
+
+
+def test_append_new_tickers_and_bars(tmp_path):
+    cache = mc.MatrixCache(str(tmp_path / 'cache'))
+    dates = pd.bdate_range('2024-01-01', periods=10)
+    cache.append(make_frame(['AAA', 'BBB'], dates[:8]))
+    cache.append(make_frame(['CCC'], dates[:8], offset=1000))
+    cache.append(make_frame(['AAA', 'BBB', 'CCC'], dates[6:], offset=5000))
+
+    merged = cache.load()
+    assert list(merged.index) == list(dates)
+    assert set(merged.columns.get_level_values(1)) == {'AAA', 'BBB', 'CCC'}
+    assert merged[('Close', 'AAA')].iloc[0] == make_frame(['AAA', 'BBB'], dates[:8])[('Close', 'AAA')].iloc[0]
+    # Overlapping bars come from the newest segment
+    tail = make_frame(['AAA', 'BBB', 'CCC'], dates[6:], offset=5000)
+    assert merged[('Close', 'CCC')].iloc[6:].tolist() == tail[('Close', 'CCC')].tolist()
+    assert cache.last_date() == dates[-1]
+
+
+def test_nan_in_newer_segment_keeps_older_value(tmp_path):
+    cache = mc.MatrixCache(str(tmp_path / 'cache'))
+    dates = pd.bdate_range('2024-01-01', periods=3)
+    base = make_frame(['AAA'], dates)
+    cache.append(base)
+    update = make_frame(['AAA'], dates, offset=100)
+    update.iloc[1] = np.nan
+    cache.append(update)
+
+    merged = cache.load()
+    assert merged[('Close', 'AAA')].tolist() == [update[('Close', 'AAA')].iloc[0], base[('Close', 'AAA')].iloc[1], update[('Close', 'AAA')].iloc[2]]
+
+
+def test_compaction_preserves_data(tmp_path):
+    cache = mc.MatrixCache(str(tmp_path / 'cache'))
+    dates = pd.bdate_range('2024-01-01', periods=40)
+    with patch.object(mc, 'MAX_SEGMENTS', 4):
+        for i in range(10):
+            cache.append(make_frame([f'T{i}'], dates[i:i + 30]))
+    assert len(cache._segment_paths()) <= 4
+    merged = cache.load()
+    assert len(merged.columns.get_level_values(1).unique()) == 10
+    assert merged[('Close', 'T9')].first_valid_index() == dates[9]
+    cache.clear()
+    assert not cache.exists() and cache.load().empty
+
+
+def test_fetch_and_cache_data_downloads_only_missing(tmp_path):
+    today = pd.Timestamp.now().normalize()
+    dates = pd.bdate_range(end=today, periods=20)
+    calls = []
+
+    async def fake_download(tickers, timeout, **kwargs):
+        calls.append((tuple(tickers), kwargs))
+        return make_frame(list(tickers), dates)
+
+    cache_dir = str(tmp_path / 'risk_cache')
+    with patch.object(rc, '_download_with_retry', fake_download):
+        first = asyncio.run(rc.fetch_and_cache_data(['AAA', 'BBB'], cache_dir, '6mo'))
+        second = asyncio.run(rc.fetch_and_cache_data(['AAA', 'BBB', 'CCC'], cache_dir, '6mo'))
+
+    assert set(first.columns.get_level_values(1)) == {'AAA', 'BBB'}
+    assert set(second.columns.get_level_values(1)) == {'AAA', 'BBB', 'CCC'}
+    assert [c[0] for c in calls if 'period' in c[1]] == [('AAA', 'BBB'), ('CCC',)]
+
+
+
+def test_tail_refresh_runs_once_per_closed_session(tmp_path):
+    # A session closed after the last cached bar, but upstream has nothing newer
+    # (e.g. a holiday), so the tail fetch cannot move the last bar
+    session_close = rc.datetime.now(rc.EST_TIMEZONE) - rc.timedelta(hours=1)
+    dates = pd.bdate_range(end=session_close.date() - rc.timedelta(days=3), periods=20)
+    calls = []
+
+    async def fake_download(tickers, timeout, **kwargs):
+        calls.append(kwargs)
+        return make_frame(list(tickers), dates)
+
+    cache_dir = str(tmp_path / 'risk_cache')
+    with patch.object(rc, '_download_with_retry', fake_download):
+        with patch.object(rc, '_last_closed_session', lambda: session_close):
+            for _ in range(3):
+                asyncio.run(rc.fetch_and_cache_data(['AAA'], cache_dir, '6mo'))
+        assert len([c for c in calls if 'start' in c]) == 1
+        assert len(mc.MatrixCache(cache_dir)._segment_paths()) == 2
+
+        # The next session closing triggers one more tail fetch
+        with patch.object(rc, '_last_closed_session', lambda: session_close + rc.timedelta(hours=2)):
+            asyncio.run(rc.fetch_and_cache_data(['AAA'], cache_dir, '6mo'))
+    assert len([c for c in calls if 'start' in c]) == 2
+
+
+def test_last_closed_session_skips_weekends_and_open_sessions():
+    saturday = rc.EST_TIMEZONE.localize(rc.datetime(2026, 10, 17, 12))
+    assert rc._last_closed_session(saturday).date() == rc.datetime(2026, 10, 16).date()
+    monday_morning = rc.EST_TIMEZONE.localize(rc.datetime(2026, 10, 19, 10))
+    assert rc._last_closed_session(monday_morning).date() == rc.datetime(2026, 10, 16).date()
+    monday_evening = rc.EST_TIMEZONE.localize(rc.datetime(2026, 10, 19, 17))
+    assert rc._last_closed_session(monday_evening).date() == rc.datetime(2026, 10, 19).date()
+
+def test_leftover_files_do_not_break_append_or_load(tmp_path):
+    cache = mc.MatrixCache(str(tmp_path / 'cache'))
+    dates = pd.bdate_range('2024-01-01', periods=5)
+    cache.append(make_frame(['AAA'], dates))
+    # A killed writer from an older version, and a killed writer from this one
+    (tmp_path / 'cache' / 'segment_000002.npz.999.tmp.npz').write_bytes(b'partial')
+    (tmp_path / 'cache' / f'{mc.TEMP_PREFIX}000003.999.npz').write_bytes(b'partial')
+    cache.append(make_frame(['BBB'], dates))
+
+    assert [p.split('/')[-1] for p in cache._segment_paths()] == ['segment_000001.npz', 'segment_000002.npz']
+    assert set(cache.load().columns.get_level_values(1)) == {'AAA', 'BBB'}
+
+
+def test_caches_on_the_same_directory_share_a_lock(tmp_path):
+    assert mc.MatrixCache(str(tmp_path / 'cache'))._lock is mc.MatrixCache(str(tmp_path / 'cache') + '/')._lock
+    assert mc.MatrixCache(str(tmp_path / 'a'))._lock is not mc.MatrixCache(str(tmp_path / 'b'))._lock
@@ -0,0 +1,61 @@
+import time
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.integration import mlforecast_command as mc
+
+START = pd.Timestamp('2026-10-16')
+KEY_POINTS = {START: 100.0, START + pd.Timedelta(days=5): 103.0, START + pd.Timedelta(days=21): 98.0,
+              START + pd.Timedelta(weeks=26): 120.0, START + pd.Timedelta(weeks=52): 131.0}
+
+
+def legacy_path(key_points, hist_volatility):
+    """The day-by-day loop the vectorized simulation replaced."""
+    sorted_dates = sorted(key_points.keys())
+    rng = np.random.default_rng(seed=42)
+    path = []
+    for i in range(len(sorted_dates) - 1):
+        start_date, end_date = sorted_dates[i], sorted_dates[i + 1]
+        start_price, end_price = key_points[start_date], key_points[end_date]
+        days_diff = (end_date - start_date).days
+        growth_rate = np.log(end_price / start_price) / days_diff
+        segment_noise = rng.normal(0, hist_volatility * 0.3, days_diff)
+        segment_noise = segment_noise - np.cumsum(segment_noise)[-1] / days_diff
+        current, day_idx, cumulative = start_date, 0, 0
+        while current < end_date:
+            cumulative += segment_noise[day_idx]
+            if current > start_date:
+                base = start_price * np.exp(growth_rate * (current - start_date).days)
+                path.append({'date': current, 'price': max(base * (1 + cumulative), 0.01)})
+            current += pd.Timedelta(days=1)
+            day_idx += 1
+    return path
+
+
+def test_first_path_reproduces_the_legacy_loop():
+    dates, paths = mc.simulate_forecast_paths(KEY_POINTS, 0.02, n_paths=50)
+    legacy = legacy_path(KEY_POINTS, 0.02)
+    assert paths.shape == (50, len(legacy))
+    assert dates == [p['date'] for p in legacy]
+    assert paths[0].tolist() == [p['price'] for p in legacy]
+
+
+def test_paths_spread_around_the_anchors_and_are_reproducible():
+    dates, paths = mc.simulate_forecast_paths(KEY_POINTS, 0.02, n_paths=2000)
+    _, again = mc.simulate_forecast_paths(KEY_POINTS, 0.02, n_paths=2000)
+    assert np.array_equal(paths, again)
+    assert (paths >= 0.01).all()
+
+    # The day before an anchor sits close to it on every path; mid-segment the band widens
+    before_anchor = dates.index(START + pd.Timedelta(weeks=26) - pd.Timedelta(days=1))
+    mid_segment = dates.index(START + pd.Timedelta(weeks=39))
+    low, high = np.percentile(paths, mc.FORECAST_BAND_PERCENTILES, axis=0)
+    assert high[mid_segment] - low[mid_segment] > 5 * (high[before_anchor] - low[before_anchor])
+    assert np.median(paths[:, before_anchor]) == pytest.approx(120.0, rel=0.01)
+
+
+def test_thousands_of_paths_stay_fast():
+    start = time.perf_counter()
+    mc.simulate_forecast_paths(KEY_POINTS, 0.02, n_paths=5000)
+    assert time.perf_counter() - start < 2.0
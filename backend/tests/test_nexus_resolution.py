@@ -0,0 +1,116 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+
+from backend.integration import nexus_command as nc
+from backend.integration import custom_command as cc
+
+NEXUS_CONFIG = {
+    'nexus_code': 'DAG', 'num_components': 5, 'frac_shares': 'true',
+    'component_1_type': 'command', 'component_1_value': 'Market', 'component_1_weight': 20,
+    'component_2_type': 'command', 'component_2_value': 'Breakout', 'component_2_weight': 20,
+    'component_3_type': 'portfolio', 'component_3_value': 'alpha', 'component_3_weight': 20,
+    'component_4_type': 'portfolio', 'component_4_value': 'beta', 'component_4_weight': 20,
+    'component_5_type': 'command', 'component_5_value': 'market', 'component_5_weight': 20,
+}
+DELAY = 0.2
+
+
+def test_components_resolve_concurrently_and_share_commands():
+    calls = {'market': 0, 'breakout': 0, 'prices': [], 'portfolios': []}
+
+    async def fake_market(symbols, sens):
+        calls['market'] += 1
+        await asyncio.sleep(DELAY)
+        return [{'ticker': t, 'score': 90 - i} for i, t in enumerate(symbols)]
+
+    async def fake_breakout(is_called_by_ai=True, include_charts=True):
+        calls['breakout'] += 1
+        await asyncio.sleep(DELAY)
+        return {'status': 'success', 'current_breakout_stocks': [{'Ticker': 'AAA'}, {'Ticker': 'BBB'}]}
+
+    async def fake_price(ticker, sens, is_called_by_ai=False):
+        calls['prices'].append(ticker)
+        return 10.0, 60.0
+
+    async def fake_load(code):
+        return {'portfolio_code': code}
+
+    async def fake_portfolio(portfolio_data_config, total_value_singularity, **kwargs):
+        calls['portfolios'].append(portfolio_data_config['portfolio_code'])
+        await asyncio.sleep(DELAY)
+        holdings = [{'ticker': 'AAA', 'shares': total_value_singularity / 20, 'actual_money_allocation': total_value_singularity / 2, 'live_price_at_eval': 10.0}]
+        return holdings, [], 0.0, holdings
+
+    with patch.object(nc, 'calculate_market_invest_scores_singularity', fake_market), \
+         patch.object(nc, 'get_sp500_symbols_singularity', lambda: ['AAA', 'CCC', 'DDD']), \
+         patch.object(nc, 'run_breakout_analysis_singularity', fake_breakout), \
+         patch.object(nc, 'calculate_ema_invest', fake_price), \
+         patch.object(nc, 'load_portfolio_config', fake_load), \
+         patch.object(nc, 'process_custom_portfolio', fake_portfolio):
+        start = time.perf_counter()
+        final, cash = asyncio.run(nc.process_nexus_portfolio(dict(NEXUS_CONFIG), 10000.0, 'DAG'))
+        elapsed = time.perf_counter() - start
+
+    assert calls['market'] == 1 and calls['breakout'] == 1
+    assert sorted(calls['prices']) == ['AAA', 'BBB', 'CCC', 'DDD'] # Shared across Market x2 and Breakout
+    assert sorted(calls['portfolios']) == ['alpha', 'beta']
+    # Breakout pre-scan and Market overlap, then the portfolios run side by side: ~2 delays, not 4
+    assert elapsed < 3.5 * DELAY
+    assert sum(h['actual_money_allocation'] for h in final) + cash == pytest.approx(10000.0)
+    aaa = next(h for h in final if h['ticker'] == 'AAA')
+    assert aaa['shares'] == pytest.approx(round(2 * 2000 / 3 / 10 + 2000 / 2 / 10 + 2 * 100, 2))
+
+
+
+def test_zero_weight_commands_are_not_started():
+    started = []
+
+    async def fake_market(symbols, sens):
+        started.append('market')
+        return []
+
+    async def fake_breakout(is_called_by_ai=True, include_charts=True):
+        started.append('breakout')
+        return {'status': 'success', 'current_breakout_stocks': []}
+
+    resolution = nc._NexusResolution()
+
+    async def scenario(config):
+        resolution.start_commands(config)
+        await asyncio.sleep(0)
+        resolution.close()
+
+    config = {'num_components': 2,
+              'component_1_type': 'command', 'component_1_value': 'Market', 'component_1_weight': 0,
+              'component_2_type': 'portfolio', 'component_2_value': 'alpha', 'component_2_weight': 100}
+    with patch.object(nc, 'calculate_market_invest_scores_singularity', fake_market), \
+         patch.object(nc, 'get_sp500_symbols_singularity', lambda: ['AAA']), \
+         patch.object(nc, 'run_breakout_analysis_singularity', fake_breakout):
+        asyncio.run(scenario(config))
+        assert started == [] and resolution._tasks == {}
+
+        # With no weights at all every component is auto-balanced, so all commands start
+        unweighted = {**config, 'component_1_weight': 0, 'component_2_weight': 0,
+                      'component_2_type': 'command', 'component_2_value': 'Breakout'}
+        asyncio.run(scenario(unweighted))
+    assert set(resolution._tasks) == {('market',), ('breakout',)}
+
+def test_fetch_nexus_tickers_looks_up_each_code_once():
+    portfolios = {
+        'root': {'num_portfolios': '2', 'tickers_1': 'AAPL,shared,MSFT', 'tickers_2': 'shared,leaf'},
+        'shared': {'num_portfolios': '1', 'tickers_1': 'leaf,NVDA,root'},
+        'leaf': {'num_portfolios': '1', 'tickers_1': 'TSLA,AAPL'},
+    }
+    lookups = []
+
+    async def fake_load(code):
+        lookups.append(code.lower())
+        return portfolios.get(code.lower())
+
+    with patch.object(cc, 'load_portfolio_config', fake_load):
+        tickers = asyncio.run(nc.fetch_nexus_tickers('root'))
+
+    assert sorted(tickers) == ['AAPL', 'MSFT', 'NVDA', 'TSLA']
+    assert len(lookups) == len(set(lookups))
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from backend.integration import options_store as opts
+
+TODAY = datetime.now()
+EXPIRIES = [(TODAY + timedelta(days=d)).strftime('%Y-%m-%d') for d in (3, 10, 31, 60)]
+
+
+def side(ivs):
+    strikes = np.array([90.0, 95.0, 100.0, 105.0, 110.0])
+    return pd.DataFrame({'contractSymbol': [f"X{s:.0f}" for s in strikes], 'strike': strikes, 'lastPrice': 1.0,
+                         'bid': 0.9, 'ask': 1.1, 'volume': 10.0, 'openInterest': 100, 'impliedVolatility': ivs,
+                         'inTheMoney': strikes < 100, 'lastTradeDate': pd.Timestamp('2024-01-02')},
+                        index=[7, 8, 9, 10, 11])
+
+
+class FakeTicker:
+    calls = []
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    @property
+    def options(self):
+        FakeTicker.calls.append(('options', self.ticker))
+        return tuple(EXPIRIES)
+
+    def option_chain(self, expiry):
+        FakeTicker.calls.append(('chain', self.ticker, expiry))
+        return SimpleNamespace(calls=side([0.5, 0.4, 0.30, 0.35, 0.45]), puts=side([0.6, 0.5, 0.34, 0.4, 0.5]))
+
+
+def make_store(tmp_path):
+    FakeTicker.calls = []
+    return opts.OptionsStore(str(tmp_path / 'options.sqlite'))
+
+
+def test_atm_iv_matches_the_assess_calculation(tmp_path):
+    with patch.object(opts.yf, 'Ticker', FakeTicker):
+        store = make_store(tmp_path)
+        iv = store.atm_iv('AAPL', 101.0)
+
+    assert ('chain', 'AAPL', EXPIRIES[2]) in FakeTicker.calls
+    assert iv == (0.30 + 0.34) / 2
+    assert opts.closest_expiration(EXPIRIES, 30, TODAY) == EXPIRIES[2]
+    assert store.iv_history('AAPL').tolist() == [iv]
+
+
+def test_chains_are_served_from_disk_until_expiry(tmp_path):
+    with patch.object(opts.yf, 'Ticker', FakeTicker):
+        store = make_store(tmp_path)
+        calls, puts = store.chain('AAPL', EXPIRIES[0])
+        again, _ = opts.OptionsStore(store.path).chain('AAPL', EXPIRIES[0])
+        assert len([c for c in FakeTicker.calls if c[0] == 'chain']) == 1
+        pd.testing.assert_frame_equal(again, calls, check_dtype=False)
+        assert list(calls.columns) == opts.CHAIN_COLUMNS
+
+        with patch.object(opts.time, 'time', return_value=time.time() + opts.CHAIN_TTL + 1):
+            store.chain('AAPL', EXPIRIES[0])
+    assert len([c for c in FakeTicker.calls if c[0] == 'chain']) == 2
+
+
+def test_iv_rank_from_stored_history(tmp_path):
+    store = make_store(tmp_path)
+    for i in range(opts.IV_RANK_MIN_POINTS - 1):
+        store.record_iv('MSFT', 0.20 + 0.01 * i, (TODAY - timedelta(days=40 - i)).strftime('%Y-%m-%d'))
+    assert store.iv_rank('MSFT') is None
+
+    store.record_iv('MSFT', 0.20)
+    history = store.iv_history('MSFT')
+    expected = (0.20 - history.min()) / (history.max() - history.min()) * 100
+    assert store.iv_rank('MSFT') == expected
+    assert store.iv_rank('MSFT', current_iv=1.0) == 100.0
+    assert store.iv_rank('msft') == expected and store.iv_rank('NVDA') is None
+
+
+def test_concurrent_atm_iv_requests_share_one_fetch(tmp_path):
+    with patch.object(opts.yf, 'Ticker', FakeTicker):
+        store = make_store(tmp_path)
+
+        async def run():
+            return await asyncio.gather(*[store.atm_iv_async('NVDA', 100.0) for _ in range(4)])
+
+        results = asyncio.run(run())
+    assert len(set(results)) == 1
+    assert len([c for c in FakeTicker.calls if c[0] == 'chain']) == 1
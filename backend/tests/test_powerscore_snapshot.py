@@ -0,0 +1,128 @@
+import asyncio
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+
+from backend.integration import price_store as ps
+from backend.integration import powerscore_snapshot as snap
+
+# --- Fake upstream ---
+INDEX = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=1500, tz='America/New_York')
+
+
+def bars(scale):
+    close = np.linspace(100.5, 200.5, len(INDEX)) * scale
+    return pd.DataFrame({'Open': close - 0.5, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Adj Close': close, 'Volume': 1_000_000.0}, index=INDEX)
+
+
+BARS = {'AAPL': bars(1.0), 'SPY': bars(4.0)}
+
+
+class FakeTicker:
+    calls = []
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def history(self, interval, auto_adjust, actions, period=None, start=None, end=None):
+        FakeTicker.calls.append((self.ticker, period))
+        frame = BARS[self.ticker]
+        start_ts = ps._period_start(period, pd.Timestamp.now(tz='UTC')) if period else pd.Timestamp(start)
+        return frame[frame.index >= start_ts].copy()
+
+
+def make_store(tmp_path):
+    FakeTicker.calls = []
+    store = ps.PriceStore(str(tmp_path))
+
+    async def download_async(tickers, **kwargs):
+        return store.download(tickers, **kwargs)
+
+    return store, download_async
+
+
+def test_snapshot_loads_once_over_the_longest_period(tmp_path):
+    store, download_async = make_store(tmp_path)
+    with patch.object(ps.yf, 'Ticker', FakeTicker), patch.object(snap, 'download_async', wraps=download_async) as load:
+        snapshot = snap.PowerScoreSnapshot('aapl', ['1y', '5y'])
+
+        async def run():
+            return await asyncio.gather(snapshot.history('AAPL', '1y'), snapshot.history('AAPL', '5y'),
+                                        snapshot.closes(['AAPL', 'SPY'], '1y'))
+
+        asyncio.run(run())
+
+    assert snapshot.period == '5y'
+    assert snapshot.covers(['AAPL', 'spy']) and not snapshot.covers(['MSFT'])
+    assert load.call_count == 1
+
+
+def test_slices_match_fresh_requests(tmp_path):
+    store, download_async = make_store(tmp_path)
+    with patch.object(ps.yf, 'Ticker', FakeTicker), patch.object(snap, 'download_async', download_async):
+        snapshot = snap.PowerScoreSnapshot('AAPL', ['1y', '5y'])
+        history = asyncio.run(snapshot.history('AAPL', '1y'))
+        closes = asyncio.run(snapshot.closes(['AAPL', 'SPY'], '1y'))
+        fresh = store.download(['AAPL'], period='1y', interval='1d', auto_adjust=True, progress=False)
+
+    fresh.columns = fresh.columns.get_level_values(0)
+    pd.testing.assert_frame_equal(history[fresh.columns], fresh, check_names=False, check_freq=False)
+    assert history.index.tz is None
+    assert list(closes.columns) == ['AAPL', 'SPY']
+    pd.testing.assert_series_equal(closes['AAPL'], fresh['Close'], check_names=False, check_freq=False)
+
+
+def test_trim_to_period_handles_naive_frames():
+    now = pd.Timestamp.now(tz='UTC')
+    naive = BARS['AAPL'].tz_localize(None)
+    trimmed = ps.trim_to_period(naive, '1y', now)
+    assert trimmed.index.min() >= ps.period_start('1y', now).tz_localize(None)
+    assert len(ps.trim_to_period(naive, 'max', now)) == len(naive)
+
+
+def test_failed_load_is_retried():
+    good = pd.concat({'AAPL': BARS['AAPL'], 'SPY': BARS['SPY']}, axis=1)
+    frames = [RuntimeError("upstream down"), good]
+
+    async def flaky(*args, **kwargs):
+        result = frames.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    with patch.object(snap, 'download_async', wraps=flaky) as load:
+        snapshot = snap.PowerScoreSnapshot('AAPL', ['1y'])
+
+        async def run():
+            try:
+                await snapshot.history('AAPL', '1y')
+            except RuntimeError:
+                pass
+            return await snapshot.history('AAPL', '1y')
+
+        assert not asyncio.run(run()).empty
+    assert load.call_count == 2
+
+
+def test_empty_or_partial_load_is_not_cached():
+    frames = [pd.DataFrame(), pd.concat({'SPY': BARS['SPY']}, axis=1)]
+
+    async def thin(*args, **kwargs):
+        return frames.pop(0)
+
+    with patch.object(snap, 'download_async', wraps=thin) as load:
+        snapshot = snap.PowerScoreSnapshot('AAPL', ['1y'])
+
+        async def run():
+            for _ in range(2):
+                try:
+                    await snapshot.history('AAPL', '1y')
+                except LookupError:
+                    pass
+                else:
+                    raise AssertionError("an empty snapshot load should raise")
+
+        asyncio.run(run())
+    assert load.call_count == 2
+    assert snapshot._task is None
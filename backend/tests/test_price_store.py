@@ -0,0 +1,130 @@
+import asyncio
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+
+from backend.integration import price_store as ps
+
+# --- Fake upstream ---
+INDEX = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=1500, tz='America/New_York')
+BARS = pd.DataFrame({
+    'Open': np.linspace(100, 200, len(INDEX)),
+    'High': np.linspace(101, 201, len(INDEX)),
+    'Low': np.linspace(99, 199, len(INDEX)),
+    'Close': np.linspace(100.5, 200.5, len(INDEX)),
+    'Adj Close': np.linspace(100.5, 200.5, len(INDEX)) * 0.95,
+    'Volume': 1_000_000.0,
+}, index=INDEX)
+
+
+class FakeTicker:
+    calls = []
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def history(self, interval, auto_adjust, actions, period=None, start=None, end=None):
+        FakeTicker.calls.append((self.ticker, period, start))
+        if period:
+            start_ts = ps._period_start(period, pd.Timestamp.now(tz='UTC'))
+            return BARS[BARS.index >= start_ts].copy()
+        start_ts = pd.Timestamp(start)
+        if start_ts.tzinfo is None:
+            start_ts = start_ts.tz_localize('America/New_York')
+        return BARS[BARS.index >= start_ts].copy()
+
+
+def make_store(tmp_path):
+    FakeTicker.calls = []
+    return ps.PriceStore(str(tmp_path))
+
+
+def test_download_matches_yfinance_layout(tmp_path):
+    with patch.object(ps.yf, 'Ticker', FakeTicker):
+        store = make_store(tmp_path)
+        data = store.download(['AAPL', 'MSFT'], period='1y', interval='1d', auto_adjust=False)
+
+    assert data.columns.names == ['Price', 'Ticker']
+    assert ('Adj Close', 'AAPL') in data.columns and ('Close', 'MSFT') in data.columns
+    assert data.index.tz is None
+
+
+def test_repeat_requests_are_served_locally(tmp_path):
+    with patch.object(ps.yf, 'Ticker', FakeTicker):
+        store = make_store(tmp_path)
+        store.get_history('AAPL', period='2y')
+        store.get_history('AAPL', period='1y')
+        # A fresh instance reads the same files without going upstream
+        adjusted = ps.PriceStore(str(tmp_path)).get_history('AAPL', period='6mo')
+
+    assert len(FakeTicker.calls) == 1
+    assert np.allclose(adjusted['Close'], BARS.loc[adjusted.index, 'Adj Close'])
+
+
+def test_stale_store_fetches_only_the_tail(tmp_path):
+    with patch.object(ps.yf, 'Ticker', FakeTicker):
+        store = make_store(tmp_path)
+        store.get_raw('AAPL', period='1y')
+        store._entries[('AAPL', '1d')].fetched_at -= 24 * 3600
+        store.get_raw('AAPL', period='1y')
+
+    assert len(FakeTicker.calls) == 2
+    _, period, start = FakeTicker.calls[-1]
+    assert period is None and start >= INDEX[-ps.TAIL_OVERLAP_BARS].normalize()
+
+
+def test_max_age_zero_always_refreshes_the_tail(tmp_path):
+    with patch.object(ps.yf, 'Ticker', FakeTicker):
+        store = make_store(tmp_path)
+        store.get_history('AAPL', period='1y')
+        store.get_history('AAPL', period='1y')
+        assert len(FakeTicker.calls) == 1
+        store.get_history('AAPL', period='1y', max_age=0)
+        assert len(FakeTicker.calls) == 2
+        store.download(['AAPL'], period='1y', max_age=0)
+
+    assert len(FakeTicker.calls) == 3
+    _, period, start = FakeTicker.calls[-1]
+    assert period is None and start >= INDEX[-ps.TAIL_OVERLAP_BARS].normalize()
+
+
+def test_single_flight_coalesces_identical_requests():
+    calls = []
+
+    async def fetch(ticker):
+        calls.append(ticker)
+        await asyncio.sleep(0.01)
+        return pd.DataFrame({'Close': [1.0, 2.0]})
+
+    async def scenario():
+        flights = ps.SingleFlight()
+        results = await asyncio.gather(*[flights.run(('SPY', '1y'), fetch, 'SPY') for _ in range(10)])
+        other = await flights.run(('QQQ', '1y'), fetch, 'QQQ')
+        return flights, results, other
+
+    flights, results, other = asyncio.run(scenario())
+    assert calls == ['SPY', 'QQQ']
+    assert flights.in_flight() == 0
+    # Every waiter gets an independent copy
+    results[0]['Close'] = 0.0
+    assert results[1]['Close'].tolist() == [1.0, 2.0]
+
+
+def test_refresh_listeners_fire_only_when_bars_change(tmp_path):
+    seen = []
+    with patch.object(ps.yf, 'Ticker', FakeTicker):
+        store = make_store(tmp_path)
+        store.add_refresh_listener(lambda ticker, interval: seen.append((ticker, interval)))
+        store.get_raw('AAPL', period='1y')
+        store._entries[('AAPL', '1d')].fetched_at -= 24 * 3600
+        store.get_raw('AAPL', period='1y')
+        assert seen == []
+
+        # A revised live bar upstream is a change worth announcing
+        BARS.iloc[-1, BARS.columns.get_loc('Close')] += 1.0
+        try:
+            store._entries[('AAPL', '1d')].fetched_at -= 24 * 3600
+            store.get_raw('AAPL', period='1y')
+        finally:
+            BARS.iloc[-1, BARS.columns.get_loc('Close')] -= 1.0
+    assert seen == [('AAPL', '1d')]
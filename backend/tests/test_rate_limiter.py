@@ -0,0 +1,47 @@
+import time
+
+from backend.integration.rate_limiter import TokenBucket, is_rate_limit_error
+
+
+def test_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=50.0, capacity=2, min_rate=1.0, max_rate=100.0)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    # Burst exhausted: the third token takes ~1/rate seconds to refill
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.015
+
+
+def test_throttle_backs_off_and_success_recovers():
+    bucket = TokenBucket(rate=10.0, capacity=5, min_rate=1.0, max_rate=20.0)
+    bucket.report_throttled()
+    state = bucket.snapshot()
+    assert state['rate'] == 5.0
+    assert state['cooldown_remaining'] > 0
+    assert bucket._try_take(1) > 0
+
+    bucket.report_success()
+    assert bucket.snapshot()['consecutive_throttles'] == 0
+    assert bucket.rate > 5.0
+
+
+def test_rate_limit_error_detection():
+    assert is_rate_limit_error(Exception("429 Client Error: Too Many Requests"))
+    assert not is_rate_limit_error(ValueError("No data found"))
+
+
+def test_empty_results_do_not_slow_the_bucket():
+    bucket = TokenBucket(rate=10.0, capacity=5, min_rate=1.0, max_rate=20.0)
+    for _ in range(5):
+        bucket.report_result(None)
+    assert bucket.rate == 10.0
+
+
+def test_cooldown_end_does_not_release_a_full_burst():
+    bucket = TokenBucket(rate=10.0, capacity=5, min_rate=1.0, max_rate=20.0)
+    bucket.report_throttled()
+    # Pretend a 5 s cooldown ended a moment ago: only that moment's refill is available
+    bucket._last_refill -= 5.0
+    bucket._cooldown_until = time.monotonic() - 0.01
+    assert bucket._try_take(5) > 0
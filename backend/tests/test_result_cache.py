@@ -0,0 +1,96 @@
+import asyncio
+
+from backend.integration.result_cache import ResultCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def counting(value):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return value
+    return compute, calls
+
+
+def test_second_caller_in_the_same_bucket_is_a_lookup():
+    cache = ResultCache()
+    compute, calls = counting([{'ticker': 'AAPL', 'score': 61.0}])
+
+    first = run(cache.get_or_compute('market_scores', (['AAPL'], 2), compute))
+    first[0]['score'] = 0.0 # Callers own what they get back
+    second = run(cache.get_or_compute('market_scores', (['AAPL'], 2), compute))
+
+    assert len(calls) == 1
+    assert second == [{'ticker': 'AAPL', 'score': 61.0}]
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResultCache()
+    compute, calls = counting({'status': 'success'})
+
+    async def scenario():
+        return await asyncio.gather(*[cache.get_or_compute('breakout', (), compute) for _ in range(5)])
+
+    results = run(scenario())
+    assert len(calls) == 1
+    assert all(r == {'status': 'success'} for r in results)
+    assert len({id(r) for r in results}) == 5
+
+
+def test_arguments_and_as_of_bucket_are_part_of_the_key():
+    cache = ResultCache()
+    ttl = cache.ttl('1d')
+    now = 1_700_000_000 // ttl * ttl
+
+    assert cache.key('market_scores', (['A', 'B'], 2), '1d', now) == cache.key('market_scores', (['A', 'B'], 2), '1d', now + ttl - 1)
+    assert cache.key('market_scores', (['A', 'B'], 2), '1d', now) != cache.key('market_scores', (['A', 'B'], 2), '1d', now + ttl)
+    assert cache.key('market_scores', (['A', 'B'], 2), '1d', now) != cache.key('market_scores', (['A', 'B'], 3), '1d', now)
+    assert cache.key('cultivate', {'b': 1, 'a': 2}, '1d', now) == cache.key('cultivate', {'a': 2, 'b': 1}, '1d', now)
+
+
+def test_rejected_results_and_errors_are_not_kept():
+    cache = ResultCache()
+    compute, calls = counting({'status': 'error'})
+    for _ in range(2):
+        run(cache.get_or_compute('breakout', (), compute, cacheable=lambda r: r['status'] == 'success'))
+    assert len(calls) == 2
+
+    async def failing():
+        raise RuntimeError("screener down")
+    try:
+        run(cache.get_or_compute('breakout', (), failing))
+    except RuntimeError:
+        pass
+    assert len(cache) == 0
+
+
+def test_store_refresh_drops_only_dependent_results():
+    cache = ResultCache()
+    run(cache.get_or_compute('market_scores', 'sp500', counting(1)[0], interval='1d', tickers=['AAPL', 'BRK.B']))
+    run(cache.get_or_compute('breakout', (), counting({'stocks': ['NVDA']})[0], interval='1d', tickers=lambda r: r['stocks']))
+    run(cache.get_or_compute('hourly', (), counting(2)[0], interval='1h'))
+
+    cache.note_refresh('MSFT', '1d')
+    assert len(cache) == 3
+    cache.note_refresh('BRK-B', '1d')
+    assert len(cache) == 2
+    cache.note_refresh('NVDA', '1h') # Only results built on hourly bars
+    assert len(cache) == 1
+    assert cache.invalidate('breakout') == 1
+    assert len(cache) == 0
+
+
+def test_results_expire_at_the_end_of_their_bucket():
+    cache = ResultCache()
+    key = cache.key('breakout', (), '1d')
+    cache.put(key, {'status': 'success'})
+    assert cache.get(key) == (True, {'status': 'success'})
+
+    cache._results[key].expires_at = 0
+    assert cache.get(key) == (False, None)
+    assert len(cache) == 0
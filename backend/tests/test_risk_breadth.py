@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.integration import risk_command as rc
+
+
+def reference_ma_percentage(symbols, data, ma_window):
+    close_prices_df = data.loc[:, pd.IndexSlice['Close', :]]
+    close_prices_df.columns = close_prices_df.columns.droplevel(0)
+    above_ma_count, valid_stocks_count = 0, 0
+    for symbol in symbols:
+        if symbol in close_prices_df.columns:
+            close_prices = close_prices_df[symbol].dropna()
+            if len(close_prices) >= ma_window:
+                valid_stocks_count += 1
+                ma = close_prices.rolling(window=ma_window).mean().iloc[-1]
+                if pd.notna(ma) and close_prices.iloc[-1] > ma:
+                    above_ma_count += 1
+    return (above_ma_count / valid_stocks_count) * 100 if valid_stocks_count > 0 else 0.0
+
+
+def make_universe(n_tickers=60, n_days=260, seed=3):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2023-01-02', periods=n_days)
+    tickers = [f'T{i:03d}' for i in range(n_tickers)]
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_days, n_tickers)), axis=0))
+    closes[rng.random(closes.shape) < 0.03] = np.nan           # scattered gaps
+    closes[:200, :5] = np.nan                                  # recent listings
+    closes[-3:, 5:8] = np.nan                                  # stale tickers
+    columns = pd.MultiIndex.from_product([['Close', 'Volume'], tickers], names=['Price', 'Ticker'])
+    values = np.concatenate([closes, np.ones_like(closes)], axis=1)
+    return tickers, pd.DataFrame(values, index=dates, columns=columns)
+
+
+@pytest.mark.parametrize("window", [5, 20, 50, 200, 300])
+def test_vectorized_breadth_matches_per_symbol_loop(window):
+    tickers, data = make_universe()
+    symbols = tickers + ['MISSING']
+    assert rc._calculate_ma_percentage_from_data(symbols, data, window) == pytest.approx(reference_ma_percentage(symbols, data, window))
+
+
+def test_multiple_windows_in_one_pass():
+    tickers, data = make_universe()
+    results = rc._calculate_ma_percentages_from_data(tickers, data, [5, 20, 200])
+    assert set(results) == {5, 20, 200}
+    for window, value in results.items():
+        assert value == pytest.approx(reference_ma_percentage(tickers, data, window))
+    assert rc._calculate_ma_percentages_from_data([], data, [20]) == {20: 0.0}
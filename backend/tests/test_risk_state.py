@@ -0,0 +1,105 @@
+import csv
+import numpy as np
+import pandas as pd
+import pytest
+import pytz
+from datetime import datetime, timedelta
+from scipy.stats import percentileofscore
+
+from backend.integration import risk_state as rs
+
+
+def make_closes(n=300, seed=11):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2023-01-02', periods=n, tz='America/New_York')
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, n))), index=index)
+
+
+def reference(closes, spans, windows):
+    return (
+        {s: closes.ewm(span=s, adjust=False).mean().iloc[-1] for s in spans},
+        {w: (closes.rolling(window=w).mean().iloc[-1] if len(closes) >= w else None) for w in windows},
+    )
+
+
+def test_incremental_readings_match_full_recompute(tmp_path):
+    closes = make_closes()
+    spans, windows = (8, 55), (1, 5, 20, 50)
+    store = rs.RiskStateStore(str(tmp_path / 'state.json'))
+    key = store.key('SPY', '1d', spans, windows)
+
+    assert store.advance(key, closes.iloc[:100], spans, windows) is None # Nothing to resume from yet
+    store.advance(key, closes.iloc[:100], spans, windows, rebuild=True)
+    for t in range(100, len(closes)):
+        resume_from = store.resume_point(key)
+        tail = closes.iloc[:t + 1]
+        reading = store.advance(key, tail[tail.index >= resume_from], spans, windows)
+        assert reading is not None and reading['price'] == closes.iloc[t]
+        emas, smas = reference(closes.iloc[:t + 1], spans, windows)
+        for s in spans:
+            assert reading['ema'][s] == pytest.approx(emas[s], rel=1e-12)
+        for w in windows:
+            assert reading['sma'][w] == pytest.approx(smas[w], rel=1e-10)
+        assert reading['bars'] == t + 1
+
+    # A fresh store picks up the persisted state where the last one stopped
+    reloaded = rs.RiskStateStore(str(tmp_path / 'state.json'))
+    resumed, current = reloaded.advance(key, closes.iloc[-3:], spans, windows), store.advance(key, closes.iloc[-3:], spans, windows)
+    assert resumed['bars'] == current['bars']
+    assert resumed['ema'] == pytest.approx(current['ema']) and resumed['sma'] == pytest.approx(current['sma'])
+
+
+def test_readjusted_history_forces_rebuild(tmp_path):
+    closes = make_closes(120)
+    store = rs.RiskStateStore(str(tmp_path / 'state.json'))
+    key = store.key('SPY', '1d', (8,), (20,))
+    store.advance(key, closes.iloc[:100], (8,), (20,), rebuild=True)
+    assert store.advance(key, closes.iloc[95:110] * 0.98, (8,), (20,)) is None
+    assert store.advance(key, closes.iloc[105:110], (8,), (20,)) is None # Gap past the settled bar
+
+
+def write_market_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['Timestamp', 'Raw Market Invest Score', 'Market IV'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def reference_ivr(path, current_iv, now):
+    df = pd.read_csv(path, parse_dates=['Timestamp']).set_index('Timestamp').sort_index()
+    df['Market IV'] = pd.to_numeric(df['Market IV'], errors='coerce')
+    df = df.dropna(subset=['Market IV'])
+    df_1y = df[df.index >= now - timedelta(days=365)]
+    if len(df_1y) < 20:
+        return 50.0
+    lo, hi = min(df_1y['Market IV'].min(), current_iv), max(df_1y['Market IV'].max(), current_iv)
+    return float(np.clip((current_iv - lo) / (hi - lo) * 100, 0, 100)) if hi > lo else 50.0
+
+
+def test_market_history_window_matches_csv_recompute(tmp_path):
+    rng = np.random.default_rng(5)
+    now = datetime.now(pytz.utc)
+    path = str(tmp_path / 'market_data.csv')
+    start = now - timedelta(days=500)
+    rows = [{'Timestamp': (start + timedelta(days=i)).isoformat(),
+             'Raw Market Invest Score': f"{rng.normal(50, 20):.2f}" if i % 13 else 'N/A',
+             'Market IV': f"{rng.uniform(10, 40):.2f}"} for i in range(450)]
+    window = rs.MarketHistoryWindow(path)
+    assert window.iv_rank(20.0, now) == 50.0 and window.score_percentile(50.0) == 50.0 # No file yet
+
+    write_market_csv(path, rows)
+    for current in (5.0, 18.3, 25.0, 60.0):
+        assert window.iv_rank(current, now) == pytest.approx(reference_ivr(path, current, now))
+
+    new_rows = [{'Timestamp': (start + timedelta(days=450 + i)).isoformat(),
+                 'Raw Market Invest Score': f"{rng.normal(50, 20):.2f}",
+                 'Market IV': f"{rng.uniform(5, 50):.2f}"} for i in range(30)]
+    for row in new_rows:
+        window.append_row(row, list(row))
+    assert window._seeded and window._signature == window._file_signature()
+
+    scores = pd.to_numeric(pd.read_csv(path)['Raw Market Invest Score'], errors='coerce').dropna()
+    for current in (7.0, 22.2, 45.0):
+        assert window.iv_rank(current, now) == pytest.approx(reference_ivr(path, current, now))
+    for score in (-10.0, float(scores.iloc[3]), 50.0, 120.0):
+        assert window.score_percentile(score) == pytest.approx(percentileofscore(scores, score, kind='rank'))